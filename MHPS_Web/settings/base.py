@@ -29,6 +29,7 @@ INSTALLED_APPS = [
      "pages", 
     "wagtail.contrib.forms",
     "wagtail.contrib.redirects",
+    "wagtail.contrib.routable_page",
     "wagtail.embeds",
     "wagtail.sites",
     "wagtail.users",
@@ -56,6 +57,7 @@ MIDDLEWARE = [
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
+    "pages.page_cache.PageCacheMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "wagtail.contrib.redirects.middleware.RedirectMiddleware",
 ]
@@ -94,6 +96,24 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Holds renditions, listing counts and the page cache (pages/page_cache.py).
+# Production overrides this with a cache shared by all worker processes.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "OPTIONS": {
+            "MAX_ENTRIES": 5000,
+        },
+    }
+}
+
+# Seconds a rendered page is served from the page cache; 0 turns it off.
+PAGE_CACHE_TIMEOUT = 600
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -171,6 +191,31 @@ WAGTAILSEARCH_BACKENDS = {
     }
 }
 
+# To rank with BM25 from memory-mapped index segments shared by all worker
+# processes instead (see search/bm25.py), use the backend below and run
+# "python manage.py update_index" once to build the index. PATH is the
+# index manifest; its segments are written next to it.
+# WAGTAILSEARCH_BACKENDS = {
+#     "default": {
+#         "BACKEND": "search.bm25",
+#         "PATH": BASE_DIR / "search-index.bm25",
+#     }
+# }
+
+# Worker processes that generate image renditions when a page is published
+# (see pages/renditions.py). Each web server process (e.g. each gunicorn
+# worker) starts its own pool, so keep this small. Defaults to 1; 0
+# generates them inline instead.
+# RENDITION_WORKERS = 1
+
+# Image formats offered by the responsive_image template tag, best first;
+# the last one is the <img> fallback (see pages/images.py).
+# RESPONSIVE_IMAGE_FORMATS = ["avif", "webp", "jpeg"]
+
+# Set to "cursor" to page listings with "Load more" / infinite scroll on a
+# keyset cursor instead of numbered ?page=N links (see pages/pagination.py).
+# LISTING_PAGINATION = "cursor"
+
 # Base URL to use when referring to full URLs within the Wagtail admin backend -
 # e.g. in notification emails. Don't include '/admin' or a trailing slash
 WAGTAILADMIN_BASE_URL = "http://example.com"
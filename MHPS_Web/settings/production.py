@@ -1,12 +1,42 @@
+import os
+
 from .base import *
 
 DEBUG = False
 
 # ManifestStaticFilesStorage is recommended in production, to prevent
 # outdated JavaScript / CSS assets being served from cache
-# (e.g. after a Wagtail upgrade).
+# (e.g. after a Wagtail upgrade). This subclass also minifies the site's own
+# CSS and JavaScript and writes .gz and .br variants, see
+# pages/static_files.py.
 # See https://docs.djangoproject.com/en/5.2/ref/contrib/staticfiles/#manifeststaticfilesstorage
-STORAGES["staticfiles"]["BACKEND"] = "django.contrib.staticfiles.storage.ManifestStaticFilesStorage"
+STORAGES["staticfiles"]["BACKEND"] = "pages.static_files.CompressedManifestStaticFilesStorage"
+
+# Hand file transfers to the web server instead of streaming them from a
+# worker (see pages/file_serving.py), e.g. for nginx:
+# SENDFILE_HEADER = "X-Accel-Redirect"
+# SENDFILE_LOCATIONS = {STATIC_ROOT: "/internal/static/", MEDIA_ROOT: "/internal/media/"}
+
+# Identifies the release in cache keys, so a shared cache never serves pages
+# or site chrome rendered by another build (see pages/page_cache.py), e.g.
+# the commit being deployed
+DEPLOY_VERSION = os.environ.get("DEPLOY_VERSION", "")
+
+# Share the cache between worker processes, so a publish handled by one of
+# them purges the page cache of all of them
+if os.environ.get("REDIS_URL"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["REDIS_URL"],
+    }
+else:
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache",
+        "OPTIONS": {
+            "MAX_ENTRIES": 20000,
+        },
+    }
 
 try:
     from .local import *
@@ -0,0 +1,145 @@
+// MHPS Website - Album photo grid and lightbox
+//
+// Album pages render their first page of photos. Further pages are fetched
+// from the album's photos/ JSON route as the visitor scrolls, and carousel
+// slides only receive their full-size image when they are about to show.
+
+document.addEventListener('DOMContentLoaded', function() {
+    const grid = document.getElementById('photoGrid');
+    if (!grid) return;
+
+    initPhotoLightbox(grid);
+    initLoadMorePhotos(grid);
+});
+
+// Swap in the full-size image of a slide
+function loadSlideImage(slide) {
+    if (!slide) return;
+
+    slide.querySelectorAll('[data-srcset]').forEach(function(el) {
+        el.srcset = el.dataset.srcset;
+        el.removeAttribute('data-srcset');
+    });
+    slide.querySelectorAll('[data-src]').forEach(function(el) {
+        el.src = el.dataset.src;
+        el.removeAttribute('data-src');
+    });
+}
+
+// Load a slide and its neighbours, so stepping through feels instant
+function loadSlidesAround(index) {
+    const slides = document.querySelectorAll('#photoCarousel .carousel-item');
+    [index - 1, index, index + 1].forEach(i => loadSlideImage(slides[i]));
+}
+
+// Open the modal carousel at the clicked photo
+function initPhotoLightbox(grid) {
+    const carouselEl = document.getElementById('photoCarousel');
+
+    grid.addEventListener('click', function(e) {
+        const item = e.target.closest('[data-photo-index]');
+        if (!item) return;
+
+        const photoIndex = parseInt(item.dataset.photoIndex);
+        loadSlidesAround(photoIndex);
+        bootstrap.Carousel.getOrCreateInstance(carouselEl).to(photoIndex);
+    });
+
+    carouselEl.addEventListener('slide.bs.carousel', function(e) {
+        loadSlidesAround(e.to);
+    });
+}
+
+// Point an <img> inside a <picture> at a responsive image from the JSON
+// response, adding one <source> per extra format. Deferred images get
+// data-src/data-srcset, swapped in by loadSlideImage().
+function fillPicture(img, image, deferred) {
+    const prefix = deferred ? 'data-' : '';
+
+    image.sources.forEach(function(source) {
+        const el = document.createElement('source');
+        el.type = source.type;
+        el.sizes = img.sizes;
+        el.setAttribute(prefix + 'srcset', source.srcset);
+        img.parentElement.insertBefore(el, img);
+    });
+
+    img.setAttribute(prefix + 'src', image.src);
+    img.setAttribute(prefix + 'srcset', image.srcset);
+    img.width = image.width;
+    img.height = image.height;
+}
+
+// Fill a <template> clone with one photo from the JSON response
+function buildPhotoNode(template, photo) {
+    const node = template.content.firstElementChild.cloneNode(true);
+
+    const indexed = node.querySelector('[data-photo-index]');
+    if (indexed) indexed.dataset.photoIndex = photo.index;
+
+    const thumb = node.querySelector('[data-role="thumbnail"]');
+    if (thumb) fillPicture(thumb, photo.thumbnail, false);
+
+    const full = node.querySelector('[data-role="full-size"]');
+    if (full) fillPicture(full, photo.full_size, true);
+
+    const caption = node.querySelector('[data-role="caption"]');
+    if (photo.caption) {
+        caption.querySelector('p').textContent = photo.caption;
+        node.querySelectorAll('img').forEach(img => img.alt = photo.caption);
+    } else {
+        caption.remove();
+    }
+
+    return node;
+}
+
+// "Load more" button, also triggered automatically when scrolled into view
+function initLoadMorePhotos(grid) {
+    const button = document.getElementById('loadMorePhotos');
+    if (!button) return;
+
+    const thumbTemplate = document.getElementById('photoThumbTemplate');
+    const slideTemplate = document.getElementById('photoSlideTemplate');
+    const carouselInner = document.querySelector('#photoCarousel .carousel-inner');
+    let observer = null;
+    let loading = false;
+
+    function loadNextPage() {
+        if (loading) return;
+        loading = true;
+        button.disabled = true;
+
+        fetch(`${button.dataset.url}?page=${button.dataset.nextPage}`)
+            .then(response => response.json())
+            .then(data => {
+                data.photos.forEach(photo => {
+                    grid.appendChild(buildPhotoNode(thumbTemplate, photo));
+                    carouselInner.appendChild(buildPhotoNode(slideTemplate, photo));
+                });
+
+                if (data.next_page) {
+                    button.dataset.nextPage = data.next_page;
+                } else {
+                    if (observer) observer.disconnect();
+                    button.parentElement.remove();
+                }
+            })
+            .catch(function(err) {
+                console.error('Failed to load photos:', err);
+            })
+            .finally(function() {
+                loading = false;
+                button.disabled = false;
+            });
+    }
+
+    button.addEventListener('click', loadNextPage);
+
+    if ('IntersectionObserver' in window) {
+        observer = new IntersectionObserver(function(entries) {
+            if (entries[0].isIntersecting) loadNextPage();
+        }, { rootMargin: '400px' });
+        observer.observe(button);
+    }
+}
@@ -0,0 +1,53 @@
+// MHPS Website - search box suggestions
+//
+// As the visitor types into an input marked [data-autocomplete], fetch
+// matching page titles from that URL into the input's <datalist>. Picking
+// a suggestion goes straight to its page.
+
+(function() {
+    const MIN_LENGTH = 2;
+    const DELAY = 150;
+
+    function setUp(input) {
+        const list = document.getElementById(input.getAttribute('list'));
+        let timer = null;
+        let urls = {};
+
+        function suggest(query) {
+            // Lowercased so identical prefixes share one cached response
+            fetch(input.dataset.autocomplete + '?q=' + encodeURIComponent(query.toLowerCase()))
+                .then(response => response.json())
+                .then(data => {
+                    urls = {};
+                    list.replaceChildren(...data.results.map(result => {
+                        urls[result.title] = result.url;
+                        const option = document.createElement('option');
+                        option.value = result.title;
+                        option.label = result.type;
+                        return option;
+                    }));
+                })
+                .catch(() => {});
+        }
+
+        input.addEventListener('input', function(e) {
+            const query = input.value.trim();
+
+            // Choosing a suggestion replaces the whole value
+            if (!e.inputType || e.inputType === 'insertReplacementText') {
+                if (urls[input.value]) {
+                    window.location.href = urls[input.value];
+                    return;
+                }
+            }
+
+            clearTimeout(timer);
+            if (query.length < MIN_LENGTH) return;
+            timer = setTimeout(() => suggest(query), DELAY);
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        document.querySelectorAll('[data-autocomplete]').forEach(setUp);
+    });
+})();
@@ -0,0 +1,70 @@
+// MHPS Website - "Load more" / infinite scroll for cursor paginated listings
+//
+// The load more link points at the next page of the listing. Instead of
+// navigating, fetch that page, append its items to the [data-listing]
+// container and swap in its load more link, if it has one.
+
+(function() {
+    let loading = false;
+    let observer = null;
+
+    function currentLink() {
+        return document.querySelector('[data-load-more]');
+    }
+
+    function observe(link) {
+        if (observer && link) observer.observe(link);
+    }
+
+    function loadMore(link) {
+        if (loading) return;
+        loading = true;
+        link.classList.add('disabled');
+
+        fetch(link.href, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+            .then(response => response.text())
+            .then(html => {
+                const doc = new DOMParser().parseFromString(html, 'text/html');
+                const listing = document.querySelector('[data-listing]');
+                const nextListing = doc.querySelector('[data-listing]');
+                if (listing && nextListing) {
+                    Array.from(nextListing.children).forEach(item => listing.appendChild(item));
+                }
+
+                const wrapper = link.closest('[data-load-more-wrapper]');
+                const nextWrapper = doc.querySelector('[data-load-more-wrapper]');
+                if (observer) observer.unobserve(link);
+                if (nextWrapper) {
+                    wrapper.replaceWith(nextWrapper);
+                    observe(currentLink());
+                } else {
+                    wrapper.remove();
+                }
+            })
+            .catch(function(err) {
+                console.error('Failed to load more items:', err);
+                link.classList.remove('disabled');
+            })
+            .finally(function() {
+                loading = false;
+            });
+    }
+
+    document.addEventListener('click', function(e) {
+        const link = e.target.closest('[data-load-more]');
+        if (!link) return;
+        e.preventDefault();
+        loadMore(link);
+    });
+
+    document.addEventListener('DOMContentLoaded', function() {
+        if (!('IntersectionObserver' in window)) return;
+
+        observer = new IntersectionObserver(function(entries) {
+            entries.forEach(entry => {
+                if (entry.isIntersecting) loadMore(entry.target);
+            });
+        }, { rootMargin: '400px' });
+        observe(currentLink());
+    });
+})();
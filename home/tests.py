@@ -40,3 +40,8 @@ class HomeTests(WagtailPageTestCase):
     def test_homepage_template_used(self):
         response = self.client.get(self.homepage.url)
         self.assertTemplateUsed(response, "home/home_page.html")
+
+    def test_homepage_revalidates(self):
+        response = self.client.get(self.homepage.url)
+        response = self.client.get(self.homepage.url, headers={'if_none_match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
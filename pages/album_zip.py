@@ -0,0 +1,273 @@
+"""
+Whole albums as one ZIP download.
+
+``album_zip_response`` streams a ZIP of an album's original images straight
+from their storage (local disk or a remote one such as S3, through
+``Storage.open``): entries are stored uncompressed (photos don't compress),
+so the archive's layout and size are known from the files' sizes alone. That gives
+the download a Content-Length, an ETag and single byte ranges, so an
+interrupted download resumes where it stopped, and memory use doesn't
+depend on the size of the photos.
+
+Each entry's CRC-32 goes in its local header, ahead of its data, so a file
+is read once for its CRC before it is sent; CRCs are cached by name, size
+and modification time, so that happens on the first download only.
+Archives over 4 GB use ZIP64 records.
+"""
+import hashlib
+import os
+import struct
+import time
+import zlib
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .file_serving import range_not_satisfiable, requested_range
+
+# Sizes and offsets from here on need ZIP64 records, and are replaced by
+# ZIP64_MARKER in the classic ones
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP64_COUNT_LIMIT = 0xFFFF
+ZIP64_MARKER = 0xFFFFFFFF
+
+READ_BLOCK_SIZE = 64 * 1024
+
+CRC_TIMEOUT = 60 * 60 * 24 * 30
+
+UTF8_NAMES = 0x0800
+STORED = 0
+UNIX_FILE_ATTRIBUTES = 0o100644 << 16
+
+LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+END_RECORD = struct.Struct('<IHHHHIIH')
+ZIP64_END_RECORD = struct.Struct('<IQHHIIQQQQ')
+ZIP64_END_LOCATOR = struct.Struct('<IIQI')
+
+
+def dos_datetime(timestamp):
+    """(time, date) of ``timestamp`` in the MS-DOS format ZIP uses"""
+    local = time.localtime(max(timestamp, 315532800))  # DOS dates start in 1980
+    return (
+        local.tm_hour << 11 | local.tm_min << 5 | local.tm_sec // 2,
+        (local.tm_year - 1980) << 9 | local.tm_mon << 5 | local.tm_mday,
+    )
+
+
+def modified_time(file):
+    """Modification timestamp of the stored ``file``; 0 where its storage can't tell"""
+    try:
+        return file.storage.get_modified_time(file.name).timestamp()
+    except NotImplementedError:
+        return 0
+
+
+def file_crc(file, size, modified):
+    key = 'album-zip-crc:' + hashlib.md5(f'{file.name}:{size}:{modified}'.encode(), usedforsecurity=False).hexdigest()
+    crc = cache.get(key)
+    if crc is None:
+        crc = 0
+        with file.storage.open(file.name, 'rb') as data:
+            for block in iter(lambda: data.read(READ_BLOCK_SIZE), b''):
+                crc = zlib.crc32(block, crc)
+        cache.set(key, crc, CRC_TIMEOUT)
+    return crc
+
+
+class ZipEntry:
+    """
+    One stored file of the archive, starting at ``offset``. ``file`` is a
+    file in a Django storage (e.g. an image's ``file``).
+    """
+
+    def __init__(self, name, file, size, modified, offset):
+        self.name = name.encode('utf-8')
+        self.file = file
+        self.size = size
+        self.modified = modified
+        self.offset = offset
+        self.time, self.date = dos_datetime(modified)
+        self.header_size = LOCAL_HEADER.size + len(self.name) + (20 if self.size >= ZIP64_LIMIT else 0)
+        self.crc = None
+
+    def get_crc(self):
+        if self.crc is None:
+            self.crc = file_crc(self.file, self.size, self.modified)
+        return self.crc
+
+    def version(self):
+        return 45 if self.size >= ZIP64_LIMIT or self.offset >= ZIP64_LIMIT else 20
+
+    def local_header(self):
+        extra = b''
+        size = self.size
+        if size >= ZIP64_LIMIT:
+            extra = struct.pack('<HHQQ', 1, 16, size, size)
+            size = ZIP64_MARKER
+        return LOCAL_HEADER.pack(
+            0x04034b50, self.version(), UTF8_NAMES, STORED, self.time, self.date,
+            self.get_crc(), size, size, len(self.name), len(extra),
+        ) + self.name + extra
+
+    def central_header(self):
+        # The ZIP64 field holds only the values that don't fit, in this order
+        zip64 = []
+        size = offset = None
+        if self.size >= ZIP64_LIMIT:
+            zip64 += [self.size, self.size]
+            size = ZIP64_MARKER
+        if self.offset >= ZIP64_LIMIT:
+            zip64.append(self.offset)
+            offset = ZIP64_MARKER
+        extra = struct.pack(f'<HH{len(zip64)}Q', 1, 8 * len(zip64), *zip64) if zip64 else b''
+        return CENTRAL_HEADER.pack(
+            0x02014b50, 3 << 8 | self.version(), self.version(), UTF8_NAMES, STORED, self.time, self.date,
+            self.get_crc(), size or self.size, size or self.size, len(self.name), len(extra), 0, 0, 0,
+            UNIX_FILE_ATTRIBUTES, offset or self.offset,
+        ) + self.name + extra
+
+    def central_header_size(self):
+        fields = (2 if self.size >= ZIP64_LIMIT else 0) + (1 if self.offset >= ZIP64_LIMIT else 0)
+        return CENTRAL_HEADER.size + len(self.name) + (4 + 8 * fields if fields else 0)
+
+
+class AlbumZip:
+    """
+    A stored ZIP of ``files`` ((archive name, stored file) pairs); files
+    missing from their storage are left out
+    """
+
+    def __init__(self, files):
+        self.entries = []
+        offset = 0
+        for name, file in files:
+            try:
+                size, modified = file.storage.size(file.name), modified_time(file)
+            except OSError:
+                continue
+            entry = ZipEntry(name, file, size, modified, offset)
+            self.entries.append(entry)
+            offset += entry.header_size + entry.size
+
+        self.directory_offset = offset
+        self.directory_size = sum(entry.central_header_size() for entry in self.entries)
+        self.zip64 = (
+            len(self.entries) >= ZIP64_COUNT_LIMIT
+            or self.directory_offset >= ZIP64_LIMIT
+            or self.directory_size >= ZIP64_LIMIT
+        )
+        self.end_size = END_RECORD.size + (ZIP64_END_RECORD.size + ZIP64_END_LOCATOR.size if self.zip64 else 0)
+        self.size = self.directory_offset + self.directory_size + self.end_size
+
+    @property
+    def last_modified(self):
+        return int(max((entry.modified for entry in self.entries), default=0))
+
+    def etag(self):
+        hasher = hashlib.md5(usedforsecurity=False)
+        for entry in self.entries:
+            hasher.update(b'%s:%d:%r\n' % (entry.name, entry.size, entry.modified))
+        return f'"zip-{hasher.hexdigest()}"'
+
+    def end_records(self):
+        count = len(self.entries)
+        records = b''
+        if self.zip64:
+            zip64_offset = self.directory_offset + self.directory_size
+            records += ZIP64_END_RECORD.pack(
+                0x06064b50, ZIP64_END_RECORD.size - 12, 45, 45, 0, 0, count, count,
+                self.directory_size, self.directory_offset,
+            )
+            records += ZIP64_END_LOCATOR.pack(0x07064b50, 0, zip64_offset, 1)
+            count = min(count, 0xFFFF)
+            directory_size = ZIP64_MARKER if self.directory_size >= ZIP64_LIMIT else self.directory_size
+            directory_offset = ZIP64_MARKER if self.directory_offset >= ZIP64_LIMIT else self.directory_offset
+        else:
+            directory_size, directory_offset = self.directory_size, self.directory_offset
+        return records + END_RECORD.pack(
+            0x06054b50, 0, 0, count, count, directory_size, directory_offset, 0,
+        )
+
+    def segments(self):
+        """
+        The archive in order, as (offset, size, content) where content is a
+        function returning bytes, or a ZipEntry for its file's data
+        """
+        for entry in self.entries:
+            yield entry.offset, entry.header_size, entry.local_header
+            yield entry.offset + entry.header_size, entry.size, entry
+        offset = self.directory_offset
+        for entry in self.entries:
+            size = entry.central_header_size()
+            yield offset, size, entry.central_header
+            offset += size
+        yield offset, self.end_size, self.end_records
+
+    def stream(self, start=0, end=None):
+        """Bytes ``start`` to ``end`` (inclusive) of the archive, in chunks"""
+        end = self.size - 1 if end is None else end
+        for offset, size, content in self.segments():
+            if offset + size <= start or size == 0:
+                continue
+            if offset > end:
+                break
+            skip, stop = max(start - offset, 0), min(end - offset + 1, size)
+            if isinstance(content, ZipEntry):
+                yield from read_file(content.file, skip, stop - skip)
+            else:
+                yield content()[skip:stop]
+
+
+def read_file(file, position, length):
+    with file.storage.open(file.name, 'rb') as data:
+        data.seek(position)
+        while length > 0:
+            block = data.read(min(READ_BLOCK_SIZE, length))
+            if not block:
+                raise OSError(f"{file.name} changed while it was being sent")
+            length -= len(block)
+            yield block
+
+
+def album_files(photos):
+    """(archive name, stored file) of the original image of each of ``photos``, numbered in order"""
+    photos = list(photos)
+    width = len(str(len(photos)))
+    return [
+        (f'{index:0{width}d}-{os.path.basename(photo.image.file.name)}', photo.image.file)
+        for index, photo in enumerate(photos, 1)
+    ]
+
+
+def album_zip_response(request, files, filename):
+    """
+    Response with the ZIP of ``files`` ((archive name, stored file) pairs),
+    or the requested byte range of it, as a download named ``filename``
+    """
+    archive = AlbumZip(files)
+    etag, last_modified = archive.etag(), archive.last_modified
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        byte_range = requested_range(request, archive.size, etag, last_modified)
+        if byte_range is False:
+            return range_not_satisfiable(archive.size)
+        if byte_range is None:
+            response = StreamingHttpResponse(archive.stream(), content_type='application/zip')
+            response['Content-Length'] = archive.size
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(archive.stream(start, end), content_type='application/zip', status=206)
+            response['Content-Length'] = end - start + 1
+            response['Content-Range'] = f'bytes {start}-{end}/{archive.size}'
+        response['Accept-Ranges'] = 'bytes'
+        response['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(filename)}"
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True)
+    return response
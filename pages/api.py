@@ -0,0 +1,160 @@
+"""
+Read-only JSON listings of the index pages.
+
+Each index page answers ``api/`` with the same filtered, paginated listing
+its HTML shows (same query parameters), serialised as the card fields only.
+
+Responses carry a strong ETag made from the newest ``last_published_at`` in
+the listing plus a digest of what was listed, and are kept in the page cache
+like the HTML, whose middleware answers a matching ``If-None-Match`` with a
+304 before Wagtail routes the request (see pages.page_cache). When the page
+cache can't help (it is off, or the client sends cookies), the ETag is also
+cached under the listing's count key, which is versioned by publishing,
+unpublishing, moving or deleting a child page (see pages.pagination), so a
+304 still skips the listing's queries.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import urlencode
+
+from .images import get_responsive_image
+from .pagination import LISTING_COUNT_TIMEOUT, listing_count_key
+
+
+def press_card(item, request):
+    return {
+        'id': item.page_id,
+        'url': item.page.get_url(request),
+        'title': item.short_title,
+        'item_type': item.item_type,
+        'press_date': item.press_date,
+        'author_names': item.author_names,
+        'is_featured': item.is_featured,
+    }
+
+
+def event_card(event, request):
+    return {
+        'id': event.pk,
+        'url': event.get_url(request),
+        'title': event.event_title,
+        'event_type': event.get_event_type_display(),
+        'event_format': event.get_event_format_display(),
+        'start_date': event.event_start_date,
+        'start_time': event.event_start_time,
+        'end_time': event.event_end_time,
+        'has_livestream': event.has_livestream,
+        'short_description': event.short_description,
+    }
+
+
+def article_card(article, request):
+    return {
+        'id': article.pk,
+        'url': article.get_url(request),
+        'title': article.article_title,
+        'article_type': article.get_article_type_display(),
+        'publish_date': article.publish_date,
+        'author_name': article.author_name,
+        'short_description': article.short_description,
+    }
+
+
+def album_card(album, request):
+    cover = album.get_cover_image()
+    return {
+        'id': album.pk,
+        'url': album.get_url(request),
+        'title': album.album_title,
+        'album_date': album.album_date,
+        'location': getattr(album, 'album_location', ''),
+        'photo_count': album.get_photo_count(),
+        'cover': get_responsive_image(cover, 'fill-600x400') if cover else None,
+    }
+
+
+# Card serialiser for each listing an index page's context can hold
+LISTING_CARDS = {
+    'press_items': press_card,
+    'events': event_card,
+    'articles': article_card,
+    'albums': album_card,
+}
+
+
+def etag_key(index_page, request):
+    """Cache key for the ETag of the requested page of a listing"""
+    position = urlencode([(param, request.GET.get(param, '')) for param in ('page', 'cursor')])
+    digest = hashlib.md5(
+        f'{listing_count_key(index_page.pk, request)}|{position}'.encode(), usedforsecurity=False
+    ).hexdigest()
+    return f'listing-api:{digest}'
+
+
+def listing_etag(listing, items):
+    """
+    Strong ETag for a page of a listing: the newest ``last_published_at``
+    among its items, plus a digest of the items, their order and the paging
+    """
+    pages = [getattr(item, 'page', item) for item in items]  # press items list their page
+    published = [page.last_published_at for page in pages if page.last_published_at]
+    newest = int(max(published).timestamp()) if published else 0
+
+    state = [[page.pk for page in pages]]
+    if getattr(listing, 'cursor_mode', False):
+        state.append(listing.next_cursor)
+    else:
+        state.append(listing.paginator.count)
+    digest = hashlib.md5(repr(state).encode(), usedforsecurity=False).hexdigest()[:16]
+    return f'"{newest}-{digest}"'
+
+
+def listing_data(listing, items, card, request):
+    if getattr(listing, 'cursor_mode', False):
+        paging = {'next_cursor': listing.next_cursor}
+    else:
+        paging = {
+            'count': listing.paginator.count,
+            'page': listing.number,
+            'num_pages': listing.paginator.num_pages,
+            'next_page': listing.next_page_number() if listing.has_next() else None,
+        }
+    return {**paging, 'results': [card(item, request) for item in items]}
+
+
+def not_modified(request, etag):
+    """A 304 if the client already has ``etag``, else None"""
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response['ETag'] = etag
+        patch_cache_control(response, max_age=0)
+    return response
+
+
+def listing_response(request, index_page, listing_name):
+    """
+    JSON for the requested page of ``index_page``'s listing, which its
+    context holds under ``listing_name``, or a 304 if the client has it
+    """
+    key = etag_key(index_page, request)
+    etag = cache.get(key)
+    response = not_modified(request, etag) if etag is not None else None
+    if response is not None:
+        return response
+
+    listing = index_page.get_context(request)[listing_name]
+    items = list(listing)
+    etag = listing_etag(listing, items)
+    cache.set(key, etag, LISTING_COUNT_TIMEOUT)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+
+    response = JsonResponse(listing_data(listing, items, LISTING_CARDS[listing_name], request))
+    response['ETag'] = etag
+    # Clients revalidate every time
+    patch_cache_control(response, max_age=0)
+    return response
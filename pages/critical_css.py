@@ -0,0 +1,189 @@
+"""
+Critical CSS for the main page templates.
+
+``manage.py build_critical_css`` works out, for each template in
+``CRITICAL_TEMPLATES``, the rules of the site stylesheets that the top of
+the page can use: the site header and navigation, and the start of the
+template's content block (its first ``ABOVE_FOLD_LINES`` lines, or up to a
+``{# below the fold #}`` comment). Selection works like the vendor purge
+(see pages.vendor_assets): a rule is kept when all of its classes appear in
+that markup.
+
+``{% critical_css %}`` in base.html inlines the result, and the full
+stylesheets are then loaded without blocking rendering (``{% stylesheet %}``,
+``{% vendor_stylesheets deferred=... %}``). Templates without critical CSS
+link their stylesheets as usual.
+
+Each template's CSS is stored (in ``CRITICAL_CSS_DIR``, by default the
+gitignored ``critical_css/``) with a digest of the files it was computed
+from. Requests only read what is stored: the Docker build runs the command,
+and in development ``build_critical_css --check`` reports templates whose
+CSS is out of date; rerun the command after changing them.
+"""
+import hashlib
+import json
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.template.loader import get_template
+from django.utils.html import format_html
+
+from .static_files import minify_css
+from .vendor_assets import BOOTSTRAP_CSS, FONTAWESOME_CSS, parse_css, purge_rules, serialize_css, strip_comments
+
+CRITICAL_TEMPLATES = (
+    'pages/press_index_page.html',
+    'pages/event_index_page.html',
+    'pages/gallery_index_page.html',
+    'pages/gallery_album_page.html',
+    'pages/press_album_page.html',
+    'pages/aboutus.html',
+    'pages/article__page.html',
+    'pages/contact_page.html',
+    'home/home_page.html',
+)
+
+# Stylesheets (static paths) the critical CSS is taken from, where present
+CRITICAL_STYLESHEETS = (BOOTSTRAP_CSS, FONTAWESOME_CSS, 'css/style.css')
+
+BASE_TEMPLATE = 'base.html'
+
+# Lines of a content block assumed to be visible on first paint
+ABOVE_FOLD_LINES = 60
+
+FOLD_MARKER = '{# below the fold #}'
+
+CONTENT_BLOCK_RE = re.compile(r'{%\s*block content\s*%}')
+INCLUDE_RE = re.compile(r'''{%\s*(?:cached_)?include\s+['"]([^'"]+)['"]''')
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def get_output_dir():
+    return Path(getattr(settings, 'CRITICAL_CSS_DIR', Path(settings.BASE_DIR) / 'critical_css'))
+
+
+def output_path(template_name):
+    return get_output_dir() / (template_name.removesuffix('.html') + '.css')
+
+
+def template_file(template_name):
+    return get_template(template_name).template.origin.name
+
+
+def with_includes(source, files, depth=2):
+    """``source`` followed by the templates it includes, recording their files"""
+    parts = [source]
+    if depth:
+        for name in INCLUDE_RE.findall(source):
+            path = template_file(name)
+            files.append(path)
+            parts.append(with_includes(Path(path).read_text(encoding='utf-8'), files, depth - 1))
+    return '\n'.join(parts)
+
+
+def above_fold(template_name):
+    """
+    Markup visible on first paint of pages rendered with ``template_name``,
+    and the template files it came from
+    """
+    files = [template_file(BASE_TEMPLATE), template_file(template_name)]
+    base = Path(files[0]).read_text(encoding='utf-8')
+    source = Path(files[1]).read_text(encoding='utf-8')
+
+    # The layout up to the content, with the header and navigation it includes
+    head = CONTENT_BLOCK_RE.split(base, maxsplit=1)[0]
+
+    content = CONTENT_BLOCK_RE.split(source, maxsplit=1)[-1]
+    if FOLD_MARKER in content:
+        content = content.split(FOLD_MARKER, 1)[0]
+    else:
+        content = '\n'.join(content.splitlines()[:ABOVE_FOLD_LINES])
+
+    markup = with_includes(head, files) + with_includes(content, files)
+    return markup, files
+
+
+def stylesheet_files():
+    return [path for path in (finders.find(name) for name in CRITICAL_STYLESHEETS) if path]
+
+
+def digest(files):
+    hasher = hashlib.md5(usedforsecurity=False)
+    for path in files:
+        hasher.update(str(path).encode())
+        hasher.update(Path(path).read_bytes())
+    return hasher.hexdigest()
+
+
+def compute_critical_css(template_name):
+    """(critical CSS, digest of its inputs) for ``template_name``"""
+    markup, files = above_fold(template_name)
+    stylesheets = stylesheet_files()
+    words = set(re.findall(r'[\w-]+', markup))
+
+    rules = []
+    for path in stylesheets:
+        css, _ = strip_comments(Path(path).read_text(encoding='utf-8'))
+        rules += parse_css(css)[0]
+    # Fonts arrive with the full stylesheets
+    rules = [rule for rule in purge_rules(rules, words) if not rule[0].startswith('@font-face')]
+
+    return minify_css(serialize_css(rules)), digest(files + stylesheets)
+
+
+def read_manifest():
+    try:
+        return json.loads((get_output_dir() / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def build(template_names=CRITICAL_TEMPLATES):
+    """Compute and store the critical CSS of ``template_names``; returns their sizes"""
+    manifest = read_manifest()
+    sizes = {}
+    for template_name in template_names:
+        css, manifest[template_name] = compute_critical_css(template_name)
+        path = output_path(template_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(css, encoding='utf-8')
+        sizes[template_name] = len(css)
+    (get_output_dir() / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    _loaded.clear()
+    return sizes
+
+
+def stale_templates(template_names=CRITICAL_TEMPLATES):
+    manifest = read_manifest()
+    return [name for name in template_names if compute_critical_css(name)[1] != manifest.get(name)]
+
+
+_loaded = {}
+
+
+def get_critical_css(template_name):
+    """The stored critical CSS of ``template_name``, or '' if it has none"""
+    if template_name not in CRITICAL_TEMPLATES:
+        return ''
+
+    # Reread in development, to pick up a rebuild without a restart
+    if settings.DEBUG or template_name not in _loaded:
+        try:
+            _loaded[template_name] = output_path(template_name).read_text(encoding='utf-8')
+        except OSError:
+            _loaded[template_name] = ''
+    return _loaded[template_name]
+
+
+def stylesheet_link(url, deferred=False):
+    """A stylesheet link; deferred ones load without blocking rendering"""
+    if not deferred:
+        return format_html('<link rel="stylesheet" href="{}">', url)
+    return format_html(
+        '<link rel="preload" href="{0}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+        '<noscript><link rel="stylesheet" href="{0}"></noscript>',
+        url,
+    )
@@ -0,0 +1,224 @@
+"""
+Serving files from disk in production.
+
+``serve_file`` answers a request for one file with everything a browser or
+proxy needs to avoid transferring it twice: ETag and Last-Modified (and a
+304 when the client has it), single byte ranges (``Range`` / ``If-Range``,
+for resumed downloads and media seeking), and a precompressed ``.br`` or
+``.gz`` sibling when the client accepts it, so nothing is compressed per
+request.
+
+Whole files are streamed with ``FileResponse``, which WSGI servers such as
+gunicorn send with ``sendfile()`` without copying them through Python.
+With ``SENDFILE_HEADER`` set, the transfer (ranges included) is handed to
+the web server instead, and the worker is free as soon as the headers are
+sent:
+
+    # nginx: an "internal" location per served root
+    SENDFILE_HEADER = "X-Accel-Redirect"
+    SENDFILE_LOCATIONS = {STATIC_ROOT: "/internal/static/", MEDIA_ROOT: "/internal/media/"}
+
+    # Apache mod_xsendfile, lighttpd
+    SENDFILE_HEADER = "X-Sendfile"
+
+Delegated responses point at the uncompressed file; let the web server pick
+the precompressed sibling (nginx ``gzip_static`` / ``brotli_static``), as
+nginx drops the Content-Encoding of an X-Accel-Redirect response.
+"""
+import mimetypes
+import os
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+# Precompressed siblings, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Chunk size for partial responses, which are read through Python
+RANGE_BLOCK_SIZE = 64 * 1024
+
+
+def accepted_encodings(request):
+    """Content codings the client accepts, per its Accept-Encoding header"""
+    accepted = set()
+    for coding in request.headers.get('Accept-Encoding', '').split(','):
+        name, _, params = coding.strip().partition(';')
+        quality = params.strip().removeprefix('q=')
+        try:
+            if params and float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def choose_variant(request, path):
+    """
+    The file to send for ``path``: (path, encoding, stat), the best
+    precompressed sibling the client accepts, or the file itself
+    """
+    accepted = accepted_encodings(request)
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted or '*' in accepted:
+            try:
+                variant = f'{path}{suffix}'
+                return variant, encoding, os.stat(variant)
+            except OSError:
+                continue
+    return path, None, os.stat(path)
+
+
+def file_etag(stat, encoding=None):
+    etag = f'{stat.st_size:x}-{stat.st_mtime_ns:x}'
+    if encoding:
+        etag += f'-{encoding}'
+    return f'"{etag}"'
+
+
+def parse_range(header, size):
+    """
+    (start, end) of a single byte range, end inclusive; None if the header
+    should be ignored (serve the whole file), False if it can't be satisfied
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None  # Multiple or unknown ranges: send the whole file
+    start, end = match.groups()
+    if start:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+        if end < start:
+            return None if match.group(2) else False
+    else:
+        start, end = max(size - int(end), 0), size - 1
+    if start >= size or size == 0:
+        return False
+    return start, end
+
+
+class RangeFile:
+    """A file limited to ``length`` bytes from its current position"""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def sendfile_response(path, content_type):
+    header = getattr(settings, 'SENDFILE_HEADER', None)
+    if not header:
+        return None
+
+    value = str(path)
+    if header.lower() == 'x-accel-redirect':
+        for root, location in getattr(settings, 'SENDFILE_LOCATIONS', {}).items():
+            try:
+                relative = Path(path).relative_to(root)
+            except ValueError:
+                continue
+            value = location.rstrip('/') + '/' + quote(relative.as_posix())
+            break
+        else:
+            return None  # Not under a location the web server knows about
+
+    response = HttpResponse(content_type=content_type)
+    response[header] = value
+    return response
+
+
+def requested_range(request, size, etag, last_modified):
+    """The byte range a request asks for, as parse_range returns it"""
+    if 'Range' not in request.headers or request.method not in ('GET', 'HEAD'):
+        return None
+    # A Range only applies to the version the client already has part of
+    if_range = request.headers.get('If-Range')
+    if if_range is None or if_range == etag or parse_http_date_safe(if_range) == last_modified:
+        return parse_range(request.headers['Range'], size)
+    return None
+
+
+def range_not_satisfiable(size):
+    response = HttpResponse(status=416)
+    response['Content-Range'] = f'bytes */{size}'
+    return response
+
+
+def file_response(request, path, stat, etag, content_type):
+    """The whole file, or the requested byte range of it"""
+    byte_range = requested_range(request, stat.st_size, etag, int(stat.st_mtime))
+    if byte_range is False:
+        return range_not_satisfiable(stat.st_size)
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type)
+
+    start, end = byte_range
+    file.seek(start)
+    response = FileResponse(RangeFile(file, end - start + 1), content_type=content_type, status=206)
+    response.block_size = RANGE_BLOCK_SIZE
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    return response
+
+
+def serve_file(request, path, content_type=None, cache_control=None, filename=None, precompressed=True):
+    """
+    Response sending the file at ``path``. ``cache_control`` is a dict of
+    Cache-Control directives; ``filename`` makes it a download. Turn off
+    ``precompressed`` where siblings may be uploads rather than variants.
+    """
+    if not os.path.isfile(path):
+        raise Http404
+    if content_type is None:
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    response = sendfile_response(path, content_type)
+    if response is not None:
+        stat = os.stat(path)
+        etag, last_modified = file_etag(stat), int(stat.st_mtime)
+        conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        response = conditional or response
+    else:
+        if precompressed:
+            path, encoding, stat = choose_variant(request, path)
+        else:
+            encoding, stat = None, os.stat(path)
+        etag, last_modified = file_etag(stat, encoding), int(stat.st_mtime)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = file_response(request, path, stat, etag, content_type)
+            if encoding:
+                response['Content-Encoding'] = encoding
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if precompressed:
+        response['Vary'] = 'Accept-Encoding'
+    if response.status_code in (200, 206):
+        response['Accept-Ranges'] = 'bytes'
+        if filename:
+            response['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(filename)}"
+        else:
+            response.headers.pop('Content-Disposition', None)  # FileResponse's guess from the path
+    if cache_control:
+        patch_cache_control(response, **cache_control)
+    return response
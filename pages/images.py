@@ -0,0 +1,106 @@
+"""
+Responsive image renditions.
+
+Templates ask for one size, e.g. ``fill-600x400``. The site serves that size
+plus half- and double-width variants, in each of the formats listed in the
+``RESPONSIVE_IMAGE_FORMATS`` setting (best first, the last one being the
+``<img>`` fallback). The default is ``['webp', 'jpeg']``; add ``'avif'`` at
+the front where Pillow supports it.
+"""
+import re
+
+from django.conf import settings
+
+# Width multipliers of the requested size; the first is the base image
+RESPONSIVE_WIDTH_FACTORS = (1, 0.5, 2)
+
+# Variants wider than this are never generated
+RESPONSIVE_MAX_WIDTH = 2400
+
+MIME_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+}
+
+SIZE_SPEC = re.compile(r'^(?P<op>fill|max|min)-(?P<width>\d+)x(?P<height>\d+)$|^(?P<width_op>width)-(?P<only_width>\d+)$')
+
+
+def get_image_formats():
+    return list(getattr(settings, 'RESPONSIVE_IMAGE_FORMATS', ['webp', 'jpeg']))
+
+
+def responsive_sizes(spec):
+    """Size operations derived from ``spec``, base size first"""
+    match = SIZE_SPEC.match(spec)
+    if not match:
+        return [spec]
+
+    sizes = []
+    for factor in RESPONSIVE_WIDTH_FACTORS:
+        if match['op']:
+            width = round(int(match['width']) * factor)
+            height = round(int(match['height']) * factor)
+            size = f"{match['op']}-{width}x{height}"
+        else:
+            width = round(int(match['only_width']) * factor)
+            size = f"width-{width}"
+
+        if factor == 1 or width <= RESPONSIVE_MAX_WIDTH:
+            sizes.append(size)
+
+    return sizes
+
+
+def responsive_filter_specs(*specs):
+    """Every rendition filter spec needed to serve the given sizes responsively"""
+    return [
+        f"{size}|format-{fmt}"
+        for spec in specs
+        for size in responsive_sizes(spec)
+        for fmt in get_image_formats()
+    ]
+
+
+def get_srcset(renditions):
+    return ", ".join(f"{rendition.url} {rendition.width}w" for rendition in renditions)
+
+
+def get_responsive_image(image, spec):
+    """
+    Fetch all the variants of ``image`` for ``spec`` in one ``get_renditions``
+    call. Returns the fallback ``src``, ``width``, ``height`` and ``srcset``,
+    plus a ``sources`` list with the ``type`` and ``srcset`` of every other
+    format.
+    """
+    formats = get_image_formats()
+    sizes = responsive_sizes(spec)
+    renditions = image.get_renditions(*responsive_filter_specs(spec))
+
+    srcsets = {}
+    for fmt in formats:
+        by_width = {}
+        for size in sizes:
+            rendition = renditions.get(f"{size}|format-{fmt}")
+            # Small originals are never upscaled, so variants can coincide
+            if rendition is not None:
+                by_width.setdefault(rendition.width, rendition)
+        srcsets[fmt] = list(by_width.values())
+
+    fallback = srcsets[formats[-1]]
+    base = fallback[0]
+
+    return {
+        'src': base.url,
+        'width': base.width,
+        'height': base.height,
+        'srcset': get_srcset(sorted(fallback, key=lambda rendition: rendition.width)),
+        'sources': [
+            {
+                'type': MIME_TYPES.get(fmt, f"image/{fmt}"),
+                'srcset': get_srcset(sorted(srcsets[fmt], key=lambda rendition: rendition.width)),
+            }
+            for fmt in formats[:-1]
+        ],
+    }
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from pages.critical_css import CRITICAL_TEMPLATES, build, get_output_dir, stale_templates
+
+
+class Command(BaseCommand):
+    help = "Compute the critical CSS inlined by the main page templates (see pages/critical_css.py)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'templates',
+            nargs='*',
+            default=CRITICAL_TEMPLATES,
+            help="Templates to compute (default: all of CRITICAL_TEMPLATES)",
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Only report templates whose critical CSS is out of date, failing if there are any",
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['templates']) - set(CRITICAL_TEMPLATES)
+        if unknown:
+            raise CommandError(f"Not in CRITICAL_TEMPLATES: {', '.join(sorted(unknown))}")
+
+        if options['check']:
+            stale = stale_templates(options['templates'])
+            if stale:
+                raise CommandError(f"Critical CSS out of date for: {', '.join(stale)}")
+            self.stdout.write("Critical CSS is up to date")
+            return
+
+        for template_name, size in build(options['templates']).items():
+            self.stdout.write(f"{template_name}: {size / 1024:.1f} kB")
+        self.stdout.write(f"Written to {get_output_dir()}")
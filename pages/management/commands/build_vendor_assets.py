@@ -0,0 +1,105 @@
+import io
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pages.vendor_assets import (
+    BOOTSTRAP_CSS,
+    BOOTSTRAP_JS,
+    BOOTSTRAP_SAFELIST,
+    FONTAWESOME_CSS,
+    SOURCES,
+    VENDOR_DIR,
+    purge_css,
+    purge_fontawesome,
+    scan_dirs,
+    used_fonts,
+    used_words,
+)
+
+
+class Command(BaseCommand):
+    help = "Build the purged Bootstrap and Font Awesome bundles served from our static files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            help="Directory holding the release files (see SOURCES in pages/vendor_assets.py) "
+                 "instead of downloading them",
+        )
+        parser.add_argument(
+            '--output',
+            default=settings.STATICFILES_DIRS[0],
+            help="Static directory to write the vendor/ bundle into",
+        )
+
+    def handle(self, *args, **options):
+        self.source = Path(options['source']) if options['source'] else None
+        output = Path(options['output'])
+        (output / VENDOR_DIR / 'webfonts').mkdir(parents=True, exist_ok=True)
+
+        words = used_words(scan_dirs())
+
+        bootstrap = self.read('bootstrap.min.css').decode('utf-8')
+        bootstrap_css = purge_css(bootstrap, words | BOOTSTRAP_SAFELIST)
+        bootstrap_js = self.read('bootstrap.bundle.min.js')
+
+        extension = font_extension()
+        font_files = {name: f'webfonts/{name}{extension}' for name in used_fonts(words)}
+        fontawesome = self.read('all.min.css').decode('utf-8')
+        fontawesome_css, codepoints = purge_fontawesome(fontawesome, words, font_files)
+
+        # Fonts first: the stylesheets are what marks the bundle as built
+        for name, file_name in font_files.items():
+            font = self.read(f'{name}.ttf')
+            target = output / VENDOR_DIR / file_name
+            subset_font(font, codepoints, target)
+            self.stdout.write(f"{name}: {len(codepoints)} icons, {len(font) // 1024} kB -> {target.stat().st_size // 1024} kB")
+
+        (output / BOOTSTRAP_JS).write_bytes(bootstrap_js)
+        (output / BOOTSTRAP_CSS).write_text(bootstrap_css, encoding='utf-8')
+        (output / FONTAWESOME_CSS).write_text(fontawesome_css, encoding='utf-8')
+        self.report('Bootstrap CSS', bootstrap, bootstrap_css)
+        self.report('Font Awesome CSS', fontawesome, fontawesome_css)
+
+    def read(self, name):
+        if self.source is not None:
+            try:
+                return (self.source / name).read_bytes()
+            except OSError as e:
+                raise CommandError(f"Can't read {name} from {self.source}: {e}")
+        try:
+            with urllib.request.urlopen(SOURCES[name], timeout=30) as response:
+                return response.read()
+        except OSError as e:
+            raise CommandError(f"Can't download {SOURCES[name]}: {e}")
+
+    def report(self, label, original, purged):
+        self.stdout.write(f"{label}: {len(original) // 1024} kB -> {len(purged) // 1024} kB")
+
+
+def font_extension():
+    try:
+        import brotli  # noqa: F401  (needed by fontTools for WOFF2)
+        return '.woff2'
+    except ImportError:
+        return '.woff'
+
+
+def subset_font(data, codepoints, target):
+    """Write the glyphs of ``codepoints`` from the TrueType font ``data`` to ``target``"""
+    try:
+        from fontTools import subset
+    except ImportError:
+        raise CommandError("Subsetting the icon fonts needs fontTools: pip install fonttools brotli")
+
+    options = subset.Options()
+    options.flavor = target.suffix.lstrip('.')
+    font = subset.load_font(io.BytesIO(data), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    with open(target, 'wb') as file:
+        subset.save_font(font, file, options)
@@ -0,0 +1,76 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from pages.models import ArticlePage, GalleryAlbumPage, HistoricalEventPage, PressAlbumPage
+from pages.renditions import generate_renditions, init_worker, merge_jobs
+
+
+class Command(BaseCommand):
+    help = "Generate every rendition used by the site's page templates, in parallel"
+
+    page_models = [GalleryAlbumPage, PressAlbumPage, HistoricalEventPage, ArticlePage]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes, the number of CPUs by default (0 generates in this process)",
+        )
+        parser.add_argument(
+            '--progress-every',
+            type=int,
+            default=50,
+            help="Report progress after this many images",
+        )
+
+    def handle(self, *args, **options):
+        jobs = merge_jobs(
+            job
+            for model in self.page_models
+            for page in model.objects.live()
+            for job in page.get_rendition_jobs()
+        )
+        total = len(jobs)
+        self.stdout.write(f"Warming renditions for {total} images")
+
+        self.started = time.monotonic()
+        self.done = self.created = 0
+        self.total = total
+        self.progress_every = max(options['progress_every'], 1)
+
+        if options['workers']:
+            with ProcessPoolExecutor(
+                max_workers=options['workers'],
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+            ) as pool:
+                futures = [
+                    pool.submit(generate_renditions, image_id, filter_specs)
+                    for image_id, filter_specs in jobs.items()
+                ]
+                for future in as_completed(futures):
+                    self.record(future.result())
+        else:
+            for image_id, filter_specs in jobs.items():
+                self.record(generate_renditions(image_id, filter_specs))
+
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {self.created} renditions created for {total} images "
+            f"in {elapsed:.1f}s ({self.created / elapsed if elapsed else 0:.1f} renditions/s)"
+        ))
+
+    def record(self, created):
+        self.done += 1
+        self.created += created
+        if self.done % self.progress_every == 0 or self.done == self.total:
+            elapsed = time.monotonic() - self.started
+            self.stdout.write(
+                f"  {self.done}/{self.total} images, {self.created} renditions created "
+                f"({self.done / elapsed if elapsed else 0:.1f} images/s)"
+            )
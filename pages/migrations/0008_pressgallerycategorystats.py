@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_category_stats(apps, schema_editor):
+    PressGalleryCategoryPage = apps.get_model('pages', 'PressGalleryCategoryPage')
+    PressGalleryCategoryStats = apps.get_model('pages', 'PressGalleryCategoryStats')
+    PressAlbumPage = apps.get_model('pages', 'PressAlbumPage')
+    PressImage = apps.get_model('pages', 'PressImage')
+    
+    stats = []
+    for category in PressGalleryCategoryPage.objects.all():
+        albums = PressAlbumPage.objects.filter(
+            live=True, path__startswith=category.path, depth=category.depth + 1
+        ).order_by('-album_date', '-pk')
+        
+        # Cover of the most recent album that has one
+        cover_image_id = None
+        for album in albums:
+            cover_image_id = album.cover_image_id or PressImage.objects.filter(
+                page_id=album.pk
+            ).order_by('sort_order').values_list('image_id', flat=True).first()
+            if cover_image_id:
+                break
+        
+        latest = albums.first()
+        stats.append(PressGalleryCategoryStats(
+            category_id=category.pk,
+            album_count=albums.count(),
+            latest_album_date=latest.album_date if latest else None,
+            cover_image_id=cover_image_id,
+        ))
+    PressGalleryCategoryStats.objects.bulk_create(stats)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0007_pressalbumpage_pressgallerycategorypage_and_more'),
+        ('wagtailimages', '0027_image_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PressGalleryCategoryStats',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='album_stats', serialize=False, to='pages.pressgallerycategorypage')),
+                ('album_count', models.PositiveIntegerField(default=0)),
+                ('latest_album_date', models.DateField(blank=True, null=True)),
+                ('cover_image', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wagtailimages.image')),
+            ],
+            options={
+                'verbose_name': 'Press Gallery Category Stats',
+                'verbose_name_plural': 'Press Gallery Category Stats',
+            },
+        ),
+        migrations.RunPython(populate_category_stats, migrations.RunPython.noop),
+    ]
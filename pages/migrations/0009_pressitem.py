@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+PRESS_PAGE_TYPES = [
+    ('PressReleasePage', 'press-releases'),
+    ('NewsPage', 'news'),
+    ('InterviewPage', 'interviews'),
+    ('EditorialPage', 'editorials'),
+]
+
+
+def populate_press_items(apps, schema_editor):
+    PressIndexPage = apps.get_model('pages', 'PressIndexPage')
+    PressItem = apps.get_model('pages', 'PressItem')
+    index_pages = dict(PressIndexPage.objects.values_list('path', 'pk'))
+    
+    items = []
+    for model_name, item_type in PRESS_PAGE_TYPES:
+        for page in apps.get_model('pages', model_name).objects.filter(live=True):
+            index_page_id = index_pages.get(page.path[:-4])  # Treebeard steplen
+            if index_page_id is None:
+                continue
+            items.append(PressItem(
+                page_id=page.pk,
+                index_page_id=index_page_id,
+                item_type=item_type,
+                press_date=page.press_date,
+                short_title=page.short_title,
+                author_names=page.author_names,
+                is_featured=page.is_featured,
+            ))
+    PressItem.objects.bulk_create(items)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0008_pressgallerycategorystats'),
+        ('wagtailcore', '0096_referenceindex_referenceindex_source_object_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PressItem',
+            fields=[
+                ('page', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='press_item', serialize=False, to='wagtailcore.page')),
+                ('item_type', models.CharField(choices=[('press-releases', 'Press Releases'), ('news', 'News'), ('interviews', 'Interviews'), ('editorials', 'Editorials')], max_length=20)),
+                ('press_date', models.DateField()),
+                ('short_title', models.CharField(max_length=255)),
+                ('author_names', models.CharField(blank=True, max_length=255)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('index_page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='press_items', to='pages.pressindexpage')),
+            ],
+            options={
+                'verbose_name': 'Press Item',
+                'indexes': [models.Index(fields=['index_page', '-press_date', '-page'], name='press_item_all_idx'), models.Index(fields=['index_page', 'item_type', '-press_date', '-page'], name='press_item_tab_idx')],
+            },
+        ),
+        migrations.RunPython(populate_press_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0009_pressitem'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='historicaleventpage',
+            name='event_date',
+            field=models.DateField(db_index=True, help_text='Date of the historical event'),
+        ),
+    ]
@@ -1,15 +1,200 @@
 from django.db import models
+from django.db.models import Count, F, Max, OuterRef, Prefetch, Subquery, prefetch_related_objects
+from django.db.models.functions import Coalesce, ExtractYear, Substr
 from wagtail.models import Page, Orderable
 from wagtail.fields import RichTextField
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel, InlinePanel
 from wagtail.search import index
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from wagtail.contrib.routable_page.models import RoutablePageMixin, path
+from django.core.paginator import Paginator
+from django.core.cache import cache
+from django.http import JsonResponse
 from django.utils import timezone
 from wagtail.images.models import Image
 from collections import OrderedDict
 import math
 from modelcluster.fields import ParentalKey
-from datetime import datetime
+from datetime import date, datetime
+
+from .album_zip import album_files, album_zip_response
+from .api import listing_response
+from .images import get_responsive_image, responsive_filter_specs
+from .pagination import paginate_listing
+from .search_cache import cached_search
+
+
+# Photos per page of an album's grid, and per photos/ JSON response
+ALBUM_PHOTOS_PER_PAGE = 24
+
+
+def prefetch_album_photos(photos, *specs):
+    """
+    Load an album's photos together with their images and all the
+    responsive renditions of the given sizes, in bulk
+    """
+    renditions = Image.get_rendition_model().objects.filter(
+        filter_spec__in=responsive_filter_specs(*specs)
+    )
+    photos = list(photos)
+    prefetch_related_objects(
+        photos,
+        Prefetch('image__renditions', queryset=renditions, to_attr='prefetched_renditions'),
+    )
+    return photos
+
+
+def paginate_album_photos(photos, page_number):
+    """
+    One page of an album's photos, with the renditions used by the grid
+    thumbnails and the carousel slides prefetched
+    """
+    paginator = Paginator(photos, ALBUM_PHOTOS_PER_PAGE)
+    photos = paginator.get_page(page_number)
+    photos.object_list = prefetch_album_photos(photos.object_list, 'fill-600x400', 'fill-1600x1200')
+    return photos
+
+
+def album_photos_response(photos):
+    """JSON body for a page of album photos, as returned by paginate_album_photos"""
+    return JsonResponse({
+        'count': photos.paginator.count,
+        'page': photos.number,
+        'num_pages': photos.paginator.num_pages,
+        'next_page': photos.next_page_number() if photos.has_next() else None,
+        'photos': [
+            {
+                'index': photos.start_index() - 1 + offset,
+                'caption': photo.caption,
+                'thumbnail': get_responsive_image(photo.image, 'fill-600x400'),
+                'full_size': get_responsive_image(photo.image, 'fill-1600x1200'),
+            }
+            for offset, photo in enumerate(photos)
+        ],
+    })
+
+
+def prefetch_album_covers(albums, *specs):
+    """
+    Resolve the cover images of a page of albums annotated with
+    ``card_cover_image_id`` in a single query, prefetching the responsive
+    renditions of the given sizes so the cards render without per-album
+    lookups
+    """
+    albums = list(albums)
+    image_ids = {album.card_cover_image_id for album in albums if album.card_cover_image_id}
+    images = Image.objects.prefetch_renditions(
+        *responsive_filter_specs(*specs)
+    ).in_bulk(image_ids) if image_ids else {}
+
+    for album in albums:
+        album._cover_image = images.get(album.card_cover_image_id)
+
+    return albums
+
+
+class AlbumCardMixin:
+    """
+    Listing card data for album pages, whose photos are the Orderable
+    children under ``photos_relation``
+    """
+    
+    photos_relation = None
+    
+    @classmethod
+    def with_card_data(cls, queryset):
+        """
+        Annotate albums with their photo count and resolved cover image id
+        (explicit cover or first photo), for listing cards
+        """
+        photo_model = cls._meta.get_field(cls.photos_relation).related_model
+        photos = photo_model.objects.filter(page=OuterRef('pk')).order_by()
+        photo_count = photos.values('page').annotate(count=Count('pk')).values('count')
+        first_photo = photos.order_by('sort_order').values('image_id')[:1]
+        
+        return queryset.annotate(
+            card_photo_count=Coalesce(Subquery(photo_count), 0),
+            card_cover_image_id=Coalesce(
+                'cover_image_id', Subquery(first_photo), output_field=models.IntegerField()
+            ),
+        )
+    
+    def get_cover_image(self):
+        """Get cover image or first photo"""
+        if hasattr(self, '_cover_image'):
+            return self._cover_image
+        
+        if self.cover_image:
+            return self.cover_image
+        
+        first_image = getattr(self, self.photos_relation).first()
+        if first_image:
+            return first_image.image
+        
+        return None
+    
+    def get_photo_count(self):
+        """Get total number of photos in album"""
+        if getattr(self, 'card_photo_count', None) is not None:
+            return self.card_photo_count
+        
+        return getattr(self, self.photos_relation).count()
+
+
+def parse_date(value):
+    """A ``YYYY-MM-DD`` query parameter as a date, or None"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def album_listing(request, index_page, album_model):
+    """
+    Context for a paginated listing of ``index_page``'s albums, filtered by
+    the request's date range and search.
+
+    The date range is applied to the album queryset before searching, so
+    the search backend runs it (and the parent scope) in the same query as
+    the full-text match, using the ``album_date`` FilterField.
+    """
+    albums = album_model.objects.live().child_of(index_page)
+    
+    # Date range filtering
+    date_from = request.GET.get('date_from', '')
+    date_to = request.GET.get('date_to', '')
+    from_date = parse_date(date_from) if date_from else None
+    to_date = parse_date(date_to) if date_to else None
+    if from_date:
+        albums = albums.filter(album_date__gte=from_date)
+    if to_date:
+        albums = albums.filter(album_date__lte=to_date)
+    
+    # Search functionality, with cover and photo count for the cards
+    search_query = request.GET.get('search', '')
+    if search_query:
+        # Ranked ids are cached, so paging through the results searches once
+        albums = cached_search(
+            albums, search_query, f'page:{index_page.pk}',
+            filters={'date_from': from_date, 'date_to': to_date},
+            load_queryset=album_model.with_card_data(albums),
+        )
+        ordering = None  # relevance order
+    else:
+        albums = album_model.with_card_data(albums).order_by('-album_date')
+        ordering = ('-album_date', '-pk')
+    
+    # Pagination
+    albums = paginate_listing(request, albums, 12, ordering, index_page=index_page)
+    
+    # Resolve covers for the whole page at once
+    albums.object_list = prefetch_album_covers(albums.object_list, 'fill-600x400')
+    
+    return {
+        'albums': albums,
+        'search_query': search_query,
+        'date_from': date_from,
+        'date_to': date_to,
+    }
 
 
 class ContactPage(Page):
@@ -71,7 +256,7 @@ class ContactPage(Page):
     ]
 
 
-class PressIndexPage(Page):
+class PressIndexPage(RoutablePageMixin, Page):
 
     template = "pages/press_index_page.html"
     """
@@ -103,6 +288,14 @@ class PressIndexPage(Page):
         'pages.EditorialPage',
     ]
     
+    PRESS_TABS = [
+        ('all', 'All'),
+        ('press-releases', 'Press Releases'),
+        ('news', 'News'),
+        ('interviews', 'Interviews'),
+        ('editorials', 'Editorials'),
+    ]
+    
     class Meta:
         verbose_name = "Press Index Page"
     
@@ -111,25 +304,28 @@ class PressIndexPage(Page):
         
         # Get active tab from query parameter (default: press-releases)
         active_tab = request.GET.get('tab', 'press-releases')
+        if active_tab not in dict(self.PRESS_TABS):
+            active_tab = 'press-releases'
         context['active_tab'] = active_tab
+        context['press_tabs'] = self.PRESS_TABS
         
-        # Get all press releases
-        press_releases = PressReleasePage.objects.live().child_of(self).order_by('-press_date')
+        # Every tab reads the same denormalised index, newest first
+        press_items = PressItem.objects.filter(index_page=self)
+        if active_tab != 'all':
+            press_items = press_items.filter(item_type=active_tab)
+        press_items = press_items.select_related('page').order_by('-press_date', '-page_id')
         
         # Pagination
-        page = request.GET.get('page', 1)
-        paginator = Paginator(press_releases, 9)  # 9 items per page (3x3 grid)
+        press_items = paginate_listing(request, press_items, 9, ('-press_date', '-page'), index_page=self)
         
-        try:
-            press_releases = paginator.page(page)
-        except PageNotAnInteger:
-            press_releases = paginator.page(1)
-        except EmptyPage:
-            press_releases = paginator.page(paginator.num_pages)
-        
-        context['press_releases'] = press_releases
+        context['press_items'] = press_items
         
         return context
+    
+    @path('api/', name='api')
+    def listing_api(self, request):
+        """The listing's cards as JSON, see pages.api"""
+        return listing_response(request, self, 'press_items')
 
 
 class PressReleasePage(Page):
@@ -188,6 +384,9 @@ class PressReleasePage(Page):
     
     parent_page_types = ['pages.PressIndexPage']
     
+    # Tab this page is listed under on the press index
+    press_item_type = 'press-releases'
+    
     class Meta:
         verbose_name = "Press Release"
         verbose_name_plural = "Press Releases"
@@ -221,6 +420,9 @@ class NewsPage(Page):
     
     parent_page_types = ['pages.PressIndexPage']
     
+    # Tab this page is listed under on the press index
+    press_item_type = 'news'
+    
     class Meta:
         verbose_name = "News"
         verbose_name_plural = "News"
@@ -249,6 +451,9 @@ class InterviewPage(Page):
     
     parent_page_types = ['pages.PressIndexPage']
     
+    # Tab this page is listed under on the press index
+    press_item_type = 'interviews'
+    
     class Meta:
         verbose_name = "Interview"
         ordering = ['-press_date']
@@ -276,13 +481,73 @@ class EditorialPage(Page):
     
     parent_page_types = ['pages.PressIndexPage']
     
+    # Tab this page is listed under on the press index
+    press_item_type = 'editorials'
+    
     class Meta:
         verbose_name = "Editorial"
         ordering = ['-press_date']
 
 
 
-class EventIndexPage(Page):
+class PressItem(models.Model):
+    """
+    Denormalised listing entry for every live press release, news item,
+    interview and editorial, so the press index can serve any tab (or all
+    of them merged) from one indexed query.
+    Kept in sync on publish, unpublish and move by pages.signals.
+    """
+    
+    ITEM_TYPE_CHOICES = PressIndexPage.PRESS_TABS[1:]
+    
+    page = models.OneToOneField(
+        'wagtailcore.Page',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='press_item'
+    )
+    
+    index_page = models.ForeignKey(
+        PressIndexPage,
+        on_delete=models.CASCADE,
+        related_name='press_items'
+    )
+    
+    item_type = models.CharField(max_length=20, choices=ITEM_TYPE_CHOICES)
+    press_date = models.DateField()
+    short_title = models.CharField(max_length=255)
+    author_names = models.CharField(max_length=255, blank=True)
+    is_featured = models.BooleanField(default=False)
+    
+    class Meta:
+        verbose_name = "Press Item"
+        indexes = [
+            models.Index(fields=['index_page', '-press_date', '-page'], name='press_item_all_idx'),
+            models.Index(fields=['index_page', 'item_type', '-press_date', '-page'], name='press_item_tab_idx'),
+        ]
+    
+    @classmethod
+    def sync(cls, page):
+        """Add or refresh the entry for a live press page, or drop it otherwise"""
+        parent = page.get_parent()
+        if not page.live or not isinstance(parent.specific_deferred, PressIndexPage):
+            cls.objects.filter(page_id=page.pk).delete()
+            return
+        
+        cls.objects.update_or_create(
+            page_id=page.pk,
+            defaults={
+                'index_page_id': parent.pk,
+                'item_type': page.press_item_type,
+                'press_date': page.press_date,
+                'short_title': page.short_title,
+                'author_names': page.author_names,
+                'is_featured': page.is_featured,
+            },
+        )
+
+
+class EventIndexPage(RoutablePageMixin, Page):
 
     template = "pages/event_index_page.html"
     """
@@ -324,9 +589,11 @@ class EventIndexPage(Page):
         # Filter by tab
         now = timezone.now()
         if active_tab == 'upcoming':
-            events = all_events.filter(event_start_date__gte=now.date()).order_by('event_start_date', 'event_start_time')
+            ordering = ('event_start_date', 'event_start_time', 'pk')
+            events = all_events.filter(event_start_date__gte=now.date()).order_by(*ordering)
         else:  # past
-            events = all_events.filter(event_start_date__lt=now.date()).order_by('-event_start_date', '-event_start_time')
+            ordering = ('-event_start_date', '-event_start_time', '-pk')
+            events = all_events.filter(event_start_date__lt=now.date()).order_by(*ordering)
         
         # Apply filters from query parameters
         event_type = request.GET.get('event_type')
@@ -343,15 +610,7 @@ class EventIndexPage(Page):
             events = events.filter(has_livestream=True)
         
         # Pagination
-        page = request.GET.get('page', 1)
-        paginator = Paginator(events, 9)  # 9 events per page (3x3 grid)
-        
-        try:
-            events = paginator.page(page)
-        except PageNotAnInteger:
-            events = paginator.page(1)
-        except EmptyPage:
-            events = paginator.page(paginator.num_pages)
+        events = paginate_listing(request, events, 9, ordering, index_page=self)
         
         context['events'] = events
         
@@ -360,6 +619,11 @@ class EventIndexPage(Page):
         context['event_formats'] = EventPage.EVENT_FORMAT_CHOICES
         
         return context
+    
+    @path('api/', name='api')
+    def listing_api(self, request):
+        """The listing's cards as JSON, see pages.api"""
+        return listing_response(request, self, 'events')
 
 
 class EventPage(Page):
@@ -527,34 +791,49 @@ class AboutPage(Page):
         Auto-generate timeline periods based on historical events
         Groups events into 5-year periods
         Returns only periods that have events
+        Cached until a historical event under this page changes
         """
-        # Get all historical events
-        events = HistoricalEventPage.objects.live().child_of(self).order_by('event_date')
-        
-        if not events:
-            return []
+        cache_key = self.timeline_cache_key(self.pk)
+        periods = cache.get(cache_key)
+        if periods is not None:
+            return periods
+        
+        # Count events per year in the database, then fold the years into periods
+        years = (
+            HistoricalEventPage.objects.live().child_of(self)
+            .annotate(year=ExtractYear('event_date'))
+            .values('year')
+            .annotate(count=Count('pk'))
+            .order_by('year')
+        )
         
         periods = OrderedDict()
         
-        for event in events:
-            year = event.event_date.year
+        for row in years:
             # Calculate period start (round down to nearest 5-year period ending in 0 or 5)
-            period_start = (year // 5) * 5
+            period_start = (row['year'] // 5) * 5
             period_end = period_start + 5
             
             period_key = f"{period_start}-{period_end}"
             
             if period_key not in periods:
                 periods[period_key] = {
+                    'key': period_key,
                     'start': period_start,
                     'end': period_end,
                     'label': f"{period_start} - {period_end}",
                     'count': 0
                 }
             
-            periods[period_key]['count'] += 1
+            periods[period_key]['count'] += row['count']
         
-        return list(periods.values())
+        periods = list(periods.values())
+        cache.set(cache_key, periods, None)
+        return periods
+    
+    @staticmethod
+    def timeline_cache_key(page_id):
+        return f'about-timeline:{page_id}'
     
     def get_context(self, request):
         context = super().get_context(request)
@@ -570,25 +849,16 @@ class AboutPage(Page):
         if selected_period != 'all':
             try:
                 start_year, end_year = selected_period.split('-')
-                start_year = int(start_year)
-                end_year = int(end_year)
+                # A plain date range, so the event_date index can be used
                 events = events.filter(
-                    event_date__year__gte=start_year,
-                    event_date__year__lt=end_year
+                    event_date__gte=date(int(start_year), 1, 1),
+                    event_date__lt=date(int(end_year), 1, 1)
                 )
             except (ValueError, AttributeError):
                 pass  # Invalid period, show all
         
         # Pagination
-        page = request.GET.get('page', 1)
-        paginator = Paginator(events, 10)  # 10 events per page
-        
-        try:
-            events = paginator.page(page)
-        except PageNotAnInteger:
-            events = paginator.page(1)
-        except EmptyPage:
-            events = paginator.page(paginator.num_pages)
+        events = paginate_listing(request, events, 10, ('-event_date', '-pk'), index_page=self)
         
         context['events'] = events
         context['timeline_periods'] = self.get_timeline_periods()
@@ -604,6 +874,7 @@ class HistoricalEventPage(Page):
     
     # Event Date
     event_date = models.DateField(
+        db_index=True,
         help_text="Date of the historical event"
     )
     
@@ -655,10 +926,14 @@ class HistoricalEventPage(Page):
         period_end = period_start + 5
         return f"{period_start}-{period_end}"
     
+    def get_rendition_jobs(self):
+        """Renditions used by the timeline and detail templates"""
+        return [(self.event_image_id, responsive_filter_specs('fill-1200x600'))]
+    
 
 
 
-class GalleryIndexPage(Page):
+class GalleryIndexPage(RoutablePageMixin, Page):
     template = "pages/gallery_index_page.html"
     """
     Photo Gallery Index Page
@@ -689,58 +964,25 @@ class GalleryIndexPage(Page):
     def get_context(self, request):
         context = super().get_context(request)
         
-        # Get all albums
-        albums = GalleryAlbumPage.objects.live().child_of(self).order_by('-album_date')
-        
-        # Search functionality
-        search_query = request.GET.get('search', '')
-        if search_query:
-            albums = albums.search(search_query)
-        
-        # Date range filtering
-        date_from = request.GET.get('date_from', '')
-        date_to = request.GET.get('date_to', '')
-        
-        if date_from:
-            try:
-                from_date = datetime.strptime(date_from, '%Y-%m-%d').date()
-                albums = albums.filter(album_date__gte=from_date)
-            except ValueError:
-                pass
-        
-        if date_to:
-            try:
-                to_date = datetime.strptime(date_to, '%Y-%m-%d').date()
-                albums = albums.filter(album_date__lte=to_date)
-            except ValueError:
-                pass
-        
-        # Pagination
-        page = request.GET.get('page', 1)
-        paginator = Paginator(albums, 12)  # 12 albums per page
-        
-        try:
-            albums = paginator.page(page)
-        except PageNotAnInteger:
-            albums = paginator.page(1)
-        except EmptyPage:
-            albums = paginator.page(paginator.num_pages)
-        
-        context['albums'] = albums
-        context['search_query'] = search_query
-        context['date_from'] = date_from
-        context['date_to'] = date_to
+        context.update(album_listing(request, self, GalleryAlbumPage))
         
         return context
+    
+    @path('api/', name='api')
+    def listing_api(self, request):
+        """The listing's cards as JSON, see pages.api"""
+        return listing_response(request, self, 'albums')
 
 
-class GalleryAlbumPage(Page):
+class GalleryAlbumPage(AlbumCardMixin, RoutablePageMixin, Page):
     template = "pages/gallery_album_page.html"
     """
     Individual Photo Album/Folder
     Contains multiple photos
     """
     
+    photos_relation = 'gallery_images'
+    
     # Album Details
     album_title = models.CharField(
         max_length=255,
@@ -770,6 +1012,7 @@ class GalleryAlbumPage(Page):
     search_fields = Page.search_fields + [
         index.SearchField('album_title'),
         index.SearchField('album_description'),
+        index.FilterField('album_date'),
     ]
     
     content_panels = Page.content_panels + [
@@ -787,20 +1030,36 @@ class GalleryAlbumPage(Page):
         verbose_name_plural = "Gallery Albums"
         ordering = ['-album_date']
     
-    def get_cover_image(self):
-        """Get cover image or first photo"""
-        if self.cover_image:
-            return self.cover_image
+    def get_context(self, request):
+        context = super().get_context(request)
         
-        first_image = self.gallery_images.first()
-        if first_image:
-            return first_image.image
+        # First page of photos; the rest load from the photos/ route
+        photos = paginate_album_photos(self.gallery_images.order_by('sort_order', 'pk'), 1)
         
-        return None
+        context['photos'] = photos
+        context['photo_count'] = photos.paginator.count
+        
+        return context
     
-    def get_photo_count(self):
-        """Get total number of photos in album"""
-        return self.gallery_images.count()
+    @path('photos/', name='photos')
+    def photos_json(self, request):
+        """Paginated photo metadata and rendition URLs, as JSON"""
+        return album_photos_response(
+            paginate_album_photos(self.gallery_images.order_by('sort_order', 'pk'), request.GET.get('page', 1))
+        )
+    
+    @path('download/', name='download')
+    def download(self, request):
+        """The album's original photos as one ZIP, see pages.album_zip"""
+        photos = self.gallery_images.order_by('sort_order', 'pk').select_related('image')
+        return album_zip_response(request, album_files(photos), f'{self.slug}.zip')
+    
+    def get_rendition_jobs(self):
+        """Renditions used by the album page and its listing card"""
+        photo_specs = responsive_filter_specs('fill-600x400', 'fill-1600x1200')
+        jobs = [(photo.image_id, photo_specs) for photo in self.gallery_images.all()]
+        jobs.append((self.cover_image_id, responsive_filter_specs('fill-600x400')))
+        return jobs
 
 
 class GalleryImage(Orderable):
@@ -836,7 +1095,7 @@ class GalleryImage(Orderable):
         verbose_name_plural = "Gallery Images"
 
 
-class ArticleIndexPage(Page):
+class ArticleIndexPage(RoutablePageMixin, Page):
     template = "pages/article_index__page.html"
     """
     Articles Landing Page
@@ -877,20 +1136,17 @@ class ArticleIndexPage(Page):
             articles = articles.filter(article_type=article_type)
         
         # Pagination
-        page = request.GET.get('page', 1)
-        paginator = Paginator(articles, 9)
-        
-        try:
-            articles = paginator.page(page)
-        except PageNotAnInteger:
-            articles = paginator.page(1)
-        except EmptyPage:
-            articles = paginator.page(paginator.num_pages)
+        articles = paginate_listing(request, articles, 9, ('-publish_date', '-pk'), index_page=self)
         
         context['articles'] = articles
         context['article_types'] = ArticlePage.ARTICLE_TYPE_CHOICES
         
         return context
+    
+    @path('api/', name='api')
+    def listing_api(self, request):
+        """The listing's cards as JSON, see pages.api"""
+        return listing_response(request, self, 'articles')
 
 
 class ArticlePage(Page):
@@ -990,6 +1246,10 @@ class ArticlePage(Page):
         verbose_name = "Article"
         verbose_name_plural = "Articles"
         ordering = ['-publish_date']
+    
+    def get_rendition_jobs(self):
+        """Renditions used by the article template"""
+        return [(self.featured_image_id, responsive_filter_specs('fill-1200x600'))]
 
 
 class PressGalleryIndexPage(Page):
@@ -1023,14 +1283,31 @@ class PressGalleryIndexPage(Page):
     def get_context(self, request):
         context = super().get_context(request)
         
-        # Get all categories
-        categories = PressGalleryCategoryPage.objects.live().child_of(self).order_by('title')
-        context['categories'] = categories
+        # Get all categories, with their cached album stats (categories
+        # that have never had an album published have none)
+        context['categories'] = self.get_categories()
         
         return context
+    
+    def get_categories(self):
+        """Live categories with album stats and cover renditions preloaded"""
+        renditions = Image.get_rendition_model().objects.filter(
+            filter_spec__in=responsive_filter_specs('fill-600x400')
+        )
+        
+        return list(
+            PressGalleryCategoryPage.objects.live().child_of(self)
+            .select_related('album_stats__cover_image')
+            .prefetch_related(Prefetch(
+                'album_stats__cover_image__renditions',
+                queryset=renditions,
+                to_attr='prefetched_renditions',
+            ))
+            .order_by('title')
+        )
 
 
-class PressGalleryCategoryPage(Page):
+class PressGalleryCategoryPage(RoutablePageMixin, Page):
     template = "pages/press_gallery_category_page.html"
     """
     Press Gallery Category (Editorials, Election Rally, Government Events, etc.)
@@ -1061,64 +1338,108 @@ class PressGalleryCategoryPage(Page):
     def get_context(self, request):
         context = super().get_context(request)
         
-        # Get all albums in this category
-        albums = PressAlbumPage.objects.live().child_of(self).order_by('-album_date')
-        
-        # Search functionality
-        search_query = request.GET.get('search', '')
-        if search_query:
-            albums = albums.search(search_query)
-        
-        # Date range filtering
-        date_from = request.GET.get('date_from', '')
-        date_to = request.GET.get('date_to', '')
-        
-        if date_from:
-            try:
-                from datetime import datetime
-                from_date = datetime.strptime(date_from, '%Y-%m-%d').date()
-                albums = albums.filter(album_date__gte=from_date)
-            except ValueError:
-                pass
-        
-        if date_to:
-            try:
-                from datetime import datetime
-                to_date = datetime.strptime(date_to, '%Y-%m-%d').date()
-                albums = albums.filter(album_date__lte=to_date)
-            except ValueError:
-                pass
-        
-        # Pagination
-        page = request.GET.get('page', 1)
-        paginator = Paginator(albums, 12)
-        
-        try:
-            albums = paginator.page(page)
-        except PageNotAnInteger:
-            albums = paginator.page(1)
-        except EmptyPage:
-            albums = paginator.page(paginator.num_pages)
-        
-        context['albums'] = albums
-        context['search_query'] = search_query
-        context['date_from'] = date_from
-        context['date_to'] = date_to
+        context.update(album_listing(request, self, PressAlbumPage))
         
         return context
     
+    @path('api/', name='api')
+    def listing_api(self, request):
+        """The listing's cards as JSON, see pages.api"""
+        return listing_response(request, self, 'albums')
+    
     def get_album_count(self):
         """Get total number of albums in category"""
+        stats = getattr(self, 'album_stats', None)
+        if stats is not None:
+            return stats.album_count
+        
         return PressAlbumPage.objects.live().child_of(self).count()
+    
+    @classmethod
+    def refresh_album_stats(cls, categories):
+        """
+        Recompute the cached live album count, latest album date and cover
+        image for the given categories
+        """
+        paths = [category.path for category in categories]
+        if not paths:
+            return
+        
+        albums = PressAlbumPage.objects.live().annotate(
+            parent_path=Substr('path', 1, (F('depth') - 1) * Page.steplen)
+        ).filter(parent_path__in=paths)
+        
+        stats = {
+            row['parent_path']: row
+            for row in albums.order_by().values('parent_path').annotate(
+                album_count=Count('pk'),
+                latest_album_date=Max('album_date'),
+            )
+        }
+        
+        # Cover of the most recent album that has one
+        covers = {}
+        latest_first = PressAlbumPage.with_card_data(albums).filter(
+            card_cover_image_id__isnull=False
+        ).order_by('parent_path', '-album_date', '-pk')
+        for parent_path, cover_image_id in latest_first.values_list('parent_path', 'card_cover_image_id'):
+            covers.setdefault(parent_path, cover_image_id)
+        
+        PressGalleryCategoryStats.objects.bulk_create(
+            [
+                PressGalleryCategoryStats(
+                    category_id=category.pk,
+                    album_count=stats.get(category.path, {}).get('album_count', 0),
+                    latest_album_date=stats.get(category.path, {}).get('latest_album_date'),
+                    cover_image_id=covers.get(category.path),
+                )
+                for category in categories
+            ],
+            update_conflicts=True,
+            unique_fields=['category'],
+            update_fields=['album_count', 'latest_album_date', 'cover_image'],
+        )
+
+
+class PressGalleryCategoryStats(models.Model):
+    """
+    Cached live album stats for a press gallery category.
+    Kept outside the page model so page revisions never overwrite it.
+    """
+    
+    category = models.OneToOneField(
+        PressGalleryCategoryPage,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='album_stats'
+    )
+    
+    album_count = models.PositiveIntegerField(default=0)
+    
+    latest_album_date = models.DateField(null=True, blank=True)
+    
+    cover_image = models.ForeignKey(
+        'wagtailimages.Image',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+'
+    )
+    
+    class Meta:
+        verbose_name = "Press Gallery Category Stats"
+        verbose_name_plural = "Press Gallery Category Stats"
 
 
-class PressAlbumPage(Page):
+class PressAlbumPage(AlbumCardMixin, RoutablePageMixin, Page):
     template = "pages/press_album_page.html"
     
     """
     Individual Press Album/Event
     """
     
+    photos_relation = 'press_images'
+    
     album_title = models.CharField(
         max_length=255,
         help_text="Album title"
@@ -1152,6 +1473,7 @@ class PressAlbumPage(Page):
         index.SearchField('album_title'),
         index.SearchField('album_location'),
         index.SearchField('album_description'),
+        index.FilterField('album_date'),
     ]
     
     content_panels = Page.content_panels + [
@@ -1170,20 +1492,36 @@ class PressAlbumPage(Page):
         verbose_name_plural = "Press Albums"
         ordering = ['-album_date']
     
-    def get_cover_image(self):
-        """Get cover image or first photo"""
-        if self.cover_image:
-            return self.cover_image
+    def get_context(self, request):
+        context = super().get_context(request)
         
-        first_image = self.press_images.first()
-        if first_image:
-            return first_image.image
+        # First page of photos; the rest load from the photos/ route
+        photos = paginate_album_photos(self.press_images.order_by('sort_order', 'pk'), 1)
         
-        return None
+        context['photos'] = photos
+        context['photo_count'] = photos.paginator.count
+        
+        return context
     
-    def get_photo_count(self):
-        """Get total number of photos"""
-        return self.press_images.count()
+    @path('photos/', name='photos')
+    def photos_json(self, request):
+        """Paginated photo metadata and rendition URLs, as JSON"""
+        return album_photos_response(
+            paginate_album_photos(self.press_images.order_by('sort_order', 'pk'), request.GET.get('page', 1))
+        )
+    
+    @path('download/', name='download')
+    def download(self, request):
+        """The album's original photos as one ZIP, see pages.album_zip"""
+        photos = self.press_images.order_by('sort_order', 'pk').select_related('image')
+        return album_zip_response(request, album_files(photos), f'{self.slug}.zip')
+    
+    def get_rendition_jobs(self):
+        """Renditions used by the album page and its listing card"""
+        photo_specs = responsive_filter_specs('fill-600x400', 'fill-1600x1200')
+        jobs = [(photo.image_id, photo_specs) for photo in self.press_images.all()]
+        jobs.append((self.cover_image_id, responsive_filter_specs('fill-600x400')))
+        return jobs
 
 
 class PressImage(Orderable):
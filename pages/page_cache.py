@@ -0,0 +1,224 @@
+"""
+Full-page response cache for public Wagtail pages.
+
+Anonymous GET requests served by ``wagtail_serve`` are cached under the
+scheme, host, path and the whitelisted query parameters in
+``PAGE_CACHE_PARAMS`` (other parameters, e.g. tracking ones, don't affect
+what pages render), and the deploy version (see ``deploy_version``), so a
+shared cache never serves pages linking static files of another build.
+Hits are answered by ``PageCacheMiddleware`` before Wagtail routes the
+request, so they cost two cache lookups and no queries; a hit whose ETag the
+client already has is answered with a 304.
+
+Each entry records the version of the page that rendered it. Publishing,
+unpublishing, moving or deleting a page drops the versions of that page,
+its parent index and its ancestors (see pages.signals), which invalidates
+every cached URL of those pages at once. Changes that can affect any page
+(sites, view restrictions) drop a site-wide version instead.
+
+Only cookieless visitors are served from (and stored in) the cache, so
+editors, previews and visitors with a session or pending messages always
+get a fresh render. ``PAGE_CACHE_TIMEOUT`` (seconds, default 600) bounds
+how long an entry lives; set it to 0 to turn the cache off.
+
+A version is the time it was created, so it is never older than the last
+change to what the page renders. That makes the versions (with the URL) the
+validators of a page: anonymous responses carry an ETag and Last-Modified
+header derived from them (see ``page_validators``), computed before the
+page's context, and clients revalidating with either get a 304 without the
+page being rendered.
+
+The site chrome (header, navigation, footer) is cached separately as
+template fragments by the ``cached_include`` tag in site_chrome, so it is
+a cache lookup even for requests that bypass the page cache. Fragments are
+keyed by the deploy version too.
+"""
+import hashlib
+import time
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe, urlencode
+
+from .pagination import LISTING_FILTER_PARAMS
+
+# Query parameters that change what a page renders
+PAGE_CACHE_PARAMS = LISTING_FILTER_PARAMS + ('page', 'cursor')
+
+SITE_VERSION_KEY = 'page-cache:version:site'
+
+CHROME_VERSION_KEY = 'site-chrome:version'
+
+# Site chrome fragments live until invalidated; this is only a backstop
+CHROME_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 600)
+
+
+def page_version_key(page_id):
+    return f'page-cache:version:{page_id}'
+
+
+def deploy_version():
+    """
+    The ``DEPLOY_VERSION`` setting (e.g. the release's commit) and the hash
+    of the static files manifest, which changes with every collectstatic
+    that changes a file
+    """
+    manifest_hash = getattr(staticfiles_storage, 'manifest_hash', '')
+    return f"{getattr(settings, 'DEPLOY_VERSION', '')}:{manifest_hash}"
+
+
+def page_cache_key(request):
+    params = urlencode(sorted(
+        (param, value)
+        for param in PAGE_CACHE_PARAMS
+        for value in request.GET.getlist(param)
+        if value
+    ))
+    url = f'{deploy_version()}|{request.scheme}://{request.get_host()}{request.path}?{params}'
+    return 'page-cache:' + hashlib.md5(url.encode(), usedforsecurity=False).hexdigest()
+
+
+def is_anonymous_request(request):
+    """A read by a visitor without a session or pending messages"""
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and 'messages' not in request.COOKIES
+    )
+
+
+def is_cacheable_request(request):
+    return is_anonymous_request(request) and get_timeout() > 0
+
+
+def is_public_response(request, response):
+    """Whether ``response`` is the same for every anonymous visitor"""
+    return not (
+        response.status_code != 200
+        or response.streaming
+        or response.cookies
+        or request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+        or response.has_header('Vary')
+        or 'private' in response.get('Cache-Control', '')
+        or 'no-cache' in response.get('Cache-Control', '')
+    )
+
+
+def get_cached_response(key):
+    entry = cache.get(key)
+    if entry is None:
+        return None
+
+    # Stale if any page it depends on was purged since
+    if cache.get_many(entry['versions']) != entry['versions']:
+        return None
+
+    return HttpResponse(entry['content'], status=entry['status'], headers=entry['headers'])
+
+
+def get_versions(page):
+    """The current versions ``page``'s responses depend on, creating missing ones"""
+    keys = [SITE_VERSION_KEY, page_version_key(page.pk)]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return versions
+
+
+def page_validators(request, page):
+    """
+    ETag and Last-Modified (a timestamp) of ``page`` as served to an
+    anonymous ``request``. Costs a cache lookup, no queries.
+    """
+    versions = get_versions(page)
+
+    # Listings such as upcoming events also change with the date
+    today = timezone.localdate()
+    midnight = timezone.make_aware(datetime.combine(today, datetime.min.time()))
+
+    changes = [value / 1e9 for value in versions.values()] + [midnight.timestamp()]
+    if page.last_published_at:
+        changes.append(page.last_published_at.timestamp())
+
+    state = f'{page_cache_key(request)}|{sorted(versions.items())}|{page.last_published_at}|{today}'
+    etag = '"%s"' % hashlib.md5(state.encode(), usedforsecurity=False).hexdigest()
+    return etag, int(max(changes))
+
+
+def store_response(request, page, response):
+    """Cache a rendered response of ``page`` unless it is private to this visitor"""
+    if not is_public_response(request, response):
+        return
+
+    versions = get_versions(page)
+
+    cache.set(request.page_cache_key, {
+        'content': response.content,
+        'status': response.status_code,
+        'headers': dict(response.items()),
+        'versions': versions,
+    }, get_timeout())
+
+
+def purge_pages(*page_ids):
+    """Invalidate every cached response rendered by the given pages"""
+    cache.delete_many([page_version_key(page_id) for page_id in page_ids])
+
+
+def purge_site():
+    """Invalidate every cached response"""
+    cache.delete(SITE_VERSION_KEY)
+
+
+def chrome_fragment_key(request, template_name, section):
+    # The deploy version keeps fragments linking another build's static files out
+    version = cache.get_or_set(CHROME_VERSION_KEY, uuid.uuid4().hex, None)
+    deploy = hashlib.md5(deploy_version().encode(), usedforsecurity=False).hexdigest()[:12]
+    return f'site-chrome:{version}:{deploy}:{request.get_host()}:{section}:{template_name}'
+
+
+def purge_site_chrome():
+    """Invalidate the cached header, navigation and footer, and every page embedding them"""
+    cache.delete(CHROME_VERSION_KEY)
+    purge_site()
+
+
+class PageCacheMiddleware:
+    """
+    Answer cacheable requests for Wagtail pages from the page cache. The
+    responses are stored by the ``on_serve_page`` hook in wagtail_hooks,
+    which knows the page being served.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.resolver_match.url_name != 'wagtail_serve' or not is_cacheable_request(request):
+            return None
+
+        request.page_cache_key = page_cache_key(request)
+        response = get_cached_response(request.page_cache_key)
+        if response is None:
+            return None
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(response.get('Last-Modified', '')),
+            response=response,
+        )
@@ -0,0 +1,237 @@
+"""
+Listing pagination.
+
+Index pages paginate with Django's ``Paginator`` (``?page=N``) by default.
+Setting ``LISTING_PAGINATION = 'cursor'`` switches every listing to cursor
+mode: instead of an OFFSET and a ``COUNT(*)``, each request continues after
+the last item the visitor has seen (``?cursor=...``) with a WHERE on the
+listing's sort columns plus page id, so page N costs the same as page 1.
+Templates render a "Load more" link in this mode, which load_more.js turns
+into infinite scroll.
+
+Search results are ordered by relevance, which can't be seeked, so they use
+a position cursor instead. That still skips the ``COUNT(*)``.
+
+In the default numbered mode the total count of an index page's listing is
+cached per filter set, and dropped whenever one of its children is
+published, unpublished, moved or deleted (see pages.signals). Pages also
+carry an elided ``page_range`` so templates only draw a window of links.
+"""
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.http import urlencode
+
+# Query parameters that change what an index page lists
+LISTING_FILTER_PARAMS = (
+    'tab',
+    'event_type',
+    'event_format',
+    'livestream',
+    'period',
+    'search',
+    'date_from',
+    'date_to',
+    'article_type',
+)
+
+# Backstop in case an invalidation is missed, e.g. by a per-process cache
+LISTING_COUNT_TIMEOUT = 60 * 60
+
+
+def cursor_pagination_enabled():
+    return getattr(settings, 'LISTING_PAGINATION', 'pages') == 'cursor'
+
+
+def encode_cursor(values):
+    data = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in values])
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields):
+    """Decode a cursor into values for ``fields``, or None if it is invalid"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(fields):
+            return None
+        values = [field.to_python(value) for field, value in zip(fields, values)]
+    except (ValueError, TypeError, ValidationError):
+        return None
+    # Keys are compared with lt/gt, which can't take None
+    if any(value is None for value in values):
+        return None
+    return values
+
+
+class CursorPage:
+    """
+    One page of a cursor paginated listing. Iterates like a Django ``Page``;
+    ``next_cursor`` is None on the last page.
+    """
+
+    cursor_mode = True
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking past the sort key of the previous page's
+    last row. ``ordering`` must end in a unique column (usually ``pk``).
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset.order_by(*ordering)
+        self.per_page = per_page
+        self.ordering = ordering
+        self.names = [key.lstrip('-') for key in ordering]
+
+        opts = queryset.model._meta
+        self.fields = [opts.pk if name == 'pk' else opts.get_field(name) for name in self.names]
+
+    def after(self, values):
+        """Filter for rows that sort after ``values``"""
+        condition = Q()
+        for index, (key, name) in enumerate(zip(self.ordering, self.names)):
+            lookup = 'lt' if key.startswith('-') else 'gt'
+            term = Q(**{f'{name}__{lookup}': values[index]})
+            for previous, value in zip(self.names[:index], values[:index]):
+                term &= Q(**{previous: value})
+            condition |= term
+        return condition
+
+    def page(self, cursor):
+        items = self.queryset
+        values = decode_cursor(cursor, self.fields) if cursor else None
+        if values is not None:
+            items = items.filter(self.after(values))
+
+        # One extra row tells us whether there is a next page
+        items = list(items[:self.per_page + 1])
+        next_cursor = None
+        if len(items) > self.per_page:
+            items = items[:self.per_page]
+            next_cursor = encode_cursor([getattr(items[-1], field.attname) for field in self.fields])
+
+        return CursorPage(items, next_cursor)
+
+
+class PositionPaginator:
+    """
+    Cursor pagination for results that can't be seeked, such as search
+    results ordered by relevance. The cursor is the position of the next
+    result.
+    """
+
+    def __init__(self, results, per_page):
+        self.results = results
+        self.per_page = per_page
+
+    def page(self, cursor):
+        try:
+            start = max(int(cursor or 0), 0)
+        except ValueError:
+            start = 0
+
+        items = list(self.results[start:start + self.per_page + 1])
+        next_cursor = None
+        if len(items) > self.per_page:
+            items = items[:self.per_page]
+            next_cursor = str(start + self.per_page)
+
+        return CursorPage(items, next_cursor)
+
+
+def listing_version_key(index_page_id):
+    return f'listing-counts:{index_page_id}:version'
+
+
+def listing_count_key(index_page_id, request):
+    """Cache key for the count of an index page's listing under the request's filters"""
+    version = cache.get_or_set(listing_version_key(index_page_id), 1, None)
+    filters = urlencode(sorted(
+        (param, request.GET[param]) for param in LISTING_FILTER_PARAMS if request.GET.get(param)
+    ))
+    # Upcoming/past event tabs change with the date, not just on publish
+    filters += f'&date={timezone.localdate().isoformat()}'
+    digest = hashlib.md5(filters.encode(), usedforsecurity=False).hexdigest()
+    return f'listing-counts:{index_page_id}:{version}:{digest}'
+
+
+def invalidate_listing_counts(*index_page_ids):
+    """Drop every cached listing count of the given index pages"""
+    for index_page_id in index_page_ids:
+        if index_page_id:
+            try:
+                cache.incr(listing_version_key(index_page_id))
+            except ValueError:
+                pass  # Nothing cached yet
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator that keeps its total count in the cache under ``cache_key``"""
+
+    def __init__(self, object_list, per_page, cache_key, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+
+    @cached_property
+    def count(self):
+        count = cache.get(self.cache_key)
+        if count is None:
+            count = super().count
+            cache.set(self.cache_key, count, LISTING_COUNT_TIMEOUT)
+        return count
+
+
+def paginate_listing(request, items, per_page, ordering=None, index_page=None):
+    """
+    Paginate a listing for ``request``.
+    ``ordering`` is the listing's sort key ending in a unique column; leave
+    it out for search results, which can only be paged by position.
+    Listings of an ``index_page`` have their counts cached.
+    """
+    if cursor_pagination_enabled():
+        if ordering:
+            paginator = KeysetPaginator(items, per_page, ordering)
+        else:
+            paginator = PositionPaginator(items, per_page)
+        return paginator.page(request.GET.get('cursor'))
+
+    page = request.GET.get('page', 1)
+    if index_page is not None:
+        paginator = CachedCountPaginator(items, per_page, listing_count_key(index_page.pk, request))
+    else:
+        paginator = Paginator(items, per_page)
+
+    try:
+        page = paginator.page(page)
+    except PageNotAnInteger:
+        page = paginator.page(1)
+    except EmptyPage:
+        page = paginator.page(paginator.num_pages)
+
+    page.page_range = list(paginator.get_elided_page_range(page.number, on_each_side=2, on_ends=1))
+    return page
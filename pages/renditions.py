@@ -0,0 +1,104 @@
+"""
+Off-request rendition generation.
+
+Pages that render images declare the renditions their templates use through
+``get_rendition_jobs()``, which yields ``(image_id, filter_specs)`` pairs.
+When such a page is published the jobs are handed to a pool of worker
+processes, so Pillow runs outside the request/response cycle and the first
+visitor gets renditions that already exist.
+
+The pool size is controlled by the ``RENDITION_WORKERS`` setting. Every
+web server process (e.g. each gunicorn worker) starts its own pool on its
+first publish, and each pool process is a fresh interpreter importing
+Django, so the default is a single process per web process. Set it to
+``0`` to generate renditions inline. ``manage.py warm_renditions`` runs
+outside the web server and uses every CPU by default.
+"""
+import logging
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Pool processes per web server process
+DEFAULT_RENDITION_WORKERS = 1
+
+_pool = None
+
+
+def merge_jobs(jobs):
+    """Merge ``(image_id, filter_specs)`` pairs into one entry per image"""
+    merged = defaultdict(set)
+    for image_id, filter_specs in jobs:
+        if image_id:
+            merged[image_id].update(filter_specs)
+    return {image_id: sorted(filter_specs) for image_id, filter_specs in merged.items()}
+
+
+def generate_renditions(image_id, filter_specs):
+    """
+    Generate any missing renditions of one image.
+    Returns the number of renditions that had to be created.
+    """
+    from wagtail.images.models import Filter, Image
+
+    try:
+        image = Image.objects.get(pk=image_id)
+    except Image.DoesNotExist:
+        return 0
+
+    existing = image.find_existing_renditions(*[Filter(spec=spec) for spec in filter_specs])
+    image.get_renditions(*filter_specs)
+    return len(filter_specs) - len(existing)
+
+
+def init_worker():
+    """Set up Django in a freshly spawned worker process"""
+    import django
+
+    django.setup()
+
+
+def get_worker_count():
+    return getattr(settings, 'RENDITION_WORKERS', DEFAULT_RENDITION_WORKERS)
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        # Spawn rather than fork, so workers never inherit the parent's
+        # database connections
+        _pool = ProcessPoolExecutor(
+            max_workers=get_worker_count(),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+        )
+    return _pool
+
+
+def _submit(jobs):
+    for image_id, filter_specs in jobs.items():
+        if get_worker_count():
+            future = get_pool().submit(generate_renditions, image_id, filter_specs)
+            future.add_done_callback(_log_failure)
+        else:
+            generate_renditions(image_id, filter_specs)
+
+
+def _log_failure(future):
+    if future.exception() is not None:
+        logger.error("Rendition generation failed", exc_info=future.exception())
+
+
+def enqueue_renditions(page):
+    """
+    Queue the renditions used by ``page`` for generation once the current
+    transaction commits
+    """
+    jobs = merge_jobs(page.get_rendition_jobs())
+    if jobs:
+        transaction.on_commit(lambda: _submit(jobs))
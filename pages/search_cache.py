@@ -0,0 +1,115 @@
+"""
+Search result-id cache.
+
+Searching runs the search backend once per query, scope and filter set and
+caches the ranked list of matching page ids. Every page of those results
+(numbered or cursor paginated) is then sliced from the cached list and
+only that slice is loaded from the database.
+
+Scopes are 'site' for the site search and 'page:<id>' for searches of one
+index page's children (gallery index, press gallery category). A scope's
+entries are dropped when a page in it is published, unpublished, moved or
+deleted (see pages.signals).
+"""
+import hashlib
+import json
+import uuid
+
+from django.core.cache import cache
+
+# Longest ranked list kept per search; later hits are fetched from the
+# search backend a page at a time
+SEARCH_CACHE_MAX_RESULTS = 1000
+
+SEARCH_CACHE_TIMEOUT = 60 * 60
+
+
+def normalize_query(query):
+    return ' '.join(query.lower().split())
+
+
+def scope_version_key(scope):
+    return f'search-ids:version:{scope}'
+
+
+def search_cache_key(query, scope, filters):
+    version = cache.get_or_set(scope_version_key(scope), uuid.uuid4().hex, None)
+    data = json.dumps([normalize_query(query), filters], sort_keys=True, default=str)
+    digest = hashlib.md5(data.encode(), usedforsecurity=False).hexdigest()
+    return f'search-ids:{scope}:{version}:{digest}'
+
+
+def invalidate_search_scopes(*scopes):
+    cache.delete_many([scope_version_key(scope) for scope in scopes])
+
+
+class RankedResults:
+    """
+    Search results backed by a cached list of page ids in rank order.
+    Slicing loads just the pages in the slice, in one query. Slices past
+    the cached ids come from ``search()``, the live search results, so
+    every page of a long result set is reachable.
+    """
+
+    def __init__(self, queryset, ids, total=None, search=None):
+        self.queryset = queryset
+        self.ids = ids
+        self.total = len(ids) if total is None else total
+        self.search = search
+
+    def count(self):
+        return self.total
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, _ = index.indices(self.total)
+            if stop > len(self.ids) and self.search is not None:
+                ids = [page.pk for page in self.search()[start:stop]]
+            else:
+                ids = self.ids[start:stop]
+            pages = self.queryset.in_bulk(ids)
+            # Pages unpublished since the search ran are skipped
+            return [pages[pk] for pk in ids if pk in pages]
+        return self[index:index + 1][0]
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+def search_hits(queryset, query, scope, filters=None, describe=None):
+    """
+    ``(hits, total)`` of searching ``queryset`` for ``query``, reusing those
+    of an earlier identical search in ``scope``. ``filters`` must describe
+    everything applied to ``queryset`` that changes which pages match; the
+    backend applies them in the same query as the full-text match.
+    Hits are the first ``SEARCH_CACHE_MAX_RESULTS`` page ids, or whatever
+    ``describe`` turns them into (e.g. ids with the facets they count
+    towards), cached along with them.
+    """
+    key = search_cache_key(query, scope, filters or {})
+    entry = cache.get(key)
+    if entry is None:
+        results = queryset.search(query)
+        hits = [page.pk for page in results[:SEARCH_CACHE_MAX_RESULTS]]
+        total = results.count() if len(hits) == SEARCH_CACHE_MAX_RESULTS else len(hits)
+        if describe is not None:
+            hits = describe(hits)
+        entry = (hits, total)
+        cache.set(key, entry, SEARCH_CACHE_TIMEOUT)
+    return entry
+
+
+def cached_search(queryset, query, scope, filters=None, load_queryset=None):
+    """
+    Search ``queryset`` for ``query`` through ``search_hits``. Pages are
+    loaded from ``load_queryset`` (e.g. one with annotations for the
+    listing cards), defaulting to ``queryset``.
+    """
+    ids, total = search_hits(queryset, query, scope, filters)
+    return RankedResults(
+        queryset if load_queryset is None else load_queryset, ids, total,
+        search=lambda: queryset.search(query),
+    )
@@ -0,0 +1,230 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from wagtail.models import Page, PageViewRestriction, Site
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from search.autocomplete import invalidate_autocomplete, record_change as record_autocomplete_change
+
+from .models import (
+    AboutPage,
+    ArticlePage,
+    EditorialPage,
+    EventPage,
+    GalleryAlbumPage,
+    HistoricalEventPage,
+    InterviewPage,
+    NewsPage,
+    PressAlbumPage,
+    PressGalleryCategoryPage,
+    PressItem,
+    PressReleasePage,
+)
+from .page_cache import purge_pages, purge_site, purge_site_chrome
+from .pagination import invalidate_listing_counts
+from .renditions import enqueue_renditions
+from .search_cache import invalidate_search_scopes
+
+# Page types listed (and counted) by their parent index page
+LISTING_PAGE_TYPES = (
+    PressReleasePage,
+    NewsPage,
+    InterviewPage,
+    EditorialPage,
+    EventPage,
+    HistoricalEventPage,
+    GalleryAlbumPage,
+    ArticlePage,
+    PressAlbumPage,
+)
+
+
+def refresh_category_stats(*parent_ids):
+    """Refresh the cached album stats of the given press gallery categories"""
+    categories = PressGalleryCategoryPage.objects.filter(pk__in=[pk for pk in parent_ids if pk])
+    PressGalleryCategoryPage.refresh_album_stats(categories)
+
+
+@receiver(page_published, sender=PressAlbumPage)
+@receiver(page_unpublished, sender=PressAlbumPage)
+def press_album_published(sender, instance, **kwargs):
+    refresh_category_stats(instance.get_parent().pk)
+
+
+@receiver(post_page_move, sender=PressAlbumPage)
+def press_album_moved(sender, instance, parent_page_before, parent_page_after, **kwargs):
+    refresh_category_stats(parent_page_before.pk, parent_page_after.pk)
+
+
+@receiver(post_delete, sender=PressAlbumPage)
+def press_album_deleted(sender, instance, **kwargs):
+    # The category itself may be going away in the same delete
+    parent_path = instance.path[:-PressAlbumPage.steplen]
+    transaction.on_commit(lambda: PressGalleryCategoryPage.refresh_album_stats(
+        PressGalleryCategoryPage.objects.filter(path=parent_path)
+    ))
+
+
+@receiver(page_published, sender=GalleryAlbumPage)
+@receiver(page_published, sender=PressAlbumPage)
+@receiver(page_published, sender=HistoricalEventPage)
+@receiver(page_published, sender=ArticlePage)
+def pregenerate_renditions(sender, instance, **kwargs):
+    enqueue_renditions(instance)
+
+
+@receiver(page_published, sender=PressReleasePage)
+@receiver(page_published, sender=NewsPage)
+@receiver(page_published, sender=InterviewPage)
+@receiver(page_published, sender=EditorialPage)
+@receiver(page_unpublished, sender=PressReleasePage)
+@receiver(page_unpublished, sender=NewsPage)
+@receiver(page_unpublished, sender=InterviewPage)
+@receiver(page_unpublished, sender=EditorialPage)
+@receiver(post_page_move, sender=PressReleasePage)
+@receiver(post_page_move, sender=NewsPage)
+@receiver(post_page_move, sender=InterviewPage)
+@receiver(post_page_move, sender=EditorialPage)
+def sync_press_item(sender, instance, **kwargs):
+    PressItem.sync(instance)
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def listing_page_published(sender, instance, **kwargs):
+    if issubclass(sender, LISTING_PAGE_TYPES):
+        invalidate_listing_counts(instance.get_parent().pk)
+
+
+@receiver(post_page_move)
+def listing_page_moved(sender, instance, parent_page_before, parent_page_after, **kwargs):
+    if issubclass(sender, LISTING_PAGE_TYPES):
+        invalidate_listing_counts(parent_page_before.pk, parent_page_after.pk)
+
+
+@receiver(post_delete)
+def listing_page_deleted(sender, instance, **kwargs):
+    if issubclass(sender, LISTING_PAGE_TYPES):
+        parent_path = instance.path[:-sender.steplen]
+        invalidate_listing_counts(*Page.objects.filter(path=parent_path).values_list('pk', flat=True))
+
+
+def ancestor_ids(*paths):
+    """Ids of the pages at ``paths`` and all their ancestors"""
+    ancestor_paths = {
+        path[:end] for path in paths for end in range(Page.steplen, len(path) + 1, Page.steplen)
+    }
+    return list(Page.objects.filter(path__in=ancestor_paths).values_list('pk', flat=True))
+
+
+def affects_menus(page):
+    """Whether a change to ``page`` can change the site chrome"""
+    return page.show_in_menus or page.depth <= 3  # Site root pages and their children
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def purge_published_page(sender, instance, **kwargs):
+    purge_pages(instance.pk, *ancestor_ids(instance.path))
+    if affects_menus(instance):
+        purge_site_chrome()
+
+
+@receiver(post_page_move)
+def purge_moved_page(sender, instance, parent_page_before, parent_page_after, **kwargs):
+    # Every page under the moved one now lives at a different URL
+    descendant_ids = Page.objects.descendant_of(instance, inclusive=True).values_list('pk', flat=True)
+    purge_pages(*descendant_ids, *ancestor_ids(parent_page_before.path, parent_page_after.path))
+    if affects_menus(instance) or parent_page_before.depth < 3:
+        purge_site_chrome()
+
+
+@receiver(post_delete, sender=Page)
+def purge_deleted_page(sender, instance, **kwargs):
+    purge_pages(instance.pk, *ancestor_ids(instance.path[:-Page.steplen]))
+    if affects_menus(instance):
+        purge_site_chrome()
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def purge_site_chrome_on_site_change(sender, **kwargs):
+    purge_site_chrome()
+
+
+@receiver(post_save, sender=PageViewRestriction)
+@receiver(post_delete, sender=PageViewRestriction)
+def purge_all_pages(sender, **kwargs):
+    purge_site()
+
+
+@receiver(page_published, sender=HistoricalEventPage)
+@receiver(page_unpublished, sender=HistoricalEventPage)
+def historical_event_published(sender, instance, **kwargs):
+    cache.delete(AboutPage.timeline_cache_key(instance.get_parent().pk))
+
+
+@receiver(post_page_move, sender=HistoricalEventPage)
+def historical_event_moved(sender, instance, parent_page_before, parent_page_after, **kwargs):
+    cache.delete_many([
+        AboutPage.timeline_cache_key(parent_page_before.pk),
+        AboutPage.timeline_cache_key(parent_page_after.pk),
+    ])
+
+
+@receiver(post_delete, sender=HistoricalEventPage)
+def historical_event_deleted(sender, instance, **kwargs):
+    parent_path = instance.path[:-HistoricalEventPage.steplen]
+    for about_page_id in Page.objects.filter(path=parent_path).values_list('pk', flat=True):
+        cache.delete(AboutPage.timeline_cache_key(about_page_id))
+
+
+def invalidate_searches(*parent_ids):
+    # After the commit, once the search index has been updated too
+    scopes = ['site', *(f'page:{parent_id}' for parent_id in parent_ids)]
+    transaction.on_commit(lambda: invalidate_search_scopes(*scopes))
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def search_page_published(sender, instance, **kwargs):
+    invalidate_searches(instance.get_parent().pk)
+
+
+@receiver(post_page_move)
+def search_page_moved(sender, instance, parent_page_before, parent_page_after, **kwargs):
+    invalidate_searches(parent_page_before.pk, parent_page_after.pk)
+
+
+@receiver(post_delete, sender=Page)
+def search_page_deleted(sender, instance, **kwargs):
+    parent_path = instance.path[:-Page.steplen]
+    invalidate_searches(*Page.objects.filter(path=parent_path).values_list('pk', flat=True))
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def autocomplete_page_published(sender, instance, **kwargs):
+    transaction.on_commit(lambda: record_autocomplete_change(instance.pk))
+
+
+@receiver(post_page_move)
+def autocomplete_page_moved(sender, instance, parent_page_before, parent_page_after, **kwargs):
+    # Every page under the moved one now has a different URL
+    page_ids = list(Page.objects.descendant_of(instance, inclusive=True).values_list('pk', flat=True))
+    transaction.on_commit(lambda: record_autocomplete_change(*page_ids))
+
+
+@receiver(post_delete, sender=Page)
+def autocomplete_page_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: record_autocomplete_change(instance.pk))
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+@receiver(post_save, sender=PageViewRestriction)
+@receiver(post_delete, sender=PageViewRestriction)
+def rebuild_autocomplete(sender, **kwargs):
+    transaction.on_commit(invalidate_autocomplete)
@@ -0,0 +1,153 @@
+"""
+Production static files.
+
+``CompressedManifestStaticFilesStorage`` extends Django's manifest storage
+so that ``collectstatic``:
+
+- minifies the site's own CSS and JavaScript (files from STATICFILES_DIRS;
+  third-party app files ship minified already) before they are hashed,
+- writes the hashed names Django's ``{% static %}`` tag links to,
+- precompresses every text asset next to it as ``.gz`` and ``.br``
+  (``brotli`` is in requirements.txt; without it only ``.gz`` is written).
+
+``serve_static`` (see pages.views) then serves STATIC_ROOT through
+pages.file_serving, picking the precompressed variant per request, and
+marks hashed names as immutable for a year.
+"""
+import gzip
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # Development installs without it: .gz only
+    brotli = None
+
+# Extensions worth compressing; images and fonts are compressed already
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.xml', '.html', '.ico', '.ttf', '.otf', '.eot'}
+
+# Smaller files gain nothing once headers are counted
+MIN_COMPRESS_SIZE = 256
+
+# Django's manifest storage inserts the first 12 hex digits of the MD5
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+CSS_SKIP_RE = re.compile(r'''("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')|(/\*!.*?\*/)|/\*.*?\*/''', re.S)
+
+
+def minify_css(css):
+    """
+    Drop comments (except ``/*! ... */`` notices) and the whitespace that
+    doesn't separate tokens. Strings are left as they are.
+    """
+    def squeeze(code):
+        code = re.sub(r'\s+', ' ', code)
+        code = re.sub(r'\s*([{};,>])\s*', r'\1', code)
+        code = re.sub(r':\s+', ':', code)
+        return code.replace(';}', '}')
+
+    parts = []
+    code = ''
+    position = 0
+    for match in CSS_SKIP_RE.finditer(css):
+        code += css[position:match.start()]
+        position = match.end()
+        kept = match.group(1) or match.group(2)
+        if kept:
+            parts += [squeeze(code), kept]
+            code = ''
+        else:
+            code += ' '  # A comment still separates tokens
+    parts.append(squeeze(code + css[position:]))
+    return ''.join(parts).strip()
+
+
+def minify_js(js):
+    """
+    Drop indentation, blank lines and whole-line ``//`` comments, keeping
+    the line breaks that automatic semicolon insertion relies on. Lines in
+    template literals are kept as they are.
+    """
+    lines = []
+    in_template = False
+    for line in js.splitlines():
+        if in_template:
+            lines.append(line)
+        else:
+            stripped = line.strip()
+            if stripped and not stripped.startswith('//'):
+                lines.append(stripped)
+        if len(re.findall(r'(?<!\\)`', line)) % 2:
+            in_template = not in_template
+    return '\n'.join(lines) + '\n'
+
+
+MINIFIERS = {
+    '.css': minify_css,
+    '.js': minify_js,
+}
+
+
+def compress(path):
+    """Write ``.gz`` (and ``.br``) variants of the file at ``path`` where they are smaller"""
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return
+
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data) * 0.95:
+            with open(path + suffix, 'wb') as file:
+                file.write(compressed)
+
+
+def is_hashed_name(name):
+    return bool(HASHED_NAME_RE.search(name))
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that minifies and precompresses, see the module docstring"""
+
+    def is_own_file(self, storage):
+        location = os.path.realpath(getattr(storage, 'location', ''))
+        return any(
+            location == os.path.realpath(root[1] if isinstance(root, (list, tuple)) else root)
+            for root in settings.STATICFILES_DIRS
+        )
+
+    def minify(self, paths):
+        """Minify the collected copies of the site's assets, and hash those"""
+        for name, (storage, path) in list(paths.items()):
+            root, extension = os.path.splitext(name)
+            minifier = MINIFIERS.get(extension)
+            if minifier is None or root.endswith('.min') or not self.is_own_file(storage):
+                continue
+            with storage.open(path) as file:
+                minified = minifier(file.read().decode('utf-8'))
+            self.delete(name)
+            self._save(name, ContentFile(minified.encode('utf-8')))
+            paths[name] = (self, name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+
+        self.minify(paths)
+
+        written = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if isinstance(hashed_name, str):
+                written.update((name, hashed_name))
+            yield name, hashed_name, processed
+
+        for name in written:
+            if os.path.splitext(name)[1] in COMPRESSIBLE_EXTENSIONS:
+                compress(self.path(name))
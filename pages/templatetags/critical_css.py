@@ -0,0 +1,33 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.safestring import mark_safe
+
+from pages.critical_css import get_critical_css, stylesheet_link
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def critical_css(context):
+    """
+    The critical CSS of the page template being rendered, for inlining in a
+    <style> element; '' for templates without any (see pages.critical_css).
+
+    Usage: {% critical_css as critical %}{% if critical %}<style>{{ critical }}</style>{% endif %}
+    """
+    template = getattr(context, 'template', None)
+    if template is None or not template.name:
+        return ''
+    # Nothing in a stylesheet may close the <style> element
+    return mark_safe(get_critical_css(template.name).replace('</', '<\\/'))
+
+
+@register.simple_tag
+def stylesheet(path, deferred=False):
+    """
+    Link a static stylesheet, loading it without blocking rendering when
+    ``deferred`` (i.e. the page has its critical CSS inlined).
+
+    Usage: {% stylesheet 'css/style.css' deferred=critical %}
+    """
+    return stylesheet_link(static(path), deferred)
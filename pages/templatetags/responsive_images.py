@@ -0,0 +1,47 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from pages.images import get_responsive_image
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(image, spec, sizes="100vw", deferred=False, **attrs):
+    """
+    Render ``image`` as a <picture> offering width and format variants of
+    ``spec``, with explicit dimensions and lazy, async loading.
+
+    Usage: {% responsive_image page.event_image "fill-1200x600" sizes="(max-width: 768px) 100vw, 800px" class="img-fluid" alt=page.event_title %}
+
+    Extra keyword arguments become <img> attributes, with underscores
+    turned into hyphens (``data_role`` -> ``data-role``). With ``deferred=True``
+    the sources are rendered as data-src/data-srcset, for scripts to swap in
+    when the image is about to show.
+    """
+    if not image:
+        return ""
+
+    data = get_responsive_image(image, spec)
+    prefix = "data-" if deferred else ""
+
+    sources = format_html_join(
+        "",
+        '<source type="{}" {}srcset="{}" sizes="{}">',
+        ((source["type"], prefix, source["srcset"], sizes) for source in data["sources"]),
+    )
+
+    img_attrs = {
+        f"{prefix}src": data["src"],
+        f"{prefix}srcset": data["srcset"],
+        "sizes": sizes,
+        "width": data["width"],
+        "height": data["height"],
+        "alt": image.title,
+        "loading": "lazy",
+        "decoding": "async",
+    }
+    img_attrs.update({name.replace("_", "-"): value for name, value in attrs.items()})
+
+    return format_html("<picture>{}<img{}></picture>", sources, flatatt(img_attrs))
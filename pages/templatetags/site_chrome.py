@@ -0,0 +1,52 @@
+from django import template
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+from pages.page_cache import CHROME_CACHE_TIMEOUT, chrome_fragment_key
+
+register = template.Library()
+
+# Sections includes/navigation.html highlights, by first path segment. They
+# key the cached navigation, so any other path shares the '' fragment.
+NAV_SECTIONS = {
+    '': 'home',
+    'biography': 'biography',
+    'gallery': 'gallery',
+    'member-search': 'member-search',
+    'office-bearers': 'office-bearers',
+}
+
+
+def get_section(path):
+    """The navigation section of a URL path: 'home' for /, 'gallery' for /gallery/..., else ''"""
+    return NAV_SECTIONS.get(path.strip('/').split('/')[0], '')
+
+
+@register.simple_tag(takes_context=True)
+def cached_include(context, template_name, per_section=False):
+    """
+    Include a piece of site chrome, rendered once per site (and per active
+    section with ``per_section=True``) and then served from the cache.
+    The included template gets ``active_section`` in its context.
+
+    Usage: {% cached_include 'includes/navigation.html' per_section=True %}
+
+    The fragments are invalidated when the site or a menu-affecting page
+    changes (see pages.signals).
+    """
+    request = context.get('request')
+    section = get_section(request.path) if request is not None else ''
+
+    key = None
+    if request is not None:
+        key = chrome_fragment_key(request, template_name, section if per_section else '*')
+        html = cache.get(key)
+        if html is not None:
+            return mark_safe(html)
+
+    with context.push(active_section=section):
+        html = context.template.engine.get_template(template_name).render(context)
+    if key:
+        cache.set(key, html, CHROME_CACHE_TIMEOUT)
+
+    return mark_safe(html)
@@ -0,0 +1,51 @@
+from functools import cache
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from pages.critical_css import stylesheet_link
+from pages.vendor_assets import BOOTSTRAP_CSS, BOOTSTRAP_JS, BOOTSTRAP_URL, FONTAWESOME_CSS, FONTAWESOME_URL
+
+register = template.Library()
+
+
+@cache
+def vendor_assets_built():
+    """Whether build_vendor_assets has written the bundle (checked once per process)"""
+    return all(finders.find(name) for name in (BOOTSTRAP_CSS, BOOTSTRAP_JS, FONTAWESOME_CSS))
+
+
+@register.simple_tag
+def vendor_stylesheets(deferred=False):
+    """
+    Bootstrap and Font Awesome stylesheets: the purged, self-hosted bundle
+    once build_vendor_assets has been run, the full CDN copies until then.
+    With ``deferred``, the bundle loads without blocking rendering; the CDN
+    copies never do, as the critical CSS only covers the bundle.
+
+    Usage: {% vendor_stylesheets deferred=critical %}
+    """
+    if vendor_assets_built():
+        urls = [static(BOOTSTRAP_CSS), static(FONTAWESOME_CSS)]
+    else:
+        urls = [f'{BOOTSTRAP_URL}/css/bootstrap.min.css', f'{FONTAWESOME_URL}/css/all.min.css']
+        deferred = False
+    return format_html(
+        '{}\n    {}', *(stylesheet_link(url, deferred) for url in urls)
+    )
+
+
+@register.simple_tag
+def vendor_scripts():
+    """
+    Bootstrap's JavaScript bundle, self-hosted once built.
+
+    Usage: {% vendor_scripts %}
+    """
+    if vendor_assets_built():
+        url = static(BOOTSTRAP_JS)
+    else:
+        url = f'{BOOTSTRAP_URL}/js/bootstrap.bundle.min.js'
+    return format_html('<script src="{}"></script>', url)
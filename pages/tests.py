@@ -1,3 +1,998 @@
-from django.test import TestCase
+import datetime
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from wagtail.documents.models import Document
+from wagtail.images.models import Image
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Page, Site
+from wagtail.test.utils import WagtailPageTestCase
+
+from pages.album_zip import album_files
+from pages.critical_css import compute_critical_css, stale_templates
+from pages.images import get_responsive_image, responsive_filter_specs, responsive_sizes
+from pages.models import (
+    ALBUM_PHOTOS_PER_PAGE,
+    AboutPage,
+    EventIndexPage,
+    GalleryAlbumPage,
+    GalleryImage,
+    GalleryIndexPage,
+    HistoricalEventPage,
+    NewsPage,
+    PressAlbumPage,
+    PressGalleryCategoryPage,
+    PressGalleryCategoryStats,
+    PressGalleryIndexPage,
+    PressImage,
+    PressIndexPage,
+    PressItem,
+    PressReleasePage,
+)
+from pages.pagination import encode_cursor, paginate_listing
+from pages.templatetags.vendor_assets import vendor_assets_built, vendor_stylesheets
+from pages.vendor_assets import purge_css, purge_fontawesome
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class PagesTestCase(WagtailPageTestCase):
+    """
+    Base test case providing a site root and helpers for building albums.
+    Uploaded images and renditions go to a throwaway MEDIA_ROOT, and the
+    page cache is off unless a test turns it on.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()  # renditions are cached by image id across tests
+        self.root_page = Page.get_first_root_node()
+        Site.objects.create(hostname="testsite", root_page=self.root_page, is_default_site=True)
+
+    def make_image(self, title="photo"):
+        return Image.objects.create(title=title, file=get_test_image_file())
+
+    def add_gallery(self, parent=None, **fields):
+        gallery = GalleryIndexPage(title="Gallery", slug="gallery", **fields)
+        (parent or self.root_page).add_child(instance=gallery)
+        return gallery
+
+    def add_press_index(self, parent=None, **fields):
+        press = PressIndexPage(title="Press", slug="press", **fields)
+        (parent or self.root_page).add_child(instance=press)
+        return press
+
+    def add_album(self, gallery, title="Album", album_date=datetime.date(2024, 1, 1), images=(), publish=False,
+                  **fields):
+        """
+        Add an album of ``images`` to ``gallery``. With ``publish`` it is
+        saved as a draft and published from a revision, as in the admin, and
+        the stored page is returned. On-commit work (search index updates)
+        runs straight away.
+        """
+        fields.setdefault('live', not publish)
+        album = GalleryAlbumPage(title=title, album_title=title, album_date=album_date, **fields)
+        for index, image in enumerate(images):
+            album.gallery_images.add(GalleryImage(image=image, sort_order=index))
+        with self.captureOnCommitCallbacks(execute=True):
+            gallery.add_child(instance=album)
+            if publish:
+                album.save_revision().publish()
+        return GalleryAlbumPage.objects.get(pk=album.pk) if publish else album
+
+    def add_release(self, press, title, press_date=datetime.date(2024, 1, 1), content="<p>Nothing to see</p>",
+                    publish=False, **fields):
+        """Add a press release to ``press``, like ``add_album``"""
+        fields.setdefault('live', not publish)
+        fields.setdefault('short_title', title)
+        release = PressReleasePage(title=title, press_date=press_date, content=content, **fields)
+        with self.captureOnCommitCallbacks(execute=True):
+            press.add_child(instance=release)
+            if publish:
+                release.save_revision().publish()
+        return PressReleasePage.objects.get(pk=release.pk) if publish else release
+
+    def count_queries(self, url, secure=False, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params, secure=secure)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+
+class GalleryIndexPageTests(PagesTestCase):
+    """
+    Tests for the gallery album listing.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.gallery = self.add_gallery()
+        self.image = self.make_image()
+
+    def add_photo_album(self, photos=2, cover=None):
+        return self.add_album(self.gallery, images=[self.image] * photos, cover_image=cover)
+
+    def test_card_data_annotations(self):
+        cover = self.make_image("cover")
+        self.add_photo_album(photos=3)
+        self.add_photo_album(photos=1, cover=cover)
+        self.add_photo_album(photos=0)
+
+        albums = GalleryAlbumPage.with_card_data(GalleryAlbumPage.objects.all()).order_by('pk')
+        self.assertEqual(
+            [(album.card_photo_count, album.card_cover_image_id) for album in albums],
+            [(3, self.image.pk), (1, cover.pk), (0, None)],
+        )
+
+    def test_listing_query_count_is_flat(self):
+        self.add_photo_album()
+        self.count_queries(self.gallery.url)  # generate the shared rendition
+        baseline = self.count_queries(self.gallery.url)
+
+        for photos in range(1, 6):
+            self.add_photo_album(photos=photos)
+        self.assertEqual(self.count_queries(self.gallery.url), baseline)
+
+
+class GalleryAlbumPageTests(PagesTestCase):
+    """
+    Tests for the album detail page.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.gallery = self.add_gallery()
+        self.album = self.add_album(self.gallery)
+
+    def add_photos(self, count, image=None):
+        for _ in range(count):
+            GalleryImage.objects.create(page=self.album, image=image or self.make_image())
+
+    def test_photos_render_responsive_pictures(self):
+        self.add_photos(2)
+        response = self.client.get(self.album.url)
+        self.assertEqual(response.context['photo_count'], 2)
+        for photo in response.context['photos']:
+            thumbnail = get_responsive_image(photo.image, 'fill-600x400')
+            full_size = get_responsive_image(photo.image, 'fill-1600x1200')
+            self.assertContains(response, f'srcset="{thumbnail["srcset"]}"')
+            self.assertContains(response, f'type="image/webp" srcset="{thumbnail["sources"][0]["srcset"]}"')
+            # Carousel slides only carry their sources until shown
+            self.assertContains(response, f'data-src="{full_size["src"]}"')
+            self.assertNotContains(response, f' src="{full_size["src"]}"')
+
+    def test_photos_route_paginates(self):
+        self.add_photos(ALBUM_PHOTOS_PER_PAGE + 2, image=self.make_image())
+
+        response = self.client.get(self.album.url)
+        self.assertEqual(len(response.context['photos']), ALBUM_PHOTOS_PER_PAGE)
+        self.assertContains(response, 'data-next-page="2"')
+
+        data = self.client.get(self.album.url + 'photos/', {'page': 2}).json()
+        self.assertEqual(data['count'], ALBUM_PHOTOS_PER_PAGE + 2)
+        self.assertIsNone(data['next_page'])
+        self.assertEqual([photo['index'] for photo in data['photos']], [ALBUM_PHOTOS_PER_PAGE, ALBUM_PHOTOS_PER_PAGE + 1])
+        self.assertTrue(data['photos'][0]['full_size']['srcset'])
+
+    def test_detail_query_count_is_flat(self):
+        self.add_photos(1)
+        self.count_queries(self.album.url)  # generate renditions
+        baseline = self.count_queries(self.album.url)
+
+        self.add_photos(5)
+        self.count_queries(self.album.url)
+        self.assertEqual(self.count_queries(self.album.url), baseline)
+
+    def download(self, **headers):
+        response = self.client.get(self.album.url + 'download/', headers=headers)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, content
+
+    def test_download_streams_zip_of_originals(self):
+        self.add_photos(3)
+        response, content = self.download()
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertEqual(int(response['Content-Length']), len(content))
+        self.assertIn("filename*=UTF-8''album.zip", response['Content-Disposition'])
+
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertIsNone(archive.testzip())
+            photos = self.album.gallery_images.order_by('sort_order', 'pk')
+            self.assertEqual(archive.namelist(), [name for name, _ in album_files(photos)])
+            with photos[0].image.file.open() as original:
+                self.assertEqual(archive.read(archive.namelist()[0]), original.read())
+
+        self.assertEqual(self.download(if_none_match=response['ETag'])[0].status_code, 304)
+
+    def test_download_resumes_with_range(self):
+        self.add_photos(2)
+        response, content = self.download()
+
+        partial, rest = self.download(range='bytes=100-', if_range=response['ETag'])
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(rest, content[100:])
+        self.assertEqual(partial['Content-Range'], f'bytes 100-{len(content) - 1}/{len(content)}')
+
+        # A changed album is sent whole
+        self.add_photos(1)
+        self.assertEqual(self.download(range='bytes=100-', if_range=response['ETag'])[0].status_code, 200)
+
+    def test_download_writes_zip64_records_past_the_limit(self):
+        self.add_photos(2)
+        with mock.patch('pages.album_zip.ZIP64_LIMIT', 100):
+            response, content = self.download()
+        self.assertEqual(int(response['Content-Length']), len(content))
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(len(archive.namelist()), 2)
+
+    def test_download_reads_through_remote_storage(self):
+        storages = {**settings.STORAGES, 'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'}}
+        with override_settings(STORAGES=storages):
+            self.add_photos(2)
+            response, content = self.download()
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(len(archive.namelist()), 2)
+
+
+@override_settings(RENDITION_WORKERS=0)
+class RenditionWarmingTests(PagesTestCase):
+    """
+    Tests for publish-time and site-wide rendition generation.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.gallery = self.add_gallery()
+        self.image = self.make_image()
+
+    def rendition_specs(self):
+        return set(self.image.renditions.values_list('filter_spec', flat=True))
+
+    def expected_specs(self):
+        return set(responsive_filter_specs('fill-600x400', 'fill-1600x1200'))
+
+    def test_publish_generates_renditions(self):
+        album = self.add_album(self.gallery, images=[self.image], live=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            album.save_revision().publish()
+        self.assertEqual(self.rendition_specs(), self.expected_specs())
+
+    def test_warm_renditions_command(self):
+        self.add_album(self.gallery, images=[self.image])
+
+        out = io.StringIO()
+        call_command('warm_renditions', workers=0, stdout=out)
+        self.assertEqual(self.rendition_specs(), self.expected_specs())
+        self.assertIn(f"{len(self.expected_specs())} renditions created for 1 images", out.getvalue())
+
+
+class ResponsiveImageTests(PagesTestCase):
+    """
+    Tests for the responsive rendition sizes and formats.
+    """
+
+    def test_sizes_scale_around_the_requested_size(self):
+        self.assertEqual(responsive_sizes('fill-600x400'), ['fill-600x400', 'fill-300x200', 'fill-1200x800'])
+        self.assertEqual(responsive_sizes('fill-1600x1200'), ['fill-1600x1200', 'fill-800x600'])
+        self.assertEqual(responsive_sizes('width-400'), ['width-400', 'width-200', 'width-800'])
+        self.assertEqual(responsive_sizes('original'), ['original'])
+
+    @override_settings(RESPONSIVE_IMAGE_FORMATS=['avif', 'webp', 'jpeg'])
+    def test_picture_has_a_source_per_extra_format(self):
+        data = get_responsive_image(self.make_image(), 'fill-40x30')
+        self.assertEqual([source['type'] for source in data['sources']], ['image/avif', 'image/webp'])
+        self.assertEqual((data['width'], data['height']), (40, 30))
+        self.assertTrue(data['src'].endswith('.jpg'))
+
+
+class PressGalleryIndexPageTests(PagesTestCase):
+    """
+    Tests for the cached press gallery category stats.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.press_gallery = PressGalleryIndexPage(title="Press Gallery", slug="press-gallery")
+        self.root_page.add_child(instance=self.press_gallery)
+        self.image = self.make_image()
+
+    def add_category(self, name="Rallies"):
+        category = PressGalleryCategoryPage(title=name, category_name=name)
+        self.press_gallery.add_child(instance=category)
+        return category
+
+    def publish_album(self, category, date=datetime.date(2024, 1, 1)):
+        album = PressAlbumPage(title="Album", album_title="Album", album_date=date, live=False)
+        album.press_images.add(PressImage(image=self.image))
+        category.add_child(instance=album)
+        album.save_revision().publish()
+        return PressAlbumPage.objects.get(pk=album.pk)
+
+    def test_stats_follow_publish_and_unpublish(self):
+        category = self.add_category()
+        self.publish_album(category, datetime.date(2023, 5, 1))
+        latest = self.publish_album(category, datetime.date(2024, 2, 1))
+
+        stats = category.album_stats
+        stats.refresh_from_db()
+        self.assertEqual(stats.album_count, 2)
+        self.assertEqual(stats.latest_album_date, datetime.date(2024, 2, 1))
+        self.assertEqual(stats.cover_image, self.image)
+
+        latest.unpublish()
+        stats.refresh_from_db()
+        self.assertEqual(stats.album_count, 1)
+        self.assertEqual(stats.latest_album_date, datetime.date(2023, 5, 1))
+
+    def test_stats_follow_move(self):
+        source = self.add_category("Source")
+        target = self.add_category("Target")
+        album = self.publish_album(source)
+
+        album.move(target, pos="last-child")
+        self.assertEqual(PressGalleryCategoryPage.objects.get(pk=source.pk).get_album_count(), 0)
+        self.assertEqual(PressGalleryCategoryPage.objects.get(pk=target.pk).get_album_count(), 1)
+
+    def test_category_without_albums_renders_without_stats(self):
+        category = self.add_category()
+        response = self.client.get(self.press_gallery.url)
+        self.assertContains(response, '0 albums')
+        self.assertFalse(PressGalleryCategoryStats.objects.filter(category=category).exists())
+
+    def test_listing_query_count_is_flat(self):
+        self.publish_album(self.add_category())
+        self.count_queries(self.press_gallery.url)  # generate renditions
+        baseline = self.count_queries(self.press_gallery.url)
+
+        for index in range(5):
+            self.publish_album(self.add_category(f"Category {index}"))
+        self.assertEqual(self.count_queries(self.press_gallery.url), baseline)
+
+
+class PressIndexPageTests(PagesTestCase):
+    """
+    Tests for the press index and its denormalised item listing.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.press = self.add_press_index(page_title="Press")
+
+    def publish(self, page_class, title, date):
+        page = page_class(title=title, short_title=title, press_date=date, content="<p>Body</p>", live=False)
+        self.press.add_child(instance=page)
+        page.save_revision().publish()
+        return page_class.objects.get(pk=page.pk)
+
+    def listed_titles(self, **params):
+        response = self.client.get(self.press.url, params)
+        return [item.short_title for item in response.context['press_items']]
+
+    def test_items_follow_publish_and_unpublish(self):
+        release = self.publish(PressReleasePage, "Release", datetime.date(2024, 1, 1))
+        self.publish(NewsPage, "News", datetime.date(2024, 3, 1))
+        self.assertEqual(PressItem.objects.get(page=release).item_type, 'press-releases')
+
+        self.assertEqual(self.listed_titles(tab='all'), ["News", "Release"])
+        self.assertEqual(self.listed_titles(), ["Release"])
+        self.assertEqual(self.listed_titles(tab='news'), ["News"])
+
+        release.unpublish()
+        self.assertEqual(self.listed_titles(tab='all'), ["News"])
+
+    def test_listing_is_a_single_query(self):
+        self.publish(NewsPage, "News", datetime.date(2024, 3, 1))
+        baseline = self.count_queries(self.press.url, tab='all')
+
+        for day in range(1, 6):
+            self.publish(PressReleasePage, f"Release {day}", datetime.date(2024, 1, day))
+        self.assertEqual(self.count_queries(self.press.url, tab='all'), baseline)
+
+
+@override_settings(LISTING_PAGINATION='cursor')
+class CursorPaginationTests(PagesTestCase):
+    """
+    Tests for keyset pagination of the index pages.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.gallery = self.add_gallery()
+
+    def add_albums(self, dates):
+        for date in dates:
+            self.add_album(self.gallery, f"Album {date}", date)
+
+    def walk(self, url):
+        """Follow the cursors through a listing, returning every album title"""
+        titles = []
+        params = {}
+        while True:
+            response = self.client.get(url, params)
+            titles += [album.album_title for album in response.context['albums']]
+            if not response.context['albums'].has_next():
+                self.assertNotContains(response, 'data-load-more>')
+                return titles
+            self.assertContains(response, 'data-load-more')
+            params = {'cursor': response.context['albums'].next_cursor}
+
+    def test_cursor_walks_every_album_once(self):
+        # Ties on album_date fall back to page id
+        dates = [datetime.date(2024, 1, day % 10 + 1) for day in range(30)]
+        self.add_albums(dates)
+
+        titles = self.walk(self.gallery.url)
+        self.assertEqual(len(titles), 30)
+        expected = GalleryAlbumPage.objects.order_by('-album_date', '-pk').values_list('album_title', flat=True)
+        self.assertEqual(titles, list(expected))
+
+    def test_deep_pages_skip_the_count(self):
+        self.add_albums([datetime.date(2024, 1, day) for day in range(1, 30)])
+        first = self.client.get(self.gallery.url).context['albums']
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.gallery.url, {'cursor': first.next_cursor})
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('"__count"', sql)
+
+    def test_invalid_cursor_starts_over(self):
+        self.add_albums([datetime.date(2024, 1, 1)])
+        response = self.client.get(self.gallery.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(len(response.context['albums']), 1)
+
+    def test_forged_cursor_starts_over(self):
+        self.add_albums([datetime.date(2024, 1, 1)])
+        for values in ([None, None], ['2024-13-45', 1], ['2024-01-01', 'x']):
+            response = self.client.get(self.gallery.url, {'cursor': encode_cursor(values)})
+            self.assertEqual(len(response.context['albums']), 1)
+
+
+class ListingCountTests(PagesTestCase):
+    """
+    Tests for the cached listing counts and windowed page links.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.gallery = self.add_gallery()
+
+    def add_albums(self, count):
+        for index in range(count):
+            self.add_album(self.gallery)
+
+    def count_queries_run(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.gallery.url, params)
+        return response, sum('"__count"' in query['sql'] for query in queries)
+
+    def test_count_is_cached_per_filter_set(self):
+        self.add_albums(3)
+        self.assertEqual(self.count_queries_run()[1], 1)
+        self.assertEqual(self.count_queries_run()[1], 0)
+        self.assertEqual(self.count_queries_run(date_from='2024-01-01')[1], 1)
+
+    def test_publish_invalidates_count(self):
+        self.add_albums(13)
+        response, _ = self.count_queries_run()
+        self.assertEqual(response.context['albums'].paginator.count, 13)
+
+        self.add_album(self.gallery, publish=True)
+        response, counted = self.count_queries_run()
+        self.assertEqual(counted, 1)
+        self.assertEqual(response.context['albums'].paginator.count, 14)
+
+    def test_page_range_is_windowed(self):
+        request = RequestFactory().get('/', {'page': 10})
+        page_range = paginate_listing(request, list(range(12 * 20)), 12).page_range
+        self.assertEqual(page_range, [1, '…', 8, 9, 10, 11, 12, '…', 20])
+
+
+class SearchCacheTests(PagesTestCase):
+    """
+    Tests for the cached search result ids.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.gallery = self.add_gallery()
+
+    def searches_run(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        return response, sum('wagtailsearch' in query['sql'] for query in queries)
+
+    def test_later_pages_reuse_ranked_ids(self):
+        for index in range(13):
+            self.add_album(self.gallery, f"Harvest fair {index}")
+
+        response, searched = self.searches_run(self.gallery.url, search='harvest')
+        self.assertGreater(searched, 0)
+        self.assertEqual(len(response.context['albums']), 12)
+
+        response, searched = self.searches_run(self.gallery.url, search='Harvest ', page=2)
+        self.assertEqual(searched, 0)
+        self.assertEqual(len(response.context['albums']), 1)
+
+    def test_publish_invalidates_results(self):
+        self.add_album(self.gallery, "Harvest fair")
+        self.searches_run('/search/', query='harvest')
+
+        album = self.add_album(self.gallery, "Harvest rally", live=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            album.save_revision().publish()
+        response, searched = self.searches_run('/search/', query='harvest')
+        self.assertGreater(searched, 0)
+        self.assertEqual(response.context['search_results'].paginator.count, 2)
+
+    def test_search_with_date_range(self):
+        self.add_album(self.gallery, "Harvest fair", datetime.date(2023, 6, 1))
+        recent = self.add_album(self.gallery, "Harvest rally", datetime.date(2024, 6, 1))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.gallery.url, {'search': 'harvest', 'date_from': '2024-01-01'})
+        self.assertEqual([album.pk for album in response.context['albums']], [recent.pk])
+
+        # The date range runs in the search query itself
+        searches = [query['sql'] for query in queries if 'wagtailsearch' in query['sql']]
+        self.assertEqual(len(searches), 1)
+        self.assertIn('album_date', searches[0])
+
+    @mock.patch('pages.search_cache.SEARCH_CACHE_MAX_RESULTS', 5)
+    def test_pages_past_the_cached_ids_are_searched(self):
+        for index in range(14):
+            self.add_album(self.gallery, f"Harvest fair {index}")
+
+        response = self.client.get(self.gallery.url, {'search': 'harvest', 'page': 2})
+        albums = response.context['albums']
+        self.assertEqual(albums.paginator.count, 14)
+        self.assertEqual(len(albums), 2)
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=600)
+class PageCacheTests(PagesTestCase):
+    """
+    Tests for the full-page response cache.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.gallery = self.add_gallery()
+        self.album = self.add_album(self.gallery, "First", publish=True)
+
+    def test_hits_run_no_queries(self):
+        first = self.client.get(self.gallery.url, {'utm_source': 'x'})
+        with self.assertNumQueries(0):
+            response = self.client.get(self.gallery.url)
+        self.assertEqual(response.content, first.content)
+
+    def test_key_includes_whitelisted_params(self):
+        self.client.get(self.gallery.url)
+        self.assertGreater(self.count_queries(self.gallery.url, date_from='2030-01-01'), 0)
+        self.assertNotContains(self.client.get(self.gallery.url, {'date_from': '2030-01-01'}), "First")
+
+    def test_key_includes_scheme_and_deploy_version(self):
+        self.client.get(self.gallery.url)
+        self.assertGreater(self.count_queries(self.gallery.url, secure=True), 0)
+        with self.settings(DEPLOY_VERSION='next'):
+            self.assertGreater(self.count_queries(self.gallery.url), 0)
+
+    def test_publish_purges_parent_listing(self):
+        self.client.get(self.gallery.url)
+        self.add_album(self.gallery, "Second", publish=True)
+        self.assertContains(self.client.get(self.gallery.url), "Second")
+
+    def test_unpublish_purges_page(self):
+        self.client.get(self.album.url)
+        self.album.unpublish()
+        self.assertEqual(self.client.get(self.album.url).status_code, 404)
+
+    def test_visitors_with_a_session_bypass_the_cache(self):
+        self.client.get(self.gallery.url)
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = 'abc'
+        self.assertGreater(self.count_queries(self.gallery.url), 0)
+
+
+class ConditionalGetTests(PagesTestCase):
+    """
+    Tests for the ETag and Last-Modified validators of page responses.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.gallery = self.add_gallery()
+        self.album = self.add_album(self.gallery, "First", publish=True)
+
+    def test_unchanged_page_is_not_rendered(self):
+        response = self.client.get(self.gallery.url)
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with mock.patch.object(GalleryIndexPage, 'get_context') as get_context:
+            by_etag = self.client.get(self.gallery.url, headers={'if_none_match': response['ETag']})
+            by_date = self.client.get(self.gallery.url, headers={'if_modified_since': response['Last-Modified']})
+        get_context.assert_not_called()
+        self.assertEqual(by_etag.status_code, 304)
+        self.assertEqual(by_etag['ETag'], response['ETag'])
+        self.assertEqual(by_date.status_code, 304)
+
+    def test_validators_vary_with_filters(self):
+        etag = self.client.get(self.gallery.url)['ETag']
+        response = self.client.get(self.gallery.url, {'date_from': '2030-01-01'}, headers={'if_none_match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_publishing_a_child_changes_the_index(self):
+        etag = self.client.get(self.gallery.url)['ETag']
+        self.add_album(self.gallery, "Second", publish=True)
+        self.assertContains(self.client.get(self.gallery.url, headers={'if_none_match': etag}), "Second")
+
+    @override_settings(PAGE_CACHE_TIMEOUT=600)
+    def test_page_cache_answers_revalidation(self):
+        etag = self.client.get(self.gallery.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.gallery.url, headers={'if_none_match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_visitors_with_a_session_get_no_validators(self):
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = 'abc'
+        self.assertFalse(self.client.get(self.gallery.url).has_header('ETag'))
+
+
+class ListingApiTests(PagesTestCase):
+    """
+    Tests for the JSON listings of the index pages.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.press = self.add_press_index(page_title="Press")
+        self.add_release(self.press, "First", publish=True)
+
+    def get(self, **headers):
+        return self.client.get(self.press.url + 'api/', {'tab': 'all'}, headers=headers)
+
+    def test_lists_card_fields(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual([item['title'] for item in data['results']], ["First"])
+        self.assertNotIn('content', data['results'][0])
+        self.assertTrue(response['ETag'].startswith('"'))
+
+    def test_revalidation_skips_the_listing(self):
+        etag = self.get()['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(any('pages_pressitem' in query['sql'] for query in queries))
+
+    @override_settings(PAGE_CACHE_TIMEOUT=600)
+    def test_revalidation_from_the_page_cache_runs_no_queries(self):
+        etag = self.get()['ETag']
+        with self.assertNumQueries(0):
+            response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_publish_changes_etag(self):
+        etag = self.get()['ETag']
+        self.add_release(self.press, "Second", datetime.date(2024, 2, 1), publish=True)
+        response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([item['title'] for item in response.json()['results']], ["Second", "First"])
+
+    def test_album_without_photos_has_no_cover(self):
+        gallery = self.add_gallery()
+        self.add_album(gallery, "Empty")
+
+        response = self.client.get(gallery.url + 'api/')
+        self.assertEqual(response.status_code, 200)
+        album, = response.json()['results']
+        self.assertIsNone(album['cover'])
+        self.assertEqual(album['photo_count'], 0)
+
+    def test_album_listing(self):
+        gallery = self.add_gallery()
+        self.add_album(gallery, images=[self.make_image()])
+
+        result = self.client.get(gallery.url + 'api/').json()['results'][0]
+        self.assertEqual(result['photo_count'], 1)
+        self.assertIn('fill-600x400', str(result['cover']))
+
+
+class StaticFilesTests(PagesTestCase):
+    """
+    Tests for the minified, precompressed static files and their serving.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.source = tempfile.mkdtemp()
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.static_root, ignore_errors=True)
+        os.makedirs(os.path.join(self.source, 'css'))
+        with open(os.path.join(self.source, 'css', 'site.css'), 'w') as file:
+            file.write('/* Layout */\n.card > .title {\n    color: red;\n    content: "a  b";\n}\n' * 40)
+
+        self.enterContext(override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+            STATIC_ROOT=self.static_root,
+            STORAGES={**settings.STORAGES, 'staticfiles': {
+                'BACKEND': 'pages.static_files.CompressedManifestStaticFilesStorage',
+            }},
+        ))
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(self.static_root, 'staticfiles.json')) as file:
+            self.hashed_name = json.load(file)['paths']['css/site.css']
+
+    def test_collectstatic_minifies_and_precompresses(self):
+        path = os.path.join(self.static_root, self.hashed_name)
+        with open(path, 'rb') as file:
+            content = file.read()
+        self.assertTrue(content.startswith(b'.card>.title{color:red;content:"a  b"}'))
+        with gzip.open(path + '.gz') as file:
+            self.assertEqual(file.read(), content)
+
+    def test_serves_precompressed_variant(self):
+        response = self.client.get('/static/' + self.hashed_name, headers={'accept_encoding': 'gzip, deflate'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+        response = self.client.get('/static/' + self.hashed_name, headers={'if_none_match': response['ETag']})
+        self.assertEqual(response.status_code, 200)  # Identity has its own ETag
+
+    def test_range_and_revalidation(self):
+        url = '/static/' + self.hashed_name
+        response = self.client.get(url, headers={'range': 'bytes=1-5'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'card>')
+        self.assertEqual(response['Content-Range'].split('/')[0], 'bytes 1-5')
+
+        self.assertEqual(self.client.get(url, headers={'range': 'bytes=99999-'}).status_code, 416)
+        self.assertEqual(self.client.get(url, headers={'if_none_match': response['ETag']}).status_code, 304)
+        self.assertNotIn('immutable', self.client.get('/static/css/site.css')['Cache-Control'])
+
+    @override_settings(SENDFILE_HEADER='X-Accel-Redirect')
+    def test_sendfile_delegates_to_web_server(self):
+        with self.settings(SENDFILE_LOCATIONS={self.static_root: '/internal/static/'}):
+            response = self.client.get('/static/' + self.hashed_name)
+        self.assertEqual(response['X-Accel-Redirect'], '/internal/static/' + self.hashed_name)
+        self.assertEqual(response.content, b'')
+
+
+class MediaServingTests(PagesTestCase):
+    """
+    Tests for serving uploaded images and documents.
+    """
+
+    def test_image_ranges_and_revalidation(self):
+        image = self.make_image()
+        url = image.file.url
+        response = self.client.get(url, headers={'range': 'bytes=0-3'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'\x89PNG')
+        self.assertIn('public', response['Cache-Control'])
+
+        last_modified = response['Last-Modified']
+        self.assertEqual(self.client.get(url, headers={'if_modified_since': last_modified}).status_code, 304)
+        self.assertEqual(self.client.get(url, headers={'if_none_match': response['ETag']}).status_code, 304)
+
+    def test_documents_only_served_through_document_view(self):
+        document = Document.objects.create(title="Report", file=ContentFile(b'%PDF-1.4 report' * 100, name='report.pdf'))
+        self.assertEqual(self.client.get(document.file.url).status_code, 404)
+
+        response = self.client.get(document.url, headers={'range': 'bytes=5-7'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'1.4')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Content-Disposition'], 'inline')
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+
+        self.assertEqual(self.client.get(document.url, headers={'if_none_match': response['ETag']}).status_code, 304)
+
+    @override_settings(SENDFILE_HEADER='X-Accel-Redirect')
+    def test_sendfile_delegates_to_web_server(self):
+        image = self.make_image()
+        with self.settings(SENDFILE_LOCATIONS={self.media_root: '/internal/media/'}):
+            response = self.client.get(image.file.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/internal/media/' + image.file.name)
+        self.assertEqual(response.content, b'')
+
+
+class VendorAssetsTests(PagesTestCase):
+    """
+    Tests for the purged Bootstrap and Font Awesome bundle.
+    """
+
+    def test_purge_keeps_rules_for_used_classes(self):
+        css = (
+            '/*! Bootstrap */:root{--bs-x:1}.btn,.card>.unused{color:red}.unused{color:blue}'
+            '.nav-link:not(.collapsed){top:0}@media (min-width:768px){.unused{a:b}.btn{a:c}}'
+            '@keyframes spin{from{a:b}to{a:c}}'
+        )
+        self.assertEqual(
+            purge_css(css, {'btn', 'nav-link'}),
+            '/*! Bootstrap */\n:root{--bs-x:1}.btn{color:red}.nav-link:not(.collapsed){top:0}'
+            '@media (min-width:768px){.btn{a:c}}@keyframes spin{from{a:b}to{a:c}}',
+        )
+
+    def test_fontawesome_keeps_used_icons_and_their_code_points(self):
+        css = (
+            '@font-face{font-family:"Font Awesome 6 Free";src:url(../webfonts/fa-solid-900.woff2)}'
+            '.fas{font-weight:900}.fa-user:before{content:"\\f007"}.fa-house:before{content:"\\f015"}'
+        )
+        purged, codepoints = purge_fontawesome(css, {'fas', 'fa-user'}, {'fa-solid-900': 'webfonts/fa-solid-900.woff2'})
+        self.assertEqual(codepoints, {0xf007})
+        self.assertNotIn('fa-house', purged)
+        self.assertNotIn('../webfonts', purged)
+        self.assertIn('src:url(webfonts/fa-solid-900.woff2)', purged)
+
+    def test_cdn_copies_until_built(self):
+        vendor_assets_built.cache_clear()
+        self.addCleanup(vendor_assets_built.cache_clear)
+        with override_settings(STATICFILES_DIRS=[self.media_root]):
+            self.assertIn('cdn.jsdelivr.net', vendor_stylesheets())
+
+
+class CriticalCssTests(PagesTestCase):
+    """
+    Tests for the inlined critical CSS.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output, ignore_errors=True)
+        self.enterContext(override_settings(CRITICAL_CSS_DIR=self.output))
+
+    def test_covers_header_and_top_of_content_only(self):
+        css, _ = compute_critical_css('pages/event_index_page.html')
+        self.assertIn('.site-title{', css)
+        self.assertIn('.event-page-title{', css)
+        self.assertNotIn('.marquee-content', css)  # Footer
+        self.assertNotIn('.gallery-page-title', css)
+
+    def test_page_inlines_critical_css_and_defers_stylesheets(self):
+        events = EventIndexPage(title="Events", slug="events")
+        self.root_page.add_child(instance=events)
+        self.assertNotContains(self.client.get(events.url), '<style>')
+
+        self.assertIn('pages/event_index_page.html', stale_templates())
+        call_command('build_critical_css', stdout=io.StringIO())
+        self.assertEqual(stale_templates(), [])
+
+        response = self.client.get(events.url)
+        self.assertContains(response, '<style>:root{')
+        self.assertContains(response, 'rel="preload" href="/static/css/style.css" as="style"')
+
+    @override_settings(DEBUG=True)
+    def test_requests_never_build(self):
+        events = EventIndexPage(title="Events", slug="events")
+        self.root_page.add_child(instance=events)
+        self.assertNotContains(self.client.get(events.url), '<style>')
+        self.assertEqual(os.listdir(self.output), [])
+
+
+class SiteChromeTests(PagesTestCase):
+    """
+    Tests for the cached header, navigation and footer fragments.
+    """
+
+    def setUp(self):
+        super().setUp()
+        # Site root (depth 2) > section (depth 3) > album, as on the real site
+        home = Page(title="Site", slug="site")
+        self.root_page.add_child(instance=home)
+        self.gallery = self.add_gallery(parent=home, live=False)
+        self.gallery.save_revision().publish()
+
+    def chrome_keys(self):
+        return [key for key in cache._cache if 'site-chrome:' in key and 'version' not in key]
+
+    def test_fragments_are_cached_per_section(self):
+        response = self.client.get(self.gallery.url)
+        self.assertContains(response, 'href="/gallery/" class="nav-link "')  # served under /site/
+        self.assertEqual(len(self.chrome_keys()), 3)
+
+        self.client.get(self.gallery.url)
+        self.assertEqual(len(self.chrome_keys()), 3)
+
+        self.client.get('/biography/')
+        self.assertEqual(len(self.chrome_keys()), 4)  # only the navigation varies by section
+
+    def test_other_paths_share_the_navigation(self):
+        self.client.get(self.gallery.url)
+        for path in ('/search/', '/no-such-page/', '/wp-login.php'):
+            self.client.get(path)
+        self.assertEqual(len(self.chrome_keys()), 3)
+
+    def test_deploy_invalidates_fragments(self):
+        self.client.get(self.gallery.url)
+        with self.settings(DEPLOY_VERSION='next'), self.assertTemplateUsed('includes/footer.html'):
+            self.client.get(self.gallery.url)
+
+    def test_menu_pages_invalidate_fragments(self):
+        self.client.get(self.gallery.url)
+        with self.assertTemplateUsed('includes/footer.html'):
+            self.gallery.save_revision().publish()
+            self.client.get(self.gallery.url)
+
+    def test_other_pages_keep_fragments(self):
+        self.client.get(self.gallery.url)
+        self.add_album(self.gallery, publish=True)
+        with self.assertTemplateNotUsed('includes/footer.html'):
+            self.client.get(self.gallery.url)
+
+
+class AboutPageTests(PagesTestCase):
+    """
+    Tests for the historical timeline on the About page.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.about = AboutPage(title="About", slug="about")
+        self.root_page.add_child(instance=self.about)
+
+    def publish_event(self, date):
+        event = HistoricalEventPage(
+            title=str(date), event_title=str(date), event_date=date, event_description="<p>Event</p>", live=False
+        )
+        self.about.add_child(instance=event)
+        event.save_revision().publish()
+        return HistoricalEventPage.objects.get(pk=event.pk)
+
+    def test_periods_are_counted_and_cached(self):
+        for year in (1991, 1993, 1995, 2004):
+            self.publish_event(datetime.date(year, 6, 1))
+
+        with self.assertNumQueries(1):
+            periods = self.about.get_timeline_periods()
+        self.assertEqual(
+            [(period['key'], period['count']) for period in periods],
+            [('1990-1995', 2), ('1995-2000', 1), ('2000-2005', 1)],
+        )
+        with self.assertNumQueries(0):
+            self.about.get_timeline_periods()
+
+        self.publish_event(datetime.date(2010, 1, 1))
+        self.assertEqual(self.about.get_timeline_periods()[-1]['key'], '2010-2015')
+
+    def test_period_filter_is_a_date_range(self):
+        self.publish_event(datetime.date(1994, 12, 31))
+        self.publish_event(datetime.date(1995, 1, 1))
+
+        response = self.client.get(self.about.url, {'period': '1990-1995'})
+        self.assertEqual([event.event_date.year for event in response.context['events']], [1994])
+        self.assertContains(response, 'href="?period=1990-1995" \n                       class="timeline-period active"')
@@ -0,0 +1,244 @@
+"""
+Self-hosted, purged Bootstrap and Font Awesome.
+
+``manage.py build_vendor_assets`` fetches the pinned Bootstrap and Font
+Awesome releases, keeps only the CSS rules whose classes appear somewhere
+in the site's templates or JavaScript, subsets the icon fonts to the icons
+used, and writes the result under ``vendor/`` in the project's static
+directory, where collectstatic minifies, hashes and precompresses it like
+any other asset (see pages.static_files).
+
+Usage is found the way PurgeCSS does it: every word in the scanned files
+counts as a possible class name, so classes in conditionals and scripts
+are kept. Class names must not be assembled from pieces (``col-{{ n }}``).
+Classes that Bootstrap's JavaScript toggles itself are always kept.
+
+Until the assets have been built, ``{% vendor_stylesheets %}`` and
+``{% vendor_scripts %}`` link the CDN copies instead.
+"""
+import re
+from pathlib import Path
+
+from django.conf import settings
+
+BOOTSTRAP_VERSION = '5.3.2'
+FONTAWESOME_VERSION = '6.4.0'
+
+BOOTSTRAP_URL = f'https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist'
+FONTAWESOME_URL = f'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/{FONTAWESOME_VERSION}'
+
+# Release files the build reads, by the name they are looked up under in --source
+SOURCES = {
+    'bootstrap.min.css': f'{BOOTSTRAP_URL}/css/bootstrap.min.css',
+    'bootstrap.bundle.min.js': f'{BOOTSTRAP_URL}/js/bootstrap.bundle.min.js',
+    'all.min.css': f'{FONTAWESOME_URL}/css/all.min.css',
+    'fa-solid-900.ttf': f'{FONTAWESOME_URL}/webfonts/fa-solid-900.ttf',
+    'fa-regular-400.ttf': f'{FONTAWESOME_URL}/webfonts/fa-regular-400.ttf',
+    'fa-brands-400.ttf': f'{FONTAWESOME_URL}/webfonts/fa-brands-400.ttf',
+}
+
+# Font Awesome fonts: (family, weight, style classes that select it)
+FONTAWESOME_FONTS = {
+    'fa-solid-900': ('Font Awesome 6 Free', 900, {'fas', 'fa-solid'}),
+    'fa-regular-400': ('Font Awesome 6 Free', 400, {'far', 'fa-regular'}),
+    'fa-brands-400': ('Font Awesome 6 Brands', 400, {'fab', 'fa-brands'}),
+}
+
+# Built files, relative to the static directory; .min keeps collectstatic from minifying them again
+VENDOR_DIR = 'vendor'
+BOOTSTRAP_CSS = f'{VENDOR_DIR}/bootstrap.min.css'
+BOOTSTRAP_JS = f'{VENDOR_DIR}/bootstrap.bundle.min.js'
+FONTAWESOME_CSS = f'{VENDOR_DIR}/fontawesome.min.css'
+
+# Classes added at runtime by Bootstrap's JavaScript
+BOOTSTRAP_SAFELIST = {
+    'active', 'show', 'showing', 'hide', 'fade', 'collapse', 'collapsing', 'collapse-horizontal',
+    'collapsed', 'disabled', 'modal-open', 'modal-backdrop', 'modal-static', 'offcanvas-backdrop',
+    'carousel-item-next', 'carousel-item-prev', 'carousel-item-start', 'carousel-item-end',
+    'pointer-event', 'dropdown-menu-end', 'was-validated', 'tooltip', 'tooltip-inner', 'tooltip-arrow',
+    'popover', 'popover-arrow', 'popover-header', 'popover-body', 'bs-tooltip-auto', 'bs-popover-auto',
+}
+
+COMMENT_RE = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/''', re.S)
+
+# Block at-rules whose contents are declarations rather than rules
+DECLARATION_AT_RULES = ('@font-face', '@page', '@keyframes', '@-webkit-keyframes', '@property')
+
+
+def scan_dirs():
+    """Directories whose files may use vendor classes"""
+    base = Path(settings.BASE_DIR)
+    return [
+        base / 'MHPS_Web' / 'templates',
+        base / 'pages' / 'templates',
+        base / 'home' / 'templates',
+        base / 'search' / 'templates',
+        base / 'MHPS_Web' / 'static' / 'js',
+    ]
+
+
+def used_words(directories):
+    """Every class-like word in the templates and scripts under ``directories``"""
+    words = set()
+    for directory in directories:
+        for path in Path(directory).rglob('*'):
+            if path.suffix in ('.html', '.js', '.txt') and path.is_file():
+                words.update(re.findall(r'[\w-]+', path.read_text(encoding='utf-8')))
+    return words
+
+
+def strip_comments(css):
+    """``css`` without comments, and its ``/*! ... */`` license notices"""
+    notices = re.findall(r'/\*!.*?\*/', css, re.S)
+    return COMMENT_RE.sub(lambda match: match.group(1) or '', css), notices
+
+
+def parse_css(css, position=0):
+    """
+    Rules of a stylesheet without comments, as ``(prelude, body)`` pairs:
+    ``body`` is the declarations of a style rule, a list of rules for a
+    block at-rule (``@media``, ``@supports``...), or None for a statement
+    such as ``@import``. Returns ``(rules, end position)``.
+    """
+    rules = []
+    start = position
+    while position < len(css):
+        char = css[position]
+        if char in '"\'':
+            position = skip_string(css, position)
+            continue
+        if char == ';' and css[start:position].strip().startswith('@'):
+            rules.append((css[start:position].strip(), None))
+            start = position + 1
+        elif char == '{':
+            prelude = css[start:position].strip()
+            if prelude.startswith('@') and not prelude.startswith(DECLARATION_AT_RULES):
+                body, position = parse_css(css, position + 1)
+            else:
+                end = find_block_end(css, position + 1)
+                body, position = css[position + 1:end], end
+            rules.append((prelude, body))
+            start = position + 1
+        elif char == '}':
+            return rules, position
+        position += 1
+    return rules, position
+
+
+def skip_string(css, position):
+    quote = css[position]
+    position += 1
+    while position < len(css) and css[position] != quote:
+        position += 2 if css[position] == '\\' else 1
+    return position + 1
+
+
+def find_block_end(css, position):
+    """Position of the ``}`` closing the block whose contents start at ``position``"""
+    depth = 0
+    while position < len(css):
+        char = css[position]
+        if char in '"\'':
+            position = skip_string(css, position)
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            if not depth:
+                return position
+            depth -= 1
+        position += 1
+    return position
+
+
+def split_selectors(prelude):
+    """Split a selector list on its top-level commas"""
+    selectors, depth, start = [], 0, 0
+    for index, char in enumerate(prelude):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and not depth:
+            selectors.append(prelude[start:index].strip())
+            start = index + 1
+    selectors.append(prelude[start:].strip())
+    return selectors
+
+
+def selector_classes(selector):
+    """Classes an element tree needs for ``selector`` to match anything"""
+    selector = re.sub(r':not\([^)]*\)', '', selector)
+    selector = re.sub(r'\[[^\]]*\]', '', selector)
+    return set(re.findall(r'\.(-?[_a-zA-Z][\w-]*)', selector))
+
+
+def purge_rules(rules, words):
+    """``rules`` without the selectors needing a class that isn't in ``words``"""
+    kept = []
+    for prelude, body in rules:
+        if isinstance(body, list):
+            body = purge_rules(body, words)
+            if body:
+                kept.append((prelude, body))
+        elif prelude.startswith('@') or body is None:
+            kept.append((prelude, body))
+        else:
+            selectors = [selector for selector in split_selectors(prelude) if selector_classes(selector) <= words]
+            if selectors:
+                kept.append((','.join(selectors), body))
+    return kept
+
+
+def serialize_css(rules):
+    parts = []
+    for prelude, body in rules:
+        if body is None:
+            parts.append(f'{prelude};')
+        elif isinstance(body, list):
+            parts.append(f'{prelude}{{{serialize_css(body)}}}')
+        else:
+            parts.append(f'{prelude}{{{body}}}')
+    return ''.join(parts)
+
+
+def purge_css(css, words):
+    """``css`` with only the rules that can match the classes in ``words``"""
+    css, notices = strip_comments(css)
+    rules, _ = parse_css(css)
+    return '\n'.join(notices + [serialize_css(purge_rules(rules, words))])
+
+
+def icon_codepoints(rules):
+    """Code points of the icons defined by ``.fa-*`` rules among ``rules``"""
+    codepoints = set()
+    for prelude, body in rules:
+        if isinstance(body, list):
+            codepoints |= icon_codepoints(body)
+        elif body and '.fa-' in prelude:
+            for value in re.findall(r'(?:content|--fa)\s*:\s*"\\([0-9a-fA-F]+)"', body):
+                codepoints.add(int(value, 16))
+    return codepoints
+
+
+def purge_fontawesome(css, words, font_files):
+    """
+    Font Awesome CSS for the icons in ``words``, with its own ``@font-face``
+    rules pointing at the subset fonts in ``font_files`` (name -> file name
+    relative to the stylesheet). Returns ``(css, code points)``.
+    """
+    css, notices = strip_comments(css)
+    rules, _ = parse_css(css)
+    rules = [rule for rule in purge_rules(rules, words) if not rule[0].startswith('@font-face')]
+
+    faces = ''.join(
+        f'@font-face{{font-family:"{FONTAWESOME_FONTS[name][0]}";font-style:normal;'
+        f'font-weight:{FONTAWESOME_FONTS[name][1]};font-display:block;src:url({file_name})}}'
+        for name, file_name in font_files.items()
+    )
+    return '\n'.join(notices + [faces + serialize_css(rules)]), icon_codepoints(rules)
+
+
+def used_fonts(words):
+    """Font Awesome fonts selected by a style class in ``words``"""
+    return [name for name, (_, _, classes) in FONTAWESOME_FONTS.items() if classes & words]
@@ -1,3 +1,92 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils._os import safe_join
+from wagtail import hooks
+from wagtail.documents import get_document_model
+from wagtail.documents.models import document_served
+from wagtail.documents.views import serve as wagtaildocs_serve
 
-# Create your views here.
+from .file_serving import serve_file
+from .static_files import is_hashed_name
+
+# Hashed static names never change content
+STATIC_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+# Unhashed names (e.g. referenced from third-party code) are revalidated
+STATIC_MAX_AGE = 60 * 60
+
+# Uploads keep their name for as long as their content; a replaced image or
+# document gets a new one
+MEDIA_MAX_AGE = 60 * 60 * 24
+
+# Documents are only served through serve_document, which checks their
+# collection's privacy settings
+DOCUMENTS_DIR = 'documents/'
+
+
+def serve_static(request, path):
+    """Collected static files, when the web server doesn't serve STATIC_ROOT itself"""
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+
+    if is_hashed_name(path):
+        cache_control = {'public': True, 'max_age': STATIC_IMMUTABLE_MAX_AGE, 'immutable': True}
+    else:
+        cache_control = {'public': True, 'max_age': STATIC_MAX_AGE}
+    return serve_file(request, full_path, cache_control=cache_control)
+
+
+def serve_media(request, path):
+    """Uploaded images and their renditions, when the web server doesn't serve MEDIA_ROOT itself"""
+    if path.startswith(DOCUMENTS_DIR):
+        raise Http404
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+
+    cache_control = {'public': True, 'max_age': MEDIA_MAX_AGE}
+    return serve_file(request, full_path, cache_control=cache_control, precompressed=False)
+
+
+def serve_document(request, document_id, document_filename):
+    """
+    Wagtail's document view (same checks, hooks and signal), sending local
+    files through serve_file for ranges, revalidation and sendfile
+    """
+    Document = get_document_model()
+    doc = get_object_or_404(Document, id=document_id)
+    if doc.filename != document_filename:
+        raise Http404("This document does not match the given filename.")
+
+    try:
+        local_path = doc.file.path
+    except NotImplementedError:
+        # Remote storage: Wagtail redirects to it or streams it
+        return wagtaildocs_serve.serve(request, document_id, document_filename)
+
+    for fn in hooks.get_hooks("before_serve_document"):
+        result = fn(doc, request)
+        if isinstance(result, HttpResponse):
+            return result
+
+    document_served.send(sender=Document, instance=doc, request=request)
+
+    if doc.collection.get_view_restrictions().exists():
+        cache_control = {'private': True, 'no_cache': True}
+    else:
+        cache_control = {'public': True, 'max_age': MEDIA_MAX_AGE}
+    response = serve_file(
+        request, local_path, content_type=doc.content_type, cache_control=cache_control, precompressed=False,
+    )
+    if response.status_code in (200, 206):
+        response['Content-Disposition'] = doc.content_disposition
+
+    if getattr(settings, "WAGTAILDOCS_BLOCK_EMBEDDED_CONTENT", True):
+        response["Content-Security-Policy"] = "default-src 'none'"
+    response["X-Content-Type-Options"] = "nosniff"
+    return response
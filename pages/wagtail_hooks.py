@@ -0,0 +1,63 @@
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from wagtail import hooks
+
+from .page_cache import is_anonymous_request, is_public_response, page_validators, store_response
+
+
+@hooks.register('on_serve_page')
+def cache_page_response(next_serve_page):
+    """
+    Store the response of cacheable requests in the page cache, once
+    rendered. Restricted pages never get here: the view restriction check
+    in before_serve_page answers those requests first.
+    """
+    def serve_page(page, request, args, kwargs):
+        response = next_serve_page(page, request, args, kwargs)
+        if getattr(request, 'page_cache_key', None):
+            if hasattr(response, 'add_post_render_callback'):
+                response.add_post_render_callback(lambda rendered: store_response(request, page, rendered))
+            else:
+                store_response(request, page, response)
+        return response
+
+    return serve_page
+
+
+@hooks.register('on_serve_page')
+def conditional_page_response(next_serve_page):
+    """
+    Answer anonymous requests for a page the client already has with a 304
+    before the page builds its context, and send validators with the rest.
+    Registered after cache_page_response so the validators are set before
+    the response is cached.
+    """
+    def serve_page(page, request, args, kwargs):
+        if not is_anonymous_request(request):
+            return next_serve_page(page, request, args, kwargs)
+
+        etag, last_modified = page_validators(request, page)
+
+        def add_validators(response):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            add_validators(response)
+            return response
+
+        def add_public_validators(response):
+            # Responses with validators of their own (e.g. listing JSON) keep them
+            if is_public_response(request, response) and not response.has_header('ETag'):
+                add_validators(response)
+
+        response = next_serve_page(page, request, args, kwargs)
+        if hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(add_public_validators)
+        else:
+            add_public_validators(response)
+        return response
+
+    return serve_page
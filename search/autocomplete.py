@@ -0,0 +1,205 @@
+"""
+Title autocomplete for the site search box.
+
+Every live, public page is held in memory under its title and its card
+title (``short_title``, ``event_title``, ``album_title`` or
+``article_title``), as a sorted array of normalised title suffixes, one
+per word. A prefix of any run of words in a title is then one binary
+search away, so a lookup doesn't touch the database; only a sequence
+number is read from the cache.
+
+Publishing, unpublishing, moving or deleting a page records the change in
+the shared cache under the next sequence number (see pages.signals). Each
+process applies the changes it hasn't seen to its own copy, reloading just
+those pages, and rebuilds from scratch if it has fallen too far behind or
+the sequence has been lost.
+"""
+import re
+import time
+from bisect import bisect_left, insort
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+
+from wagtail.models import Page, Site
+
+# Specific title fields indexed alongside the page title, first one a page type has wins
+AUTOCOMPLETE_FIELDS = ('short_title', 'event_title', 'album_title', 'article_title')
+
+MIN_PREFIX_LENGTH = 2
+MAX_RESULTS = 10
+
+# Suffix matches looked at per lookup, so short prefixes stay cheap
+SCAN_LIMIT = 500
+
+SEQUENCE_KEY = 'autocomplete:sequence'
+
+# Changes kept for processes catching up; further behind means a rebuild
+CHANGE_LOG_LENGTH = 200
+CHANGE_TIMEOUT = 60 * 60
+
+# Backstop in case a change is missed, e.g. by a per-process cache
+INDEX_MAX_AGE = 60 * 60
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    return ' '.join(TOKEN_RE.findall(text.casefold()))
+
+
+def change_key(sequence):
+    return f'autocomplete:change:{sequence}'
+
+
+def new_sequence():
+    # A fresh starting point is far from any sequence a process holds, so
+    # losing the key makes every process rebuild
+    return time.time_ns() // 1_000_000
+
+
+def record_change(*page_ids):
+    """Tell every process to reload the given pages"""
+    try:
+        sequence = cache.incr(SEQUENCE_KEY)
+    except ValueError:
+        cache.set(SEQUENCE_KEY, new_sequence(), None)
+        return
+    cache.set(change_key(sequence), list(page_ids), CHANGE_TIMEOUT)
+
+
+def invalidate_autocomplete():
+    """Make every process rebuild its index, e.g. after sites change"""
+    cache.delete(SEQUENCE_KEY)
+
+
+def relative_url(url_path, root_paths):
+    for root_path in root_paths:
+        if url_path.startswith(root_path.root_path):
+            return url_path[len(root_path.root_path) - 1:]
+    return None
+
+
+def load_entries(page_ids=None):
+    """
+    (page id, entry, titles) for live public pages, all of them or just
+    ``page_ids``. One query for the pages, plus one per page type with a
+    card title.
+    """
+    pages = Page.objects.live().public().filter(depth__gt=1)
+    if page_ids is not None:
+        pages = pages.filter(pk__in=page_ids)
+    rows = list(pages.values_list('pk', 'title', 'url_path', 'content_type_id'))
+
+    ids_by_type = {}
+    for pk, _, _, content_type_id in rows:
+        ids_by_type.setdefault(content_type_id, []).append(pk)
+
+    card_titles = {}
+    models = {}
+    for content_type_id, ids in ids_by_type.items():
+        model = models[content_type_id] = ContentType.objects.get_for_id(content_type_id).model_class()
+        field = next((name for name in AUTOCOMPLETE_FIELDS if model and hasattr(model, name)), None)
+        if field:
+            card_titles.update(model.objects.filter(pk__in=ids).values_list('pk', field))
+
+    root_paths = Site.get_site_root_paths()
+    for pk, title, url_path, content_type_id in rows:
+        url = relative_url(url_path, root_paths)
+        if url is None:
+            continue  # Not under any site
+        model = models[content_type_id]
+        card_title = card_titles.get(pk)
+        entry = {
+            'title': card_title or title,
+            'url': url,
+            'type': str(model._meta.verbose_name) if model else 'page',
+        }
+        yield pk, entry, {title, card_title} - {None, ''}
+
+
+class PrefixIndex:
+    """Sorted (title suffix, word position, page id) keys with their pages' entries"""
+
+    def __init__(self, entries=()):
+        self.keys = []
+        self.entries = {}
+        self.page_keys = {}
+        for page_id, entry, titles in entries:
+            self.keys.extend(self.make_keys(page_id, entry, titles))
+        self.keys.sort()
+
+    def make_keys(self, page_id, entry, titles):
+        keys = set()
+        for title in titles:
+            words = normalize(title).split()
+            keys.update((' '.join(words[start:]), start, page_id) for start in range(len(words)))
+        self.entries[page_id] = entry
+        self.page_keys[page_id] = keys
+        return keys
+
+    def remove(self, page_id):
+        for key in self.page_keys.pop(page_id, ()):
+            index = bisect_left(self.keys, key)
+            if index < len(self.keys) and self.keys[index] == key:
+                del self.keys[index]
+        self.entries.pop(page_id, None)
+
+    def update(self, page_ids):
+        """Reload the given pages"""
+        for page_id in page_ids:
+            self.remove(page_id)
+        for page_id, entry, titles in load_entries(page_ids):
+            for key in self.make_keys(page_id, entry, titles):
+                insort(self.keys, key)
+
+    def lookup(self, query, limit=MAX_RESULTS):
+        """Entries of the pages with a title word run starting with ``query``"""
+        prefix = normalize(query)
+        if len(prefix) < MIN_PREFIX_LENGTH:
+            return []
+
+        positions = {}
+        start = bisect_left(self.keys, (prefix,))
+        for suffix, position, page_id in self.keys[start:start + SCAN_LIMIT]:
+            if not suffix.startswith(prefix):
+                break
+            positions[page_id] = min(position, positions.get(page_id, position))
+
+        # Titles starting with the query first, then the shortest
+        ranked = sorted(positions, key=lambda page_id: (
+            positions[page_id] > 0, len(self.entries[page_id]['title']), self.entries[page_id]['title'],
+        ))
+        return [self.entries[page_id] for page_id in ranked[:limit]]
+
+
+_index = None
+_sequence = None
+_built_at = 0.0
+
+
+def get_index():
+    """This process's index, brought up to date with the recorded changes"""
+    global _index, _sequence, _built_at
+
+    sequence = cache.get_or_set(SEQUENCE_KEY, new_sequence, None)
+    if _index is not None and sequence == _sequence:
+        if time.monotonic() - _built_at < INDEX_MAX_AGE:
+            return _index
+        _index = None
+
+    if _index is not None and _sequence < sequence <= _sequence + CHANGE_LOG_LENGTH:
+        changes = cache.get_many([change_key(number) for number in range(_sequence + 1, sequence + 1)])
+        if len(changes) == sequence - _sequence:
+            _index.update({page_id for page_ids in changes.values() for page_id in page_ids})
+            _sequence = sequence
+            return _index
+
+    _index = PrefixIndex(load_entries())
+    _sequence = sequence
+    _built_at = time.monotonic()
+    return _index
+
+
+def lookup(query, limit=MAX_RESULTS):
+    return get_index().lookup(query, limit)
@@ -0,0 +1,871 @@
+"""
+In-process BM25 search backend.
+
+Keeps an inverted index of every indexed model's ``index.SearchField`` (and
+``AutocompleteField``) values in one file and ranks matches with BM25,
+weighting each field by its ``boost``. Enable it with::
+
+    WAGTAILSEARCH_BACKENDS = {
+        "default": {
+            "BACKEND": "search.bm25",
+            "PATH": BASE_DIR / "search-index.bm25",  # optional
+        }
+    }
+
+and build the index once with ``python manage.py update_index``. After
+that, saving, publishing or deleting a page updates the index like any
+other backend.
+
+The index is a set of immutable segment files next to ``PATH``, which is
+a small JSON manifest listing them (oldest first) with the document count
+and total length BM25 needs. A segment is a JSON header (models, field
+names, array offsets) followed by flat arrays: its documents' primary keys,
+models and weighted lengths sorted by (model, primary key), the keys it
+removes from older segments, its vocabulary as sorted UTF-8 bytes, and per
+term a contiguous run of postings (document slot, field, boosted term
+frequency). Keys and terms are found by binary search in the mapped
+arrays, so loading a segment builds nothing. Segments are memory-mapped
+read-only, so every worker process shares one copy through the page
+cache; a worker notices when the manifest has been replaced and maps the
+segments it doesn't have yet.
+
+An update writes a small delta segment of the changed documents (and the
+keys of the removed ones) and appends it to the manifest under a lock, at
+a cost proportional to the change rather than the index. A document is
+live in the newest segment holding it, unless a newer segment removes it.
+Once there are more than ``MAX_DELTAS`` deltas they are merged in a
+background thread, into the base segment too once they hold an eighth of
+its documents; updates carry on meanwhile.
+
+Matching runs against the index; the queryset's own filters (live,
+child_of, type, dates...) are applied by the database to the matching
+primary keys, so any filter Django supports works. Phrases match
+documents containing all their words, as positions are not indexed.
+"""
+import array
+import fcntl
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import heapq
+import itertools
+import logging
+import tempfile
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from wagtail.search.backends.base import (
+    BaseIndex,
+    BaseSearchBackend,
+    BaseSearchQueryCompiler,
+    BaseSearchResults,
+    get_model_root,
+)
+from wagtail.search.index import AutocompleteField, RelatedFields, SearchField
+from wagtail.search.query import And, Boost, Fuzzy, MatchAll, Not, Or, Phrase, PlainText
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'BM25SEG2'
+SEGMENT_SUFFIX = '.seg'
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Type codes of a segment's arrays
+SEGMENT_ARRAYS = {
+    'doc_pks': 'q', 'doc_models': 'H', 'doc_lengths': 'f',
+    'removed_pks': 'q', 'removed_models': 'H',
+    'term_offsets': 'I', 'term_bytes': 'B', 'term_starts': 'I',
+    'post_docs': 'I', 'post_fields': 'H', 'post_tfs': 'f',
+}
+
+# Deltas merge into the base once they hold this fraction of its documents
+BASE_MERGE_FRACTION = 1 / 8
+
+# Attempts at loading a snapshot whose segments are being merged away
+LOAD_ATTEMPTS = 3
+
+# Rows fetched per query when matching primary keys against a queryset
+FILTER_CHUNK_SIZE = 10000
+
+
+def align(offset):
+    return -(-offset // 8) * 8
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.casefold())
+
+
+def flatten(value):
+    """The strings in a field value (searchable content may be a list)"""
+    if value is None:
+        return
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            yield from flatten(item)
+    else:
+        yield str(value)
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def indexed_fields(model):
+    """(name, boost, field) for each full-text field of ``model``"""
+    seen = set()
+    for field in model.get_search_fields():
+        if isinstance(field, (SearchField, AutocompleteField, RelatedFields)) and field.field_name not in seen:
+            seen.add(field.field_name)
+            yield field.field_name, getattr(field, 'boost', None) or 1.0, field
+
+
+def document_terms(obj):
+    """{field name: Counter of terms} for ``obj``, related fields as 'relation.field'"""
+    terms = {}
+    for name, boost, field in indexed_fields(type(obj)):
+        if isinstance(field, RelatedFields):
+            related = field.get_value(obj)
+            if related is None:
+                continue
+            related = related.all() if hasattr(related, 'all') else [related]
+            for item in related:
+                for subfield in field.fields:
+                    if isinstance(subfield, SearchField):
+                        counter = terms.setdefault((f'{name}.{subfield.field_name}', subfield.boost or 1.0), Counter())
+                        for text in flatten(subfield.get_value(item)):
+                            counter.update(tokenize(text))
+        else:
+            counter = terms.setdefault((name, boost), Counter())
+            for text in flatten(field.get_value(obj)):
+                counter.update(tokenize(text))
+    return {key: counter for key, counter in terms.items() if counter}
+
+
+class Document:
+    """The indexed form of one model instance"""
+
+    def __init__(self, obj):
+        self.model = model_label(get_model_root(type(obj)))
+        self.pk = obj.pk
+        self.fields = document_terms(obj)
+        self.length = sum(boost * sum(counter.values()) for (_, boost), counter in self.fields.items())
+
+    @property
+    def key(self):
+        return (self.model, self.pk)
+
+
+def is_indexable(obj):
+    # Generic Page rows are indexed through their specific model instead
+    specific_class = getattr(obj, 'specific_class', None)
+    return isinstance(obj.pk, int) and (specific_class is None or type(obj) is specific_class)
+
+
+class Vocabulary:
+    """
+    A segment's sorted terms, stored as UTF-8 bytes back to back with their
+    offsets. Indexing returns a term's bytes, so ``bisect`` searches it in
+    place; UTF-8 sorts like the code points it encodes.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return bytes(self.data[self.offsets[index]:self.offsets[index + 1]])
+
+    def find(self, term):
+        """Id of ``term`` (bytes), or None"""
+        index = bisect_left(self, term)
+        if index < len(self) and self[index] == term:
+            return index
+        return None
+
+    def prefixed(self, prefix):
+        """Ids of the terms starting with ``prefix`` (bytes)"""
+        index = bisect_left(self, prefix)
+        while index < len(self) and self[index].startswith(prefix):
+            yield index
+            index += 1
+
+
+class Segment:
+    """
+    One immutable, memory-mapped segment file: documents sorted by (model,
+    primary key), the keys it removes from older segments, and the postings
+    of its sorted vocabulary. ``name`` is the file's name in the index
+    directory.
+    """
+
+    def __init__(self, header, arrays, name=None, buffer=None):
+        self.name = name
+        self.buffer = buffer  # keeps the mapping open
+        self.models = header['models']
+        self.fields = header['fields']
+        self.model_ids = {model: index for index, model in enumerate(self.models)}
+        for array_name, values in arrays.items():
+            setattr(self, array_name, values)
+        self.vocabulary = Vocabulary(self.term_offsets, self.term_bytes)
+        self._field_ids = {}
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a search index segment")
+        header_length, = struct.unpack_from('<I', buffer, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(buffer[start:start + header_length])
+        data_start = align(start + header_length)
+
+        view = memoryview(buffer)
+        arrays = {}
+        for name, (typecode, offset, length) in header['arrays'].items():
+            itemsize = array.array(typecode).itemsize
+            offset += data_start
+            arrays[name] = view[offset:offset + length * itemsize].cast(typecode)
+
+        return cls(header, arrays, name=os.path.basename(path), buffer=buffer)
+
+    def __len__(self):
+        return len(self.doc_pks)
+
+    def key(self, slot):
+        return self.models[self.doc_models[slot]], self.doc_pks[slot]
+
+    def _find(self, models, pks, key):
+        model_id = self.model_ids.get(key[0])
+        if model_id is None:
+            return None
+        start = bisect_left(models, model_id)
+        end = bisect_right(models, model_id, start)
+        index = bisect_left(pks, key[1], start, end)
+        if index < end and pks[index] == key[1]:
+            return index
+        return None
+
+    def find_document(self, key):
+        """Slot of the document keyed by ``key``, or None"""
+        return self._find(self.doc_models, self.doc_pks, key)
+
+    def removes(self, key):
+        return self._find(self.removed_models, self.removed_pks, key) is not None
+
+    def shadows(self, key):
+        """Whether this segment replaces or removes ``key`` in older segments"""
+        return self.find_document(key) is not None or self.removes(key)
+
+    def field_ids(self, field_names):
+        """Ids of the fields under the top-level names ``field_names``; None for all"""
+        if field_names is None:
+            return None
+        field_names = frozenset(field_names)
+        if field_names not in self._field_ids:
+            self._field_ids[field_names] = {
+                index for index, name in enumerate(self.fields) if name.split('.')[0] in field_names
+            }
+        return self._field_ids[field_names]
+
+    def postings(self, term):
+        """Start and end of ``term``'s postings"""
+        term_id = self.vocabulary.find(term.encode())
+        if term_id is None:
+            return 0, 0
+        return self.term_starts[term_id], self.term_starts[term_id + 1]
+
+
+class Snapshot:
+    """
+    The index as listed by one version of the manifest: its segments, oldest
+    first, and the collection statistics BM25 needs. A document is live in
+    the newest segment holding it, unless a newer one removes it; documents
+    are numbered across segments (segment base + slot).
+    """
+
+    def __init__(self, segments=(), doc_count=0, total_length=0.0, stamp=None, manifest_file=None):
+        self.segments = list(segments)
+        self.stamp = stamp
+        # Held open while the snapshot is current, so that a new manifest
+        # can't reuse its inode and pass for it
+        self.manifest_file = manifest_file
+        self.doc_count = doc_count
+        self.total_length = total_length
+        self.avg_length = total_length / doc_count if doc_count else 0.0
+        self.bases = []
+        base = 0
+        for segment in self.segments:
+            self.bases.append(base)
+            base += len(segment)
+
+    def close(self):
+        if self.manifest_file is not None:
+            self.manifest_file.close()
+
+    def key(self, doc):
+        position = bisect_right(self.bases, doc) - 1
+        return self.segments[position].key(doc - self.bases[position])
+
+    def is_shadowed(self, position, key):
+        return any(segment.shadows(key) for segment in self.segments[position + 1:])
+
+    def find_live(self, key):
+        """(segment, slot) of the live document keyed by ``key``, or None"""
+        for segment in reversed(self.segments):
+            slot = segment.find_document(key)
+            if slot is not None:
+                return segment, slot
+            if segment.removes(key):
+                return None
+        return None
+
+    def prefix_terms(self, prefix):
+        """Indexed terms starting with ``prefix``, from the sorted vocabularies"""
+        prefix = prefix.encode()
+        terms = set()
+        for segment in self.segments:
+            terms.update(segment.vocabulary[term_id] for term_id in segment.vocabulary.prefixed(prefix))
+        return [term.decode() for term in sorted(terms)]
+
+    def score_term(self, term, field_names=None, k1=1.2, b=0.75):
+        """BM25 score of every live document containing ``term``, by document number"""
+        tfs = defaultdict(float)
+        lengths = {}
+        for position, segment in enumerate(self.segments):
+            start, end = segment.postings(term)
+            field_ids = segment.field_ids(field_names)
+            has_newer = position < len(self.segments) - 1
+            for index in range(start, end):
+                if field_ids is not None and segment.post_fields[index] not in field_ids:
+                    continue
+                slot = segment.post_docs[index]
+                doc = self.bases[position] + slot
+                if doc not in lengths:
+                    live = not has_newer or not self.is_shadowed(position, segment.key(slot))
+                    lengths[doc] = segment.doc_lengths[slot] if live else None
+                if lengths[doc] is not None:
+                    tfs[doc] += segment.post_tfs[index]
+
+        if not tfs:
+            return {}
+
+        idf = math.log(1 + (self.doc_count - len(tfs) + 0.5) / (len(tfs) + 0.5))
+        avg_length = self.avg_length or 1.0
+        return {
+            doc: idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[doc] / avg_length))
+            for doc, tf in tfs.items()
+        }
+
+    def live_docs(self):
+        live = {}
+        for position, segment in enumerate(self.segments):
+            for slot in range(len(segment)):
+                if not self.is_shadowed(position, segment.key(slot)):
+                    live[self.bases[position] + slot] = 0.0
+        return live
+
+
+def write_segment(path, models, fields, documents, removed, postings):
+    """
+    Write a segment file next to the manifest at ``path`` and return its
+    name. ``documents`` are (model id, pk, length) and ``removed`` (model
+    id, pk) tuples, both sorted; ``postings`` yields (term, [(slot, field
+    id, tf), ...]) in term order, terms as UTF-8 bytes.
+    """
+    arrays = {name: array.array(typecode) for name, typecode in SEGMENT_ARRAYS.items()}
+    for model_id, pk, length in documents:
+        arrays['doc_models'].append(model_id)
+        arrays['doc_pks'].append(pk)
+        arrays['doc_lengths'].append(length)
+    for model_id, pk in removed:
+        arrays['removed_models'].append(model_id)
+        arrays['removed_pks'].append(pk)
+
+    arrays['term_offsets'].append(0)
+    arrays['term_starts'].append(0)
+    for term, entries in postings:
+        arrays['term_bytes'].frombytes(term)
+        arrays['term_offsets'].append(len(arrays['term_bytes']))
+        for slot, field_id, tf in entries:
+            arrays['post_docs'].append(slot)
+            arrays['post_fields'].append(field_id)
+            arrays['post_tfs'].append(tf)
+        arrays['term_starts'].append(len(arrays['post_docs']))
+
+    # Lay the arrays out after the header, each 8-byte aligned
+    layout = {}
+    offset = 0
+    for name, values in arrays.items():
+        layout[name] = [values.typecode, offset, len(values)]
+        offset = align(offset + len(values) * values.itemsize)
+
+    header = json.dumps({'models': models, 'fields': fields, 'arrays': layout}).encode()
+    data_start = align(len(MAGIC) + 4 + len(header))
+
+    directory, prefix = os.path.split(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=prefix + '.', suffix=SEGMENT_SUFFIX, delete=False) as f:
+        f.write(MAGIC + struct.pack('<I', len(header)) + header)
+        for name, values in arrays.items():
+            f.seek(data_start + layout[name][1])
+            f.write(values.tobytes())
+        f.truncate(data_start + offset)
+    return os.path.basename(f.name)
+
+
+def write_documents(path, documents, removed=()):
+    """Write a segment of ``documents`` that also removes the keys in ``removed``"""
+    documents = sorted(documents, key=lambda document: document.key)
+    models = sorted({document.model for document in documents} | {model for model, _ in removed})
+    model_ids = {model: index for index, model in enumerate(models)}
+    fields = sorted({field for document in documents for field, _ in document.fields})
+    field_ids = {field: index for index, field in enumerate(fields)}
+
+    postings = defaultdict(list)
+    for slot, document in enumerate(documents):
+        for (field, boost), counter in document.fields.items():
+            for term, count in counter.items():
+                postings[term.encode()].append((slot, field_ids[field], count * boost))
+
+    return write_segment(
+        path, models, fields,
+        [(model_ids[document.model], document.pk, document.length) for document in documents],
+        sorted((model_ids[model], pk) for model, pk in removed),
+        sorted(postings.items()),
+    )
+
+
+def merge_segments(path, segments, drop_removed=False):
+    """
+    Write one segment holding what ``segments`` (the newest run of an
+    index's segments, oldest first) hold together, and return its name.
+    With ``drop_removed`` (the run starts at the oldest segment) nothing is
+    left to remove documents from, so the removed keys are dropped.
+    """
+    live = []
+    for position, segment in enumerate(segments):
+        newer = segments[position + 1:]
+        for slot in range(len(segment)):
+            key = segment.key(slot)
+            if not any(other.shadows(key) for other in newer):
+                live.append((key, position, slot))
+    live.sort()
+
+    removed = set()
+    if not drop_removed:
+        for segment in segments:
+            removed.update(
+                (segment.models[model_id], pk) for model_id, pk in zip(segment.removed_models, segment.removed_pks)
+            )
+        removed -= {key for key, _, _ in live}
+
+    models = sorted({key[0] for key, _, _ in live} | {model for model, _ in removed})
+    model_ids = {model: index for index, model in enumerate(models)}
+    fields = sorted({field for segment in segments for field in segment.fields})
+    field_ids = {field: index for index, field in enumerate(fields)}
+    field_maps = [[field_ids[field] for field in segment.fields] for segment in segments]
+
+    remaps = [{} for _ in segments]
+    for new_slot, (_, position, slot) in enumerate(live):
+        remaps[position][slot] = new_slot
+
+    def terms(position, segment):
+        for term_id in range(len(segment.vocabulary)):
+            yield segment.vocabulary[term_id], position, term_id
+
+    def postings():
+        terms_in_order = heapq.merge(*(terms(position, segment) for position, segment in enumerate(segments)))
+        for term, group in itertools.groupby(terms_in_order, key=lambda entry: entry[0]):
+            entries = []
+            for _, position, term_id in group:
+                segment, remap = segments[position], remaps[position]
+                for index in range(segment.term_starts[term_id], segment.term_starts[term_id + 1]):
+                    slot = remap.get(segment.post_docs[index])
+                    if slot is not None:
+                        entries.append((slot, field_maps[position][segment.post_fields[index]], segment.post_tfs[index]))
+            if entries:
+                entries.sort()
+                yield term, entries
+
+    return write_segment(
+        path, models, fields,
+        [(model_ids[key[0]], key[1], segments[position].doc_lengths[slot]) for key, position, slot in live],
+        sorted((model_ids[model], pk) for model, pk in removed),
+        postings(),
+    )
+
+
+def write_manifest(path, names, doc_count, total_length):
+    directory, prefix = os.path.split(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile('w', dir=directory, prefix=prefix + '.', suffix='.tmp', delete=False) as f:
+        json.dump({'segments': names, 'doc_count': doc_count, 'total_length': total_length}, f)
+    os.replace(f.name, path)
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@contextmanager
+def file_lock(path, blocking=True):
+    """Hold an exclusive lock on ``path``; yields False if it is taken and ``blocking`` is off"""
+    with open(path, 'a') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+# Per process: segments by file path (they never change), and the current
+# snapshot of each index by manifest path
+_segments = {}
+_snapshots = {}
+
+
+def get_segment(path):
+    if path not in _segments:
+        _segments[path] = Segment.load(path)
+    return _segments[path]
+
+
+class BM25Index(BaseIndex):
+    def reset(self):
+        self.backend.update(reset=True)
+
+    def add_items(self, model, items):
+        self.backend.update(documents=[Document(obj) for obj in items if is_indexable(obj)])
+
+    def delete_item(self, item):
+        self.backend.update(removed=[(model_label(get_model_root(type(item))), item.pk)])
+
+
+class BM25RebuildIndex(BM25Index):
+    """Collects every document in memory; the rebuilder writes them in one go"""
+
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.documents = []
+
+    def add_items(self, model, items):
+        self.documents.extend(Document(obj) for obj in items if is_indexable(obj))
+
+
+class BM25Rebuilder:
+    def __init__(self, index):
+        self.index = BM25RebuildIndex(index.backend)
+
+    def start(self):
+        return self.index
+
+    def finish(self):
+        self.index.backend.update(documents=self.index.documents, reset=True)
+
+
+class BM25SearchQueryCompiler(BaseSearchQueryCompiler):
+    # Treat the last word of a plain text query as a prefix
+    prefix_last_term = False
+
+    def score(self, backend, snapshot):
+        """Scores of the matching documents of the queryset's model, by primary key"""
+        scores = self.evaluate(self.query, backend, snapshot, self.fields or None)
+        model = model_label(get_model_root(self.queryset.model))
+        result = {}
+        for doc, score in scores.items():
+            doc_model, pk = snapshot.key(doc)
+            if doc_model == model:
+                result[pk] = score
+        return result
+
+    def evaluate(self, query, backend, snapshot, field_names, boost=1.0):
+        if isinstance(query, (PlainText, Fuzzy)):
+            words = tokenize(query.query_string)
+            term_scores = [
+                self.score_terms([word], backend, snapshot, field_names, boost)
+                for word in words[:-1] if word
+            ]
+            if words:
+                last = list(snapshot.prefix_terms(words[-1])) if self.prefix_last_term else [words[-1]]
+                term_scores.append(self.score_terms(last, backend, snapshot, field_names, boost))
+            if getattr(query, 'operator', 'or') == 'and':
+                return self.intersect(term_scores)
+            return self.union(term_scores)
+
+        if isinstance(query, Phrase):
+            words = tokenize(query.query_string)
+            return self.intersect([self.score_terms([word], backend, snapshot, field_names, boost) for word in words])
+
+        if isinstance(query, Boost):
+            return self.evaluate(query.subquery, backend, snapshot, field_names, boost * query.boost)
+
+        if isinstance(query, MatchAll):
+            return snapshot.live_docs()
+
+        if isinstance(query, Not):
+            excluded = self.evaluate(query.subquery, backend, snapshot, field_names, boost)
+            return {doc: 0.0 for doc in snapshot.live_docs() if doc not in excluded}
+
+        if isinstance(query, And):
+            return self.intersect([self.evaluate(sub, backend, snapshot, field_names, boost) for sub in query.subqueries])
+
+        if isinstance(query, Or):
+            return self.union([self.evaluate(sub, backend, snapshot, field_names, boost) for sub in query.subqueries])
+
+        raise NotImplementedError(f"`{query.__class__.__name__}` is not supported by the BM25 search backend.")
+
+    def score_terms(self, terms, backend, snapshot, field_names, boost):
+        """Combined scores of ``terms`` (one word, or a prefix's expansions)"""
+        scores = defaultdict(float)
+        for term in terms:
+            for doc, score in snapshot.score_term(term, field_names, backend.k1, backend.b).items():
+                scores[doc] += score * boost
+        return scores
+
+    @staticmethod
+    def union(score_sets):
+        scores = defaultdict(float)
+        for score_set in score_sets:
+            for doc, score in score_set.items():
+                scores[doc] += score
+        return scores
+
+    @staticmethod
+    def intersect(score_sets):
+        if not score_sets:
+            return {}
+        common = set(score_sets[0]).intersection(*score_sets[1:])
+        return {doc: sum(score_set[doc] for score_set in score_sets) for doc in common}
+
+
+class BM25AutocompleteQueryCompiler(BM25SearchQueryCompiler):
+    prefix_last_term = True
+
+
+def filter_pks(queryset, pks):
+    """
+    The ``pks`` that pass ``queryset``'s filters, a chunk per query to stay
+    under the database's limit on query parameters
+    """
+    matching = []
+    for start in range(0, len(pks), FILTER_CHUNK_SIZE):
+        chunk = pks[start:start + FILTER_CHUNK_SIZE]
+        matching += dict.fromkeys(queryset.filter(pk__in=chunk).values_list('pk', flat=True))
+    return matching
+
+
+class BM25SearchResults(BaseSearchResults):
+    def ranking(self):
+        """
+        Primary keys of the matches that pass the queryset's filters, in
+        result order, with their scores. Computed once per search and shared
+        by every slice of it.
+        """
+        compiler = self.query_compiler
+        if getattr(compiler, 'ranking', None) is None:
+            scores = compiler.score(self.backend, self.backend.get_snapshot())
+            queryset = compiler.queryset
+            pks = list(scores)
+
+            if compiler.order_by_relevance:
+                ordered = sorted(filter_pks(queryset, pks), key=lambda pk: (-scores[pk], pk))
+            else:
+                if not queryset.query.order_by:
+                    queryset = queryset.order_by('-pk')
+                ordered = filter_pks(queryset, pks)
+                if len(pks) > FILTER_CHUNK_SIZE:
+                    # Each chunk came back in the queryset's order; put them in it together
+                    matching = set(ordered)
+                    ordered = list(dict.fromkeys(
+                        pk for pk in queryset.values_list('pk', flat=True).iterator() if pk in matching
+                    ))
+
+            compiler.ranking = (ordered, scores)
+        return compiler.ranking
+
+    def _do_search(self):
+        ordered, scores = self.ranking()
+        pks = ordered[self.start:self.stop]
+        queryset = self.query_compiler.queryset
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+
+        objects = queryset.order_by().in_bulk(pks)
+        results = [objects[pk] for pk in pks if pk in objects]
+        if self._score_field:
+            for obj in results:
+                setattr(obj, self._score_field, scores.get(obj.pk))
+        return results
+
+    def _do_count(self):
+        ordered, _ = self.ranking()
+        return len(ordered[self.start:self.stop])
+
+
+class BM25SearchBackend(BaseSearchBackend):
+    query_compiler_class = BM25SearchQueryCompiler
+    autocomplete_query_compiler_class = BM25AutocompleteQueryCompiler
+    results_class = BM25SearchResults
+    rebuilder_class = BM25Rebuilder
+    index_class = BM25Index
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.path = str(params.get('PATH', settings.BASE_DIR / 'search-index.bm25'))
+        self.k1 = params.get('K1', 1.2)
+        self.b = params.get('B', 0.75)
+        self.max_deltas = params.get('MAX_DELTAS', 8)
+        self.background_merge = params.get('BACKGROUND_MERGE', True)
+
+    def segment_path(self, name):
+        return os.path.join(os.path.dirname(os.path.abspath(self.path)), name)
+
+    def get_snapshot(self):
+        """The current index, reloaded if another process has changed the manifest"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return Snapshot()
+
+        snapshot = _snapshots.get(self.path)
+        if snapshot is None or snapshot.stamp != (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+            if snapshot is not None:
+                snapshot.close()
+            snapshot = _snapshots[self.path] = self.load_snapshot()
+        return snapshot
+
+    def load_snapshot(self):
+        for attempt in range(LOAD_ATTEMPTS):
+            try:
+                manifest_file = open(self.path, 'rb')
+            except FileNotFoundError:
+                return Snapshot()
+            try:
+                stat = os.fstat(manifest_file.fileno())
+                manifest = json.loads(manifest_file.read())
+                paths = [self.segment_path(name) for name in manifest['segments']]
+                segments = [get_segment(path) for path in paths]
+            except FileNotFoundError:
+                # Merged away since the manifest was read, which has been replaced
+                manifest_file.close()
+                continue
+            except ValueError:
+                manifest_file.close()
+                raise ValueError(f"{self.path} is not a search index manifest; rebuild it with update_index")
+
+            prefix = os.path.abspath(self.path) + '.'
+            for path in [path for path in list(_segments) if path.startswith(prefix) and path not in paths]:
+                del _segments[path]
+            return Snapshot(
+                segments, manifest['doc_count'], manifest['total_length'],
+                stamp=(stat.st_ino, stat.st_mtime_ns, stat.st_size), manifest_file=manifest_file,
+            )
+        raise FileNotFoundError(f"The segments of {self.path} kept changing while loading")
+
+    def update(self, documents=(), removed=(), reset=False):
+        """Add, replace or remove documents, holding the index lock"""
+        documents = list({document.key: document for document in documents}.values())
+        with file_lock(self.path + '.lock'):
+            if reset:
+                name = write_documents(self.path, documents)
+                write_manifest(self.path, [name], len(documents), sum(document.length for document in documents))
+                self.remove_segments(keep=[name])
+                return
+
+            snapshot = self.get_snapshot()
+            doc_count, total_length = snapshot.doc_count, snapshot.total_length
+            updated = {document.key for document in documents}
+            removed_keys = []
+            for key in updated | set(removed):
+                found = snapshot.find_live(key)
+                if found is not None:
+                    segment, slot = found
+                    doc_count -= 1
+                    total_length -= segment.doc_lengths[slot]
+                    if key not in updated:
+                        removed_keys.append(key)
+            if not documents and not removed_keys:
+                return
+
+            name = write_documents(self.path, documents, removed_keys)
+            names = [segment.name for segment in snapshot.segments] + [name]
+            write_manifest(
+                self.path, names,
+                doc_count + len(documents), total_length + sum(document.length for document in documents),
+            )
+
+        if len(names) - 1 > self.max_deltas:
+            if self.background_merge:
+                threading.Thread(target=self.merge_in_background, daemon=True).start()
+            else:
+                self.merge()
+
+    def merge(self):
+        """
+        Merge the delta segments into one, or into the base once they hold
+        a fraction of its documents. The merged segment is written without
+        the index lock, so updates carry on meanwhile; nothing happens if
+        another process is already merging.
+        """
+        with file_lock(self.path + '.merge.lock', blocking=False) as acquired:
+            if not acquired:
+                return
+            segments = self.get_snapshot().segments
+            if len(segments) < 2:
+                return
+
+            base, deltas = segments[0], segments[1:]
+            into_base = sum(len(segment) for segment in deltas) >= len(base) * BASE_MERGE_FRACTION
+            run = segments if into_base else deltas
+            name = merge_segments(self.path, run, drop_removed=into_base)
+
+            with file_lock(self.path + '.lock'):
+                with open(self.path) as f:
+                    manifest = json.load(f)
+                names = manifest['segments']
+                start = 0 if into_base else 1
+                merged = [segment.name for segment in run]
+                if names[start:start + len(merged)] != merged:
+                    # Reset meanwhile
+                    remove_file(self.segment_path(name))
+                    return
+                names[start:start + len(merged)] = [name]
+                write_manifest(self.path, names, manifest['doc_count'], manifest['total_length'])
+
+            for old in merged:
+                remove_file(self.segment_path(old))
+
+    def merge_in_background(self):
+        try:
+            self.merge()
+        except Exception:
+            logger.exception("Merging the segments of %s failed", self.path)
+
+    def remove_segments(self, keep):
+        """Delete the segment files of this index not in ``keep``"""
+        directory, prefix = os.path.split(os.path.abspath(self.path))
+        for name in os.listdir(directory):
+            if name.startswith(prefix + '.') and name.endswith(SEGMENT_SUFFIX) and name not in keep:
+                remove_file(os.path.join(directory, name))
+
+
+SearchBackend = BM25SearchBackend
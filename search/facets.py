@@ -0,0 +1,84 @@
+"""
+Facets of the site search results.
+
+A query's hits are cached with the result type and year each one counts
+towards (see ``describe_hits``), so one full-text search gives the ranked
+results, the counts per type and per year, and every narrowed view of
+them: picking a facet filters the cached hits instead of searching again.
+Only the first ``SEARCH_CACHE_MAX_RESULTS`` hits are cached, so past that
+the counts are lower bounds and shown as such.
+
+Each facet's counts are taken with the other facet applied, so "Albums
+(30)" stays accurate while a year is selected and vice versa.
+"""
+from collections import Counter
+
+from django.contrib.contenttypes.models import ContentType
+
+from wagtail.models import Page
+
+from .results import DATE_FIELDS, RESULT_TYPES
+
+# Result type slug of each page type offered as a facet
+TYPE_SLUGS = {model: slug for slug, (_, models) in RESULT_TYPES.items() for model in models}
+
+
+def describe_hits(ids):
+    """
+    ``[(page id, type slug, year), ...]`` in rank order: one query for the
+    pages' types, plus one per type with a date to read the year from
+    """
+    content_types = dict(Page.objects.filter(pk__in=ids).values_list('pk', 'content_type_id'))
+
+    ids_by_type = {}
+    for pk, content_type_id in content_types.items():
+        ids_by_type.setdefault(content_type_id, []).append(pk)
+
+    slugs = {}
+    dates = {}
+    for content_type_id, type_ids in ids_by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        slugs[content_type_id] = TYPE_SLUGS.get(model, '')
+        field = next((name for name in DATE_FIELDS if hasattr(model, name)), None)
+        if field:
+            dates.update(model.objects.filter(pk__in=type_ids).values_list('pk', field))
+
+    return [
+        (pk, slugs.get(content_types[pk], ''), dates[pk].year if dates.get(pk) else None)
+        for pk in ids if pk in content_types
+    ]
+
+
+def narrow(hits, result_type='', year=None):
+    """Ids of the hits of ``result_type`` and ``year`` (either may be unset)"""
+    return [
+        pk for pk, hit_type, hit_year in hits
+        if (not result_type or hit_type == result_type) and (year is None or hit_year == year)
+    ]
+
+
+def facet_counts(hits, result_type='', year=None, total=None):
+    """
+    Counts of the hits per type (within the selected year) and per year,
+    newest first (within the selected type). ``total`` is the number of
+    matches when ``hits`` holds only the first of them; the counts are then
+    marked as truncated.
+    """
+    type_counts = Counter(hit_type for _, hit_type, hit_year in hits if year is None or hit_year == year)
+    year_counts = Counter(
+        hit_year for _, hit_type, hit_year in hits
+        if hit_year is not None and (not result_type or hit_type == result_type)
+    )
+    truncated = total is not None and total > len(hits)
+    return {
+        'total': total if truncated and year is None else sum(type_counts.values()),
+        'truncated': truncated,
+        'types': [
+            (slug, label, type_counts[slug])
+            for slug, (label, _) in RESULT_TYPES.items()
+            if type_counts[slug] or slug == result_type
+        ],
+        'years': sorted(year_counts.items(), reverse=True),
+    }
@@ -0,0 +1,166 @@
+"""
+Presentation of site search results.
+
+A page of search hits comes back from the backend as generic ``Page`` rows.
+``prepare_results`` upgrades them to their specific models with one query
+per content type, resolves their thumbnails (and renditions) in one more,
+and attaches a highlighted snippet built from each model's search_fields,
+so a results page costs a fixed number of queries however many types it
+mixes.
+"""
+import re
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+
+from wagtail.images.models import Image
+from wagtail.search import index
+
+from pages.images import responsive_filter_specs
+from pages.models import (
+    ArticlePage,
+    EditorialPage,
+    EventPage,
+    GalleryAlbumPage,
+    HistoricalEventPage,
+    InterviewPage,
+    NewsPage,
+    PressAlbumPage,
+    PressReleasePage,
+)
+
+# Result type filters offered on the search page: slug -> (label, page types)
+RESULT_TYPES = {
+    'press': ('Press', [PressReleasePage, NewsPage, InterviewPage, EditorialPage]),
+    'events': ('Events', [EventPage]),
+    'articles': ('Articles', [ArticlePage]),
+    'albums': ('Albums', [GalleryAlbumPage, PressAlbumPage]),
+    'history': ('History', [HistoricalEventPage]),
+}
+
+# Fields shown on a result card, first one a page type has wins
+TITLE_FIELDS = ('short_title', 'event_title', 'album_title', 'article_title', 'category_name', 'page_title')
+DATE_FIELDS = ('press_date', 'event_start_date', 'event_date', 'album_date', 'publish_date')
+IMAGE_FIELDS = ('featured_image', 'event_image')
+
+THUMBNAIL_SPEC = 'fill-160x120'
+SNIPPET_LENGTH = 200
+
+
+def first_attr(page, names):
+    for name in names:
+        value = getattr(page, name, None)
+        if value:
+            return value
+    return None
+
+
+def specific_queryset(model, ids):
+    queryset = model.objects.filter(pk__in=ids)
+    if hasattr(model, 'with_card_data'):
+        # Albums: cover image id and photo count, as on the gallery cards
+        return model.with_card_data(queryset)
+    return queryset
+
+
+def upgrade_to_specific(pages):
+    """Replace generic pages with their specific instances, one query per content type"""
+    ids_by_type = defaultdict(list)
+    for page in pages:
+        ids_by_type[page.content_type_id].append(page.pk)
+
+    specific = {}
+    for content_type_id, ids in ids_by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        specific.update(specific_queryset(model, ids).in_bulk(ids))
+
+    return [specific.get(page.pk, page) for page in pages]
+
+
+def get_image_id(page):
+    card_cover = getattr(page, 'card_cover_image_id', None)
+    if card_cover:
+        return card_cover
+    for name in IMAGE_FIELDS:
+        image_id = getattr(page, f'{name}_id', None)
+        if image_id:
+            return image_id
+    return None
+
+
+def attach_thumbnails(results):
+    """Resolve every result's thumbnail, with renditions, in a single query"""
+    image_ids = {get_image_id(result) for result in results} - {None}
+    images = Image.objects.prefetch_renditions(
+        *responsive_filter_specs(THUMBNAIL_SPEC)
+    ).in_bulk(image_ids) if image_ids else {}
+
+    for result in results:
+        result.search_thumbnail = images.get(get_image_id(result))
+
+
+def query_terms(query):
+    return [term for term in query.lower().split() if len(term) > 1]
+
+
+def searchable_text(page):
+    """(field name, plain text) for each of the page's indexed text fields"""
+    for field in page.search_fields:
+        if isinstance(field, index.SearchField) and field.field_name != 'title':
+            value = getattr(page, field.field_name, None)
+            if isinstance(value, str) and value:
+                yield field.field_name, strip_tags(value)
+
+
+def highlight(text, pattern):
+    """Escape ``text`` and wrap matches of ``pattern`` in <mark>"""
+    parts = pattern.split(text)
+    return ''.join(
+        f'<mark>{escape(part)}</mark>' if index % 2 else escape(part)
+        for index, part in enumerate(parts)
+    )
+
+
+def build_snippet(page, terms):
+    """
+    A short excerpt around the first query term found in the page's indexed
+    fields, with the terms highlighted
+    """
+    texts = [' '.join(text.split()) for _, text in searchable_text(page)]
+    if not terms:
+        return escape((texts or [page.search_description or ''])[0][:SNIPPET_LENGTH])
+
+    pattern = re.compile('(' + '|'.join(re.escape(term) for term in terms) + ')', re.IGNORECASE)
+    for text in texts:
+        match = pattern.search(text)
+        if match:
+            start = max(match.start() - SNIPPET_LENGTH // 3, 0)
+            excerpt = text[start:start + SNIPPET_LENGTH]
+            prefix = '… ' if start else ''
+            suffix = ' …' if start + SNIPPET_LENGTH < len(text) else ''
+            return mark_safe(prefix + highlight(excerpt, pattern) + suffix)
+
+    fallback = page.search_description or (texts[0] if texts else '')
+    return mark_safe(highlight(fallback[:SNIPPET_LENGTH], pattern))
+
+
+def prepare_results(pages, query):
+    """
+    Upgrade a page of search hits for display: specific models, card
+    title/date, thumbnail and highlighted snippet
+    """
+    results = upgrade_to_specific(list(pages))
+    terms = query_terms(query or '')
+
+    for result in results:
+        result.search_title = first_attr(result, TITLE_FIELDS) or result.title
+        result.search_date = first_attr(result, DATE_FIELDS)
+        result.search_type = result._meta.verbose_name
+        result.search_snippet = build_snippet(result, terms)
+
+    attach_thumbnails(results)
+    return results
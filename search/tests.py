@@ -0,0 +1,244 @@
+import datetime
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from wagtail.models import Page
+from wagtail.search.backends import get_search_backend
+
+from pages.models import GalleryAlbumPage, PressReleasePage
+from pages.tests import PagesTestCase
+
+from . import bm25
+
+
+class SearchTests(PagesTestCase):
+    """
+    Tests for the site search results page.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.press = self.add_press_index()
+        self.gallery = self.add_gallery()
+
+    def test_results_are_specific_with_snippets(self):
+        self.add_release(
+            self.press, "Budget reply", content="<p>The samithi welcomed the <b>harvest</b> budget today.</p>",
+        )
+        self.add_album(self.gallery, "Harvest rally", images=[self.make_image()])
+
+        response = self.client.get('/search/', {'query': 'harvest'})
+        results = {type(result): result for result in response.context['search_results']}
+        self.assertEqual(set(results), {PressReleasePage, GalleryAlbumPage})
+        self.assertIn('<mark>harvest</mark> budget', results[PressReleasePage].search_snippet)
+        self.assertEqual(results[GalleryAlbumPage].search_date, datetime.date(2024, 1, 1))
+        self.assertIsNotNone(results[GalleryAlbumPage].search_thumbnail)
+
+    def test_type_filter(self):
+        self.add_release(self.press, "Harvest statement")
+        self.add_album(self.gallery, "Harvest rally", images=[self.make_image()])
+
+        response = self.client.get('/search/', {'query': 'harvest', 'type': 'albums'})
+        self.assertEqual([type(result) for result in response.context['search_results']], [GalleryAlbumPage])
+
+    def test_facets_come_from_one_search(self):
+        self.add_release(self.press, "Harvest statement")
+        self.add_release(self.press, "Harvest reply")
+        self.add_album(self.gallery, "Harvest rally", images=[self.make_image()])
+
+        response = self.client.get('/search/', {'query': 'harvest'})
+        facets = response.context['facets']
+        self.assertEqual(facets['total'], 3)
+        self.assertEqual(facets['types'], [('press', 'Press', 2), ('albums', 'Albums', 1)])
+        self.assertEqual(facets['years'], [(2024, 3)])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/search/', {'query': 'harvest', 'type': 'press', 'year': 2024})
+        self.assertFalse(any('wagtailsearch' in query['sql'] for query in queries))
+        self.assertEqual([type(result) for result in response.context['search_results']], [PressReleasePage] * 2)
+        self.assertEqual(response.context['facets']['years'], [(2024, 2)])
+
+    @mock.patch('pages.search_cache.SEARCH_CACHE_MAX_RESULTS', 5)
+    def test_results_past_the_cached_hits(self):
+        for index in range(12):
+            self.add_release(self.press, f"Harvest note {index}")
+
+        response = self.client.get('/search/', {'query': 'harvest', 'page': 2})
+        results = response.context['search_results']
+        self.assertEqual(results.paginator.count, 12)
+        self.assertEqual(len(results), 2)
+        facets = response.context['facets']
+        self.assertEqual(facets['total'], 12)
+        self.assertTrue(facets['truncated'])
+        self.assertEqual(facets['types'], [('press', 'Press', 5)])
+        self.assertContains(response, 'Press (5+)')
+
+    def test_query_count_is_fixed(self):
+        self.add_release(self.press, "Harvest statement")
+        self.add_album(self.gallery, "Harvest rally", images=[self.make_image()])
+        self.count_queries('/search/', query='harvest')  # generate thumbnails
+        baseline = self.count_queries('/search/', query='harvest')
+
+        for index in range(3):
+            self.add_release(self.press, f"Harvest note {index}")
+            self.add_album(self.gallery, f"Harvest fair {index}", images=[self.make_image()])
+        self.count_queries('/search/', query='harvest')
+        self.assertEqual(self.count_queries('/search/', query='harvest'), baseline)
+
+
+class BM25BackendTests(PagesTestCase):
+    """
+    Tests for the in-process BM25 search backend.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.index_path = os.path.join(tempfile.mkdtemp(dir=self.media_root), 'search.bm25')
+        self.enterContext(override_settings(WAGTAILSEARCH_BACKENDS={
+            'default': {'BACKEND': 'search.bm25', 'PATH': self.index_path, 'MAX_DELTAS': 3, 'BACKGROUND_MERGE': False},
+        }))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.press = self.add_press_index()
+
+    def search(self, query):
+        return list(PressReleasePage.objects.live().child_of(self.press).search(query))
+
+    @mock.patch('search.bm25.FILTER_CHUNK_SIZE', 2)
+    def test_filters_are_applied_in_chunks(self):
+        releases = [self.add_release(self.press, f"Harvest statement {letter}") for letter in 'DBECA']
+        queryset = PressReleasePage.objects.live().child_of(self.press)
+
+        by_title = sorted(releases, key=lambda release: release.title)
+        self.assertEqual(list(queryset.order_by('title').search('harvest', order_by_relevance=False)), by_title)
+        self.assertCountEqual(list(queryset.search('harvest')), releases)
+
+    def segment_names(self):
+        with open(self.index_path) as f:
+            return json.load(f)['segments']
+
+    def test_boosted_title_matches_rank_first(self):
+        mention = self.add_release(
+            self.press, "Budget reply", content="<p>The <b>harvest</b> budget was discussed today.</p>",
+        )
+        titled = self.add_release(self.press, "Harvest statement")
+        self.add_release(self.press, "Unrelated")
+
+        self.assertEqual(self.search('harvest'), [titled, mention])
+        self.assertEqual(self.search('harvest budget'), [mention, titled])
+
+    def test_publish_and_unpublish_update_the_index(self):
+        release = self.add_release(self.press, "Harvest statement")
+        with self.captureOnCommitCallbacks(execute=True):
+            release.title = release.short_title = "Rally statement"
+            release.save_revision().publish()
+        self.assertEqual(self.search('harvest'), [])
+        self.assertEqual(self.search('rally'), [release])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            release.unpublish()
+        self.assertEqual(self.search('rally'), [])
+
+    def test_rebuilt_index_is_shared_through_the_file(self):
+        release = self.add_release(self.press, "Harvest statement")
+        os.remove(self.index_path)
+        self.assertEqual(self.search('harvest'), [])
+
+        call_command('update_index', stdout=io.StringIO())
+        bm25._segments.clear()  # as in a freshly started worker
+        bm25._snapshots.clear()
+        self.assertEqual(self.search('harvest'), [release])
+        self.assertEqual(list(Page.objects.live().autocomplete('harv')), [release.page_ptr])
+
+    def test_updates_append_delta_segments(self):
+        call_command('update_index', stdout=io.StringIO())
+        base, = self.segment_names()
+        base_stat = os.stat(os.path.join(os.path.dirname(self.index_path), base))
+
+        release = self.add_release(self.press, "Harvest statement")
+        names = self.segment_names()
+        self.assertEqual(names[0], base)
+        self.assertEqual(len(names), 2)
+        self.assertEqual(os.stat(os.path.join(os.path.dirname(self.index_path), base)), base_stat)
+        self.assertEqual(self.search('harvest'), [release])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            release.unpublish()
+        names = self.segment_names()
+        self.assertEqual(names[0], base)
+        self.assertEqual(len(names), 3)
+        self.assertEqual(self.search('harvest'), [])
+
+    def test_deltas_are_merged_past_the_limit(self):
+        call_command('update_index', stdout=io.StringIO())
+        releases = [self.add_release(self.press, f"Harvest statement {number}") for number in range(6)]
+        with self.captureOnCommitCallbacks(execute=True):
+            releases[0].unpublish()
+            releases[1].title = releases[1].short_title = "Rally statement"
+            releases[1].save_revision().publish()
+
+        names = self.segment_names()
+        self.assertLessEqual(len(names), 4)
+        files = [name for name in os.listdir(os.path.dirname(self.index_path)) if name.endswith('.seg')]
+        self.assertCountEqual(files, names)
+        self.assertCountEqual(self.search('harvest'), releases[2:])
+        self.assertEqual(self.search('rally'), [releases[1]])
+
+        backend = get_search_backend()
+        backend.merge()
+        self.assertLessEqual(len(self.segment_names()), 2)
+        self.assertCountEqual(self.search('harvest'), releases[2:])
+        self.assertEqual(self.search('rally'), [releases[1]])
+        snapshot = backend.get_snapshot()
+        self.assertEqual(snapshot.doc_count, len(snapshot.live_docs()))
+
+
+class AutocompleteTests(PagesTestCase):
+    """
+    Tests for the search box autocomplete endpoint.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.press = self.add_press_index()
+
+    def suggest(self, query):
+        response = self.client.get('/search/autocomplete/', {'q': query})
+        self.assertIn('public', response['Cache-Control'])
+        return [result['title'] for result in response.json()['results']]
+
+    def test_matches_any_word_run_and_card_titles(self):
+        self.add_release(self.press, "Statement on the harvest rally", short_title="Harvest rally")
+        self.add_release(self.press, "Rally for the harvest", short_title="Rally")
+
+        self.assertEqual(self.suggest('ral'), ["Rally", "Harvest rally"])
+        self.assertEqual(self.suggest('harvest r'), ["Harvest rally"])
+        self.assertEqual(self.suggest('statement on'), ["Harvest rally"])
+        self.assertEqual(self.suggest('r'), [])
+
+    def test_lookups_run_no_queries(self):
+        self.add_release(self.press, "Harvest statement", short_title="Harvest")
+        self.suggest('harv')
+        with self.assertNumQueries(0):
+            self.suggest('harve')
+
+    def test_publishing_updates_the_index(self):
+        release = self.add_release(self.press, "Harvest statement", short_title="Harvest", live=False)
+        self.assertEqual(self.suggest('harv'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            release.save_revision().publish()
+        with self.assertNumQueries(3):  # view restrictions, then just the published page
+            self.assertEqual(self.suggest('harv'), ["Harvest"])
+
+        release.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            release.unpublish()
+        self.assertEqual(self.suggest('harv'), [])
@@ -1,8 +1,19 @@
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.http import JsonResponse
 from django.template.response import TemplateResponse
+from django.utils.cache import patch_cache_control
 
 from wagtail.models import Page
 
+from pages.pagination import paginate_listing
+from pages.search_cache import RankedResults, search_hits
+
+from .autocomplete import MAX_RESULTS, lookup
+from .facets import describe_hits, facet_counts, narrow
+from .results import RESULT_TYPES, prepare_results
+
+# Seconds browsers and proxies may reuse an autocomplete response
+AUTOCOMPLETE_MAX_AGE = 60
+
 # To enable logging of search queries for use with the "Promoted search results" module
 # <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
 # uncomment the following line and the lines indicated in the search function
@@ -13,11 +24,29 @@ from wagtail.models import Page
 
 def search(request):
     search_query = request.GET.get("query", None)
-    page = request.GET.get("page", 1)
+    result_type = request.GET.get("type", "")
+    if result_type not in RESULT_TYPES:
+        result_type = ""
+    try:
+        year = int(request.GET.get("year", ""))
+    except ValueError:
+        year = None
 
     # Search
+    facets = None
     if search_query:
-        search_results = Page.objects.live().search(search_query)
+        pages = Page.objects.live()
+        # One search gives the ranked hits with their type and year; the
+        # facets and the selected type/year are taken from those
+        hits, total = search_hits(pages, search_query, "site", describe=describe_hits)
+        facets = facet_counts(hits, result_type, year, total)
+        if result_type or year is not None:
+            search_results = RankedResults(pages, narrow(hits, result_type, year))
+        else:
+            # Pages past the cached hits come from the search backend
+            search_results = RankedResults(
+                pages, narrow(hits), total, search=lambda: pages.search(search_query)
+            )
 
         # To log this query for use with the "Promoted search results" module:
 
@@ -28,13 +57,10 @@ def search(request):
         search_results = Page.objects.none()
 
     # Pagination
-    paginator = Paginator(search_results, 10)
-    try:
-        search_results = paginator.page(page)
-    except PageNotAnInteger:
-        search_results = paginator.page(1)
-    except EmptyPage:
-        search_results = paginator.page(paginator.num_pages)
+    search_results = paginate_listing(request, search_results, 10)
+
+    # Specific pages, thumbnails and snippets for the whole page at once
+    search_results.object_list = prepare_results(search_results.object_list, search_query)
 
     return TemplateResponse(
         request,
@@ -42,5 +68,19 @@ def search(request):
         {
             "search_query": search_query,
             "search_results": search_results,
+            "result_type": result_type,
+            "year": year,
+            "facets": facets,
         },
     )
+
+
+def autocomplete(request):
+    try:
+        limit = min(max(int(request.GET.get("limit", MAX_RESULTS)), 1), MAX_RESULTS)
+    except ValueError:
+        limit = MAX_RESULTS
+
+    response = JsonResponse({"results": lookup(request.GET.get("q", ""), limit)})
+    patch_cache_control(response, public=True, max_age=AUTOCOMPLETE_MAX_AGE)
+    return response